@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 
+import os
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -42,7 +43,10 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
-    'whitenoise.middleware.WhiteNoiseMiddleware',
+    # WhiteNoise com suporte a async (ver itens/assets.py)
+    'itens.assets.StaticFilesMiddleware',
+    # depois do WhiteNoise: arquivos estáticos não entram nas métricas
+    'itens.metrics.MetricsMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -69,18 +73,139 @@ TEMPLATES = [
 ]
 
 WSGI_APPLICATION = 'core.wsgi.application'
+ASGI_APPLICATION = 'core.asgi.application'
 
 
 # Database
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
 
+# Perfis do SQLite (ITENS_SQLITE_PERFIL). Com vários workers do gunicorn
+# o modo de journal padrão trava leitores durante cada commit e dá
+# "database is locked" quando duas transações tentam virar escrita ao
+# mesmo tempo. O perfil "wal" (padrão):
+# - journal em WAL: leitores nunca esperam escritores (e vice-versa);
+# - synchronous=NORMAL: seguro em WAL, sem fsync a cada commit;
+# - transações IMMEDIATE: a trava de escrita é pega no BEGIN, então
+#   ninguém falha no meio ao tentar promover uma leitura para escrita;
+# - timeout (busy_timeout): escritores esperam a vez em vez de falhar;
+# - cache de páginas e mmap maiores para as listas.
+# Os PRAGMAs rodam em cada conexão nova (init_command).
+#
+# O IMMEDIATE vale para TODO atomic() nesta conexão, mesmo um que só
+# leia: ele pega a trava de escrita e espera (ou faz esperar) os outros
+# escritores. Escolhi assim porque aqui os atomic() são quase todos de
+# escrita (services.py, lote, importação, fila), e porque no SQLite o
+# select_for_update não faz nada: é o BEGIN IMMEDIATE que põe em fila
+# duas aprovações do mesmo item (ver services.py). Leituras fora de
+# atomic() (as listagens; não uso ATOMIC_REQUESTS) não pegam trava e,
+# em WAL, não esperam ninguém. Então: leitura pura fica fora de
+# atomic(). Números: `manage.py benchmark_concorrencia`.
+
+SQLITE_PERFIS = {
+    'padrao': {},
+    'wal': {
+        'init_command': (
+            'PRAGMA journal_mode=WAL;'
+            'PRAGMA synchronous=NORMAL;'
+            'PRAGMA cache_size=-20000;'  # ~20 MB
+            'PRAGMA mmap_size=134217728;'  # 128 MB
+            'PRAGMA temp_store=MEMORY;'
+        ),
+        'transaction_mode': 'IMMEDIATE',
+        'timeout': 20,
+    },
+}
+
+SQLITE_PERFIL = os.environ.get('ITENS_SQLITE_PERFIL', 'wal')
+
 DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
+        'OPTIONS': dict(SQLITE_PERFIS[SQLITE_PERFIL]),
+        # conexões persistentes entre requisições (segundos; 0 = fecha sempre)
+        'CONN_MAX_AGE': int(os.environ.get('ITENS_CONN_MAX_AGE', '60')),
+        'CONN_HEALTH_CHECKS': True,
     }
 }
 
+# Réplica local para testar o roteamento: outro arquivo SQLite (uma
+# cópia do db.sqlite3, ou `migrate --database replica`).
+if os.environ.get('ITENS_SQLITE_REPLICA'):
+    DATABASES['replica'] = {
+        **DATABASES['default'],
+        'OPTIONS': dict(SQLITE_PERFIS[SQLITE_PERFIL]),
+        'NAME': os.environ['ITENS_SQLITE_REPLICA'],
+        'TEST': {'MIRROR': 'default'},
+    }
+
+# PostgreSQL (quando POSTGRES_DB está definido), com pool de conexões do
+# psycopg 3 (pip install "psycopg[pool]"). Com pool o CONN_MAX_AGE
+# precisa ser 0: quem reaproveita as conexões é o pool.
+# POSTGRES_REPLICA_HOST liga a réplica de leitura (ver itens/replica.py).
+if os.environ.get('POSTGRES_DB'):
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.postgresql',
+            'NAME': os.environ['POSTGRES_DB'],
+            'USER': os.environ.get('POSTGRES_USER', ''),
+            'PASSWORD': os.environ.get('POSTGRES_PASSWORD', ''),
+            'HOST': os.environ.get('POSTGRES_HOST', 'localhost'),
+            'PORT': os.environ.get('POSTGRES_PORT', '5432'),
+            'CONN_MAX_AGE': 0,
+            'CONN_HEALTH_CHECKS': True,
+            'OPTIONS': {
+                'pool': {
+                    'min_size': int(os.environ.get('POSTGRES_POOL_MIN', '2')),
+                    'max_size': int(os.environ.get('POSTGRES_POOL_MAX', '10')),
+                    'timeout': int(os.environ.get('POSTGRES_POOL_TIMEOUT', '10')),
+                },
+            },
+        }
+    }
+    if os.environ.get('POSTGRES_REPLICA_HOST'):
+        DATABASES['replica'] = {
+            **DATABASES['default'],
+            'HOST': os.environ['POSTGRES_REPLICA_HOST'],
+            'PORT': os.environ.get('POSTGRES_REPLICA_PORT', DATABASES['default']['PORT']),
+            'OPTIONS': {'pool': dict(DATABASES['default']['OPTIONS']['pool'])},
+            'TEST': {'MIRROR': 'default'},
+        }
+
+DATABASE_ROUTERS = ['itens.replica.ReplicaRouter']
+
+
+# Cache
+# https://docs.djangoproject.com/en/5.2/topics/cache/
+#
+# Por padrão fica em memória (por processo). Com ITENS_CACHE_DIR o cache
+# vai para arquivos locais e é compartilhado entre os workers do gunicorn.
+# A invalidação não depende do backend: a chave leva a versão dos dados
+# (ver itens/cache.py).
+
+if os.environ.get('ITENS_CACHE_DIR'):
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+            'LOCATION': os.environ['ITENS_CACHE_DIR'],
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'LOCATION': 'achados-e-perdidos',
+        }
+    }
+
+ITENS_CACHE_TIMEOUT = int(os.environ.get('ITENS_CACHE_TIMEOUT', '300'))
+
+# Fila de reivindicações para picos de envio (ver itens/fila.py): com
+# um caminho aqui, o formulário público responde 202 com um ticket e
+# `manage.py processar_fila` grava no banco em lotes. Vazio = grava na
+# hora, como sempre.
+ITENS_FILA_REIVINDICACOES = os.environ.get('ITENS_FILA_REIVINDICACOES', '')
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
@@ -118,10 +243,30 @@ USE_TZ = True
 
 STATIC_URL = 'static/'
 
-import os
 STATIC_ROOT = os.path.join(BASE_DIR, 'staticfiles')
 
-STATICFILES_STORAGE = 'whitenoise.storage.CompressedManifestStaticFilesStorage'
+# Django 5 não lê mais STATICFILES_STORAGE; o storage vai em STORAGES.
+# O collectstatic (via `manage.py preparar_estaticos`) minifica, gera
+# WebP, põe hash nos nomes e grava .gz/.br (ver itens/assets.py).
+STORAGES = {
+    'default': {
+        'BACKEND': 'django.core.files.storage.FileSystemStorage',
+    },
+    'staticfiles': {
+        'BACKEND': 'itens.assets.OptimizedStaticFilesStorage',
+    },
+}
+
+
+def _static_headers(headers, path, url):
+    # import tardio: itens.assets importa o storage do Django, que não
+    # pode ser carregado no meio do settings
+    from itens.assets import add_headers
+    add_headers(headers, path, url)
+
+
+# Arquivos com hash no nome: "immutable" por um ano.
+WHITENOISE_ADD_HEADERS_FUNCTION = _static_headers
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
 
@@ -38,3 +38,9 @@ class ReivindicacaoAdmin(admin.ModelAdmin):
     list_filter = ('status', 'data_envio')
     search_fields = ('nome_requerente', 'contato', 'detalhes')
     autocomplete_fields = ('item',)
+    # __str__ usa item.nome: sem o JOIN seria uma consulta a mais por
+    # linha da listagem (e na tela de edição/exclusão)
+    list_select_related = ('item',)
+
+    def get_queryset(self, request):
+        return super().get_queryset(request).select_related('item')
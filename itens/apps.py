@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class ItensConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'itens'
+
+    def ready(self):
+        # registra os receivers de sinais (busca textual etc.)
+        from . import signals  # noqa: F401
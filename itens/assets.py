@@ -0,0 +1,182 @@
+# ============================================================
+# Achados e Perdidos - UnDF
+# Arquivo: assets.py
+#
+# Preparação dos arquivos estáticos para produção (ver o comando
+# preparar_estaticos, que roda o collectstatic com este storage):
+#
+# 1. CSS e JS minificados (rcssmin / rjsmin);
+# 2. imagens ganham variantes WebP em algumas larguras, para o
+#    <picture> da tag {% imagem_responsiva %} (Pillow);
+# 3. o ManifestStaticFilesStorage põe o hash do conteúdo no nome
+#    (style.3f2a9c1b7e4d.css);
+# 4. o WhiteNoise grava .gz e .br (Brotli) ao lado de cada arquivo,
+#    e serve a versão comprimida que o navegador aceitar.
+#
+# Arquivos com hash no nome nunca mudam de conteúdo, então saem com
+# "immutable" e validade de um ano (add_headers): na segunda visita o
+# navegador nem pergunta ao servidor.
+#
+# As bibliotecas dos passos 1, 2 e do Brotli são opcionais: sem elas o
+# passo correspondente é pulado e o resto funciona igual.
+#
+# O StaticFilesMiddleware (no lugar do WhiteNoiseMiddleware) só existe
+# para o ASGI: o do WhiteNoise é só síncrono, e um middleware síncrono
+# na lista faz o Django rodar toda a cadeia abaixo dele num thread,
+# inclusive as views async.
+# ============================================================
+
+import os
+import re
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from whitenoise.middleware import WhiteNoiseMiddleware
+from whitenoise.storage import CompressedManifestStaticFilesStorage
+
+try:
+    import rcssmin
+except ImportError:
+    rcssmin = None
+
+try:
+    import rjsmin
+except ImportError:
+    rjsmin = None
+
+try:
+    from PIL import Image
+except ImportError:
+    Image = None
+
+
+# Larguras (px) das variantes WebP. O logo aparece com ~240px na
+# barra lateral e ~40px no celular; 480 cobre telas 2x.
+WEBP_WIDTHS = (64, 240, 480)
+WEBP_QUALITY = 80
+IMAGE_EXTENSIONS = (".png", ".jpg", ".jpeg")
+
+# Um ano, o máximo recomendado para "immutable".
+IMMUTABLE_MAX_AGE = 365 * 24 * 60 * 60
+
+
+def webp_variant_name(path: str, width: int) -> str:
+    """
+    "itens/logo.pequena.png", 240 -> "itens/logo.pequena.240w.webp"
+    """
+    base, _ = os.path.splitext(path)
+    return f"{base}.{width}w.webp"
+
+
+def minify(path: str, content: str):
+    """
+    Devolve o conteúdo minificado, ou None se não houver minificador
+    para esse tipo de arquivo (ou a biblioteca não estiver instalada).
+    """
+    if path.endswith(".css") and rcssmin is not None:
+        return rcssmin.cssmin(content)
+    if path.endswith(".js") and rjsmin is not None:
+        return rjsmin.jsmin(content)
+    return None
+
+
+def _is_minified(path: str) -> bool:
+    return bool(re.search(r"\.min\.(css|js)$", path))
+
+
+class OptimizedStaticFilesStorage(CompressedManifestStaticFilesStorage):
+    """
+    Storage do collectstatic (settings.STORAGES["staticfiles"]): minifica
+    e gera as variantes WebP na cópia em STATIC_ROOT antes do hash e da
+    compressão do WhiteNoise.
+    """
+
+    # Arquivo fora do manifesto (testes, collectstatic ainda não rodou)
+    # sai com o nome original em vez de derrubar a página com um 500.
+    manifest_strict = False
+
+    def stored_name(self, name):
+        try:
+            return super().stored_name(name)
+        except ValueError:
+            # nem no manifesto nem em STATIC_ROOT para calcular o hash
+            return name
+
+    def post_process(self, paths, dry_run=False, **options):
+        if not dry_run:
+            self.optimize(paths)
+        yield from super().post_process(paths, dry_run=dry_run, **options)
+
+    def optimize(self, paths):
+        """
+        Altera os arquivos já copiados para STATIC_ROOT. Cada arquivo
+        alterado (ou criado) passa a ser lido daqui no passo do hash,
+        e não da pasta static/ do app.
+        """
+        for path in list(paths):
+            if path.endswith((".css", ".js")) and not _is_minified(path):
+                with self.open(path) as f:
+                    original = f.read().decode("utf-8")
+                content = minify(path, original)
+                if content is not None and len(content) < len(original):
+                    self._replace(path, content.encode("utf-8"))
+                    paths[path] = (self, path)
+
+            elif path.lower().endswith(IMAGE_EXTENSIONS) and Image is not None:
+                for name in self._webp_variants(path):
+                    paths[name] = (self, name)
+
+    def _replace(self, path, content: bytes):
+        with open(self.path(path), "wb") as f:
+            f.write(content)
+
+    def _webp_variants(self, path):
+        with Image.open(self.path(path)) as image:
+            image.load()
+            for width in WEBP_WIDTHS:
+                if width > image.width:
+                    continue  # não amplio imagens pequenas
+                height = round(image.height * width / image.width)
+                name = webp_variant_name(path, width)
+                resized = image.resize((width, height), Image.LANCZOS)
+                resized.save(self.path(name), "WEBP", quality=WEBP_QUALITY, method=6)
+                yield name
+
+
+def add_headers(headers, path, url):
+    """
+    settings.WHITENOISE_ADD_HEADERS_FUNCTION: o WhiteNoise já marca os
+    arquivos com hash como "immutable" (com validade de 10 anos); aqui
+    a validade fica em um ano.
+    """
+    if "immutable" in headers.get("Cache-Control", ""):
+        headers["Cache-Control"] = f"max-age={IMMUTABLE_MAX_AGE}, public, immutable"
+
+
+class StaticFilesMiddleware(WhiteNoiseMiddleware):
+    """
+    WhiteNoiseMiddleware que também funciona em modo async (mesmo
+    esquema do MetricsMiddleware).
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response=None, *args, **kwargs):
+        super().__init__(get_response, *args, **kwargs)
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        return super().__call__(request)
+
+    async def __acall__(self, request):
+        if self.autorefresh:
+            # procura no disco a cada requisição (DEBUG): fora do event loop
+            static_file = await sync_to_async(self.find_file, thread_sensitive=False)(request.path_info)
+        else:
+            static_file = self.files.get(request.path_info)
+        if static_file is not None:
+            return self.serve(static_file, request)
+        return await self.get_response(request)
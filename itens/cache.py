@@ -0,0 +1,219 @@
+# ============================================================
+# Achados e Perdidos - UnDF
+# Arquivo: cache.py
+#
+# Cache das respostas de leitura, com invalidação por versão.
+#
+# Cada conjunto de dados ("itens", "reivindicacoes") tem um contador
+# na tabela VersaoDados. Toda gravação incrementa o contador (ver
+# ComRevisao.save em models.py e signals.py), e a chave do cache leva
+# a versão atual. Assim não
+# preciso apagar nada: depois de uma gravação a chave muda e a próxima
+# leitura remonta a resposta. Como a versão mora no banco, todos os
+# workers do gunicorn enxergam a mesma, mesmo com cache em memória.
+# ============================================================
+
+import hashlib
+import json
+from functools import wraps
+
+from asgiref.sync import iscoroutinefunction
+from django.conf import settings
+from django.core.cache import cache
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Case, Subquery, When
+from django.http import HttpResponse
+from django.utils.cache import patch_cache_control
+from django.views.decorators.http import condition
+
+from .models import Item, Reivindicacao, VersaoDados
+
+
+ITENS = "itens"
+REIVINDICACOES = "reivindicacoes"
+
+# Tabela e campo de data de cada conjunto de dados.
+DATASETS = {
+    ITENS: (Item, "data_criacao"),
+    REIVINDICACOES: (Reivindicacao, "data_envio"),
+}
+
+# Tempo máximo de vida de uma resposta no cache. A validade "de verdade"
+# vem da versão; o timeout só evita guardar versões antigas para sempre.
+CACHE_TIMEOUT = getattr(settings, "ITENS_CACHE_TIMEOUT", 300)
+
+
+def get_version(nome: str) -> tuple:
+    """
+    Versão atual de um conjunto de dados: (contador, momento da última
+    alteração). Se nunca foi alterado, devolve (0, None).
+
+    O momento entra junto para a chave não se repetir caso o contador
+    "volte" (transação desfeita, banco restaurado de backup etc.).
+    """
+    row = (
+        VersaoDados.objects
+        .filter(nome=nome)
+        .values_list("versao", "atualizado_em")
+        .first()
+    )
+    return row or (0, None)
+
+
+def make_key(prefix: str, version: tuple, params) -> str:
+    """
+    Monta a chave do cache a partir da versão (ver get_version) e dos
+    parâmetros da requisição (a ordem deles na URL não importa).
+    """
+    versao, atualizado_em = version
+    stamp = atualizado_em.timestamp() if atualizado_em else 0
+    raw = json.dumps(sorted(params.lists()))
+    digest = hashlib.sha1(raw.encode("utf-8")).hexdigest()
+    return f"itens:{prefix}:v{versao}:{stamp}:{digest}"
+
+
+def cached_json_response(key: str, build) -> HttpResponse:
+    """
+    Devolve a resposta JSON guardada em `key` ou chama build() para
+    montá-la e guardá-la já serializada (acerto não serializa nada).
+
+    Se build() levantar exceção nada é guardado.
+    """
+    body = cache.get(key)
+    if body is None:
+        body = json.dumps(build(), cls=DjangoJSONEncoder).encode("utf-8")
+        cache.set(key, body, CACHE_TIMEOUT)
+    return HttpResponse(body, content_type="application/json")
+
+
+async def acached_json_response(key: str, abuild) -> HttpResponse:
+    """
+    cached_json_response para views async: `abuild` é uma corrotina.
+    """
+    body = await cache.aget(key)
+    if body is None:
+        body = json.dumps(await abuild(), cls=DjangoJSONEncoder).encode("utf-8")
+        await cache.aset(key, body, CACHE_TIMEOUT)
+    return HttpResponse(body, content_type="application/json")
+
+
+# ----------------- GET condicional (ETag / Last-Modified) -----------------
+
+
+def request_state(request, nome: str) -> tuple:
+    """
+    Estado de um conjunto de dados para esta requisição:
+    (versao, atualizado_em, total de linhas, id mais recente).
+
+    Sai de uma única consulta (linha do contador + maior id pela chave
+    primária), sem COUNT(*) nem varrer a tabela, e fica guardado no
+    request: ETag, Last-Modified e a chave do cache usam o mesmo valor.
+    """
+    return request_states(request, (nome,))[nome]
+
+
+async def arequest_state(request, nome: str) -> tuple:
+    """
+    request_state para views async (mesmo valor, mesmo lugar no request).
+    """
+    return (await arequest_states(request, (nome,)))[nome]
+
+
+def request_states(request, nomes) -> dict:
+    """
+    request_state de vários conjuntos, numa consulta só para todos os
+    que ainda não foram lidos (a lista de reivindicações depende de
+    "reivindicacoes" e de "itens"). Devolve {nome: estado}.
+    """
+    states = request.__dict__.setdefault("itens_estado", {})
+    faltando = [nome for nome in nomes if nome not in states]
+    if faltando:
+        _store_states(states, faltando, list(_state_query(faltando)))
+    return states
+
+
+async def arequest_states(request, nomes) -> dict:
+    """
+    request_states para views async.
+    """
+    states = request.__dict__.setdefault("itens_estado", {})
+    faltando = [nome for nome in nomes if nome not in states]
+    if faltando:
+        _store_states(states, faltando, [row async for row in _state_query(faltando)])
+    return states
+
+
+def _store_states(states: dict, nomes, rows) -> None:
+    for nome in nomes:
+        states[nome] = (0, None, 0, None)
+    for nome, *state in rows:
+        states[nome] = tuple(state)
+
+
+def _state_query(nomes):
+    # maior id de cada conjunto, escolhido pela linha do contador
+    ultimo = Case(*(
+        When(nome=nome, then=Subquery(DATASETS[nome][0].objects.order_by("-pk").values("pk")[:1]))
+        for nome in nomes
+    ))
+    return (
+        VersaoDados.objects
+        .filter(nome__in=nomes)
+        .annotate(ultimo=ultimo)
+        .values_list("nome", "versao", "atualizado_em", "total", "ultimo")
+    )
+
+
+def list_condition(*nomes):
+    """
+    Decorator para as APIs de listagem: responde 304 quando o navegador
+    manda If-None-Match / If-Modified-Since e nada mudou.
+
+    O ETag é forte e combina o estado de cada conjunto de dados em
+    `nomes` com o caminho e a query string (cada página/filtro tem o seu).
+    """
+
+    def etag(request, *args, **kwargs):
+        if request.method not in ("GET", "HEAD"):
+            return None
+        states = request_states(request, nomes)
+        parts = [states[nome] for nome in nomes]
+        parts.append((request.path, sorted(request.GET.lists())))
+        return hashlib.sha1(repr(parts).encode("utf-8")).hexdigest()
+
+    def last_modified(request, *args, **kwargs):
+        if request.method not in ("GET", "HEAD"):
+            return None
+        states = request_states(request, nomes)
+        stamps = [states[nome][1] for nome in nomes]
+        stamps = [stamp for stamp in stamps if stamp]
+        return max(stamps) if stamps else None
+
+    def decorator(view):
+        conditional_view = condition(etag_func=etag, last_modified_func=last_modified)(view)
+
+        if iscoroutinefunction(view):
+            @wraps(view)
+            async def async_wrapper(request, *args, **kwargs):
+                if request.method in ("GET", "HEAD"):
+                    # o condition() chama etag()/last_modified() sem await:
+                    # deixo o estado já lido, e eles não vão ao banco
+                    await arequest_states(request, nomes)
+                response = await conditional_view(request, *args, **kwargs)
+                if request.method in ("GET", "HEAD"):
+                    patch_cache_control(response, private=True, no_cache=True)
+                return response
+
+            return async_wrapper
+
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            response = conditional_view(request, *args, **kwargs)
+            if request.method in ("GET", "HEAD"):
+                # sempre revalidar: o 304 é barato e nunca mostra dado velho
+                patch_cache_control(response, private=True, no_cache=True)
+            return response
+
+        return wrapper
+
+    return decorator
@@ -0,0 +1,305 @@
+# ============================================================
+# Achados e Perdidos - UnDF
+# Arquivo: dedup.py
+#
+# Detecção de itens cadastrados em dobro (o mesmo objeto registrado
+# por dois balcões), com MinHash + LSH.
+#
+# - O texto do item (nome + descrição + local) vira um conjunto de
+#   "shingles": pedaços de SHINGLE_SIZE letras, sem acento e em
+#   minúsculas. A semelhança entre dois itens é o Jaccard desses
+#   conjuntos (interseção / união).
+# - A assinatura MinHash resume o conjunto em BANDS x ROWS números; a
+#   chance de dois itens terem o mesmo número numa posição é igual ao
+#   Jaccard deles.
+# - A assinatura é cortada em BANDS faixas de ROWS números, e cada
+#   faixa vira uma chave na tabela AssinaturaLSH (com índice). Itens
+#   parecidos quase sempre têm alguma faixa igual; itens diferentes
+#   quase nunca.
+#
+# Conferir um item novo é então um "chave IN (...)" no índice mais o
+# Jaccard exato só com os poucos candidatos, sem passar pela tabela
+# inteira. Com 16 faixas de 6: Jaccard 0,8 vira candidato 99% das
+# vezes, 0,7 ~87% e 0,5 só ~22%. Itens de categorias diferentes
+# (quando as duas estão preenchidas) nunca são duplicados.
+#
+# A tabela é mantida como a da busca textual: signals.item_saved a
+# cada gravação e index_items nas gravações em lote (importação,
+# gerar_dados). `manage.py deduplicar_itens` faz a passada no acervo
+# todo.
+#
+# A assinatura é calculada com o NumPy quando ele está instalado
+# (~20x mais rápido, importa na passada em lote); sem ele, em Python
+# puro (~1,5 ms por item), com o mesmo resultado.
+# ============================================================
+
+import hashlib
+import random
+import re
+import struct
+import unicodedata
+import zlib
+from datetime import timedelta
+
+from django.db import transaction
+from django.db.models import Count
+
+from .models import AssinaturaLSH, Item
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+
+# Campos que entram no texto comparado.
+TEXT_FIELDS = ("nome", "descricao", "local_encontrado")
+
+SHINGLE_SIZE = 4
+BANDS = 16
+ROWS = 6
+
+# Jaccard mínimo (nos shingles) para chamar de provável duplicado.
+SIMILARITY_THRESHOLD = 0.7
+
+# Só comparo itens achados com até tantos dias de diferença: a mesma
+# carteira preta achada meses depois é outra carteira.
+WINDOW_DAYS = 7
+
+# Candidatos (os que dividem mais faixas) conferidos por item.
+MAX_CANDIDATES = 50
+
+# Linhas da tabela gravadas por INSERT.
+INSERT_BATCH = 2000
+
+# Primo de Mersenne 2^31 - 1: (a * x + b) cabe em 64 bits com x de 32.
+_PRIME = (1 << 31) - 1
+
+# Permutações fixas (semente constante): as chaves gravadas no banco
+# precisam sair iguais em todo processo.
+_rng = random.Random(20251017)
+_PERMUTATIONS = [
+    (_rng.randrange(1, _PRIME), _rng.randrange(0, _PRIME)) for _ in range(BANDS * ROWS)
+]
+del _rng
+
+if np is not None:
+    _A = np.array([a for a, _ in _PERMUTATIONS], dtype=np.uint64)[:, None]
+    _B = np.array([b for _, b in _PERMUTATIONS], dtype=np.uint64)[:, None]
+
+
+def normalize(text: str) -> str:
+    """
+    "Cartão do RU (azul)" -> "cartao do ru azul"
+    """
+    text = unicodedata.normalize("NFKD", (text or "").lower())
+    text = "".join(char for char in text if not unicodedata.combining(char))
+    return " ".join(re.findall(r"[a-z0-9]+", text))
+
+
+def item_text(item) -> str:
+    return " ".join(getattr(item, field) or "" for field in TEXT_FIELDS)
+
+
+def shingles(text: str) -> set:
+    """
+    Conjunto dos shingles do texto, cada um como hash de 32 bits.
+    """
+    text = normalize(text)
+    if len(text) <= SHINGLE_SIZE:
+        return {zlib.crc32(text.encode())} if text else set()
+    return {
+        zlib.crc32(text[i:i + SHINGLE_SIZE].encode())
+        for i in range(len(text) - SHINGLE_SIZE + 1)
+    }
+
+
+def signature(hashes: set) -> list:
+    """
+    Assinatura MinHash: para cada permutação, o menor valor do conjunto.
+    """
+    if np is not None:
+        x = np.fromiter(hashes, dtype=np.uint64, count=len(hashes))
+        return ((_A * x + _B) % _PRIME).min(axis=1).tolist()
+    return [min([(a * x + b) % _PRIME for x in hashes]) for a, b in _PERMUTATIONS]
+
+
+def band_keys(hashes: set) -> list:
+    """
+    Uma chave de 64 bits (com sinal, cabe no BigIntegerField) por faixa
+    da assinatura. O número da faixa entra no hash: faixas diferentes
+    nunca colidem entre si.
+    """
+    if not hashes:
+        return []
+    values = signature(hashes)
+    keys = []
+    for band in range(BANDS):
+        chunk = values[band * ROWS:(band + 1) * ROWS]
+        digest = hashlib.blake2b(struct.pack(f">{ROWS + 1}I", band, *chunk), digest_size=8).digest()
+        keys.append(int.from_bytes(digest, "big", signed=True))
+    return keys
+
+
+def jaccard(a: set, b: set) -> float:
+    if not a or not b:
+        return 0.0
+    return len(a & b) / len(a | b)
+
+
+def _same_category(a: Item, b: Item) -> bool:
+    return not a.categoria or not b.categoria or a.categoria == b.categoria
+
+
+# ----------------- Índice -----------------
+
+
+def index_item(item: Item, created: bool = False) -> None:
+    index_items([item], created=created)
+
+
+def index_items(items, created: bool = False) -> None:
+    """
+    Grava (ou regrava) as chaves LSH dos itens. created=True pula o
+    DELETE (itens acabados de inserir não têm chaves ainda).
+    """
+    if not items:
+        return
+    rows = [
+        AssinaturaLSH(item_id=item.pk, chave=key)
+        for item in items
+        for key in band_keys(shingles(item_text(item)))
+    ]
+    with transaction.atomic(savepoint=False):
+        if not created:
+            AssinaturaLSH.objects.filter(item_id__in=[item.pk for item in items]).delete()
+        AssinaturaLSH.objects.bulk_create(rows, batch_size=INSERT_BATCH)
+
+
+# ----------------- Consultas -----------------
+
+
+def find_duplicates(item: Item, window_days: int = WINDOW_DAYS) -> list:
+    """
+    [(Item, similaridade)] dos itens em estoque provavelmente iguais a
+    `item`, do mais para o menos parecido.
+    """
+    hashes = shingles(item_text(item))
+    keys = band_keys(hashes)
+    if not keys:
+        return []
+
+    window = timedelta(days=window_days)
+    candidates = (
+        Item.objects
+        .filter(
+            assinaturas_lsh__chave__in=keys,
+            status="Em estoque",
+            data_encontrado__range=(item.data_encontrado - window, item.data_encontrado + window),
+        )
+        .exclude(pk=item.pk)
+        .annotate(faixas=Count("assinaturas_lsh"))
+        .order_by("-faixas", "-id")
+        .only("id", "categoria", *TEXT_FIELDS, "data_encontrado")[:MAX_CANDIDATES]
+    )
+    found = []
+    for candidate in candidates:
+        if not _same_category(item, candidate):
+            continue
+        similarity = jaccard(hashes, shingles(item_text(candidate)))
+        if similarity >= SIMILARITY_THRESHOLD:
+            found.append((candidate, similarity))
+    found.sort(key=lambda pair: -pair[1])
+    return found
+
+
+def _candidate_pairs(queryset, window_days: int) -> set:
+    """
+    Pares (menor id, maior id) que dividem alguma faixa, foram achados
+    dentro da janela e não são de categorias diferentes. Uma leitura da
+    tabela de chaves, em ordem de chave.
+    """
+    rows = (
+        AssinaturaLSH.objects
+        .filter(item__in=queryset)
+        .order_by("chave", "item__data_encontrado")
+        .values_list("chave", "item_id", "item__data_encontrado", "item__categoria")
+        .iterator(chunk_size=10_000)
+    )
+    pairs = set()
+    bucket, current = [], None
+    for chave, item_id, found_on, categoria in rows:
+        if chave != current:
+            _bucket_pairs(bucket, window_days, pairs)
+            bucket, current = [], chave
+        bucket.append((found_on, item_id, categoria))
+    _bucket_pairs(bucket, window_days, pairs)
+    return pairs
+
+
+def _bucket_pairs(bucket: list, window_days: int, pairs: set) -> None:
+    # o balde já vem em ordem de data: cada item só com os seguintes
+    # que ainda estão na janela
+    for i, (found_on, item_id, categoria) in enumerate(bucket):
+        for other_date, other_id, other_categoria in bucket[i + 1:]:
+            if (other_date - found_on).days > window_days:
+                break
+            if categoria and other_categoria and categoria != other_categoria:
+                continue
+            pairs.add((min(item_id, other_id), max(item_id, other_id)))
+
+
+def duplicate_groups(queryset=None, window_days: int = WINDOW_DAYS) -> list:
+    """
+    Grupos de prováveis duplicados no acervo (por padrão, itens em
+    estoque): lista de {"itens": [Item, ...], "similaridade": maior
+    Jaccard com o primeiro item do grupo}, maiores grupos primeiro.
+
+    Cada grupo é um item (o cadastro mais antigo) com as prováveis
+    cópias dele: todo item do grupo é parecido com o primeiro. Sem
+    isso, A~B e B~C juntariam A e C mesmo sem nada a ver um com o outro.
+    """
+    if queryset is None:
+        queryset = Item.objects.filter(status="Em estoque")
+    pairs = _candidate_pairs(queryset, window_days)
+    if not pairs:
+        return []
+
+    # in_bulk divide o IN em lotes quando o banco limita os parâmetros
+    itens = Item.objects.only("id", "categoria", *TEXT_FIELDS, "data_encontrado", "status").in_bulk(
+        {item_id for pair in pairs for item_id in pair}
+    )
+    hashes = {item_id: shingles(item_text(item)) for item_id, item in itens.items()}
+
+    confirmed = []
+    for a, b in pairs:
+        if a not in hashes or b not in hashes:
+            continue  # apagado entre uma leitura e outra
+        similarity = jaccard(hashes[a], hashes[b])
+        if similarity >= SIMILARITY_THRESHOLD:
+            confirmed.append((similarity, a, b))
+
+    # dos pares mais parecidos para os menos: o item de menor id vira
+    # o primeiro do grupo, e só entra no grupo quem é parecido com ele
+    confirmed.sort(key=lambda pair: (-pair[0], pair[1], pair[2]))
+    groups, seed_of = {}, {}
+    for similarity, a, b in confirmed:
+        if a not in seed_of and b not in seed_of:
+            groups[a] = {"membros": [a, b], "similaridade": similarity}
+            seed_of[a] = seed_of[b] = a
+        elif seed_of.get(a) == a and b not in seed_of:
+            groups[a]["membros"].append(b)
+            seed_of[b] = a
+        elif seed_of.get(b) == b and a not in seed_of:
+            groups[b]["membros"].append(a)
+            seed_of[a] = b
+
+    result = [
+        {
+            "itens": [itens[item_id] for item_id in sorted(group["membros"])],
+            "similaridade": group["similaridade"],
+        }
+        for group in groups.values()
+    ]
+    result.sort(key=lambda group: (-len(group["itens"]), group["itens"][0].pk))
+    return result
@@ -0,0 +1,254 @@
+# ============================================================
+# Achados e Perdidos - UnDF
+# Arquivo: estatisticas.py
+#
+# Estatísticas do painel interno, calculadas antes e guardadas prontas
+# (tabela Estatistica, um JSON só):
+#
+# - itens por status, categoria e local;
+# - por semana: itens encontrados, devolvidos e reivindicações;
+# - fila de reivindicações pendentes (total, idade, itens afetados);
+# - mediana do tempo entre o cadastro e a devolução.
+#
+# O endpoint (/api/interno/estatisticas/) só lê essa linha: duas
+# consultas por chave primária, com 1 ano ou 10 anos de histórico.
+# Quem faz os COUNT/GROUP BY é `manage.py atualizar_estatisticas`
+# (cron, ou --a-cada), e só quando os dados mudaram: o cálculo guarda
+# as versões de VersaoDados que viu e pula se elas forem as mesmas.
+# O resultado diz se está desatualizado (versões novas desde então).
+#
+# Semanas começam na segunda-feira e vão em ordem. A série semanal é
+# a parte cara com anos de histórico (no SQLite, truncar data com hora
+# é uma função Python por linha), então é incremental: reivindicações
+# e devoluções são gravadas com a hora da gravação, e só as semanas a
+# partir do último cálculo podem ter mudado; as anteriores vêm do
+# cálculo anterior. O que mexe no passado (apagar registros, desfazer
+# uma devolução antiga) só aparece no cálculo completo (--forcar,
+# uma vez por noite). "encontrados" usa a data sem hora, que é barata
+# de agrupar e sai sempre completa.
+# ============================================================
+
+import time
+from datetime import date, datetime, timedelta
+
+from django.db.models import Count, DurationField, ExpressionWrapper, F, Min, Q
+from django.db.models.functions import TruncWeek
+from django.utils import timezone
+
+from .models import Estatistica, Item, Reivindicacao, VersaoDados
+
+
+NOME = "painel"
+
+# Categorias/locais listados um a um; o resto soma em "Outros".
+TOP = 30
+OUTROS = "Outros"
+SEM_VALOR = "(não informado)"
+
+# Faixas de idade das reivindicações pendentes (dias).
+FAIXAS_PENDENTES = (1, 7, 30)
+
+
+def _segunda(dia: date) -> date:
+    return dia - timedelta(days=dia.weekday())
+
+
+def _contagens() -> dict:
+    """
+    Itens por status, categoria e local, de um GROUP BY só (uma
+    leitura da tabela): as combinações são poucas e somo aqui.
+    """
+    por = {"status": {}, "categoria": {}, "local_encontrado": {}}
+    rows = (
+        Item.objects
+        .order_by()
+        .values_list("status", "categoria", "local_encontrado")
+        .annotate(total=Count("id"))
+    )
+    for status, categoria, local, total in rows:
+        for campo, valor in (("status", status), ("categoria", categoria), ("local_encontrado", local)):
+            valor = valor or SEM_VALOR
+            por[campo][valor] = por[campo].get(valor, 0) + total
+    return {campo: _top(totais) for campo, totais in por.items()}
+
+
+def _top(totais: dict) -> list:
+    ordem = sorted(totais.items(), key=lambda par: (-par[1], par[0]))
+    result = [{"valor": valor, "total": total} for valor, total in ordem[:TOP]]
+    outros = sum(total for _, total in ordem[TOP:])
+    if outros:
+        result.append({"valor": OUTROS, "total": outros})
+    return result
+
+
+# Séries semanais por data com hora (gravadas com a hora da gravação).
+SERIES_RECENTES = {
+    "devolvidos": (Item, "devolvido_em"),
+    "reivindicacoes": (Reivindicacao, "data_envio"),
+}
+
+
+def _por_semana(anterior=None) -> list:
+    """
+    [{"semana", "encontrados", "devolvidos", "reivindicacoes"}]. Com o
+    resultado do cálculo `anterior`, as séries com hora só são contadas
+    a partir da semana daquele cálculo.
+    """
+    desde = None
+    semanas = {}
+
+    def linha(semana: date) -> dict:
+        return semanas.setdefault(semana, {
+            "semana": semana.isoformat(), "encontrados": 0, **dict.fromkeys(SERIES_RECENTES, 0),
+        })
+
+    if anterior:
+        calculado = timezone.localtime(datetime.fromisoformat(anterior["calculado_em"]))
+        inicio = _segunda(calculado.date())
+        desde = timezone.make_aware(datetime.combine(inicio, datetime.min.time()))
+        for antiga in anterior["por_semana"]:
+            semana = date.fromisoformat(antiga["semana"])
+            if semana < inicio:
+                nova = linha(semana)
+                for nome in SERIES_RECENTES:
+                    nova[nome] = antiga[nome]
+
+    # data sem hora: agrupo pela coluna (sem função) e somo por semana aqui
+    dias = Item.objects.order_by().values_list("data_encontrado").annotate(total=Count("id"))
+    for dia, total in dias:
+        linha(_segunda(dia))["encontrados"] += total
+
+    for nome, (model, campo) in SERIES_RECENTES.items():
+        queryset = model.objects.filter(**{f"{campo}__isnull": False})
+        if desde is not None:
+            queryset = queryset.filter(**{f"{campo}__gte": desde})
+        rows = (
+            queryset
+            .annotate(semana=TruncWeek(campo))
+            .order_by()
+            .values_list("semana")
+            .annotate(total=Count("id"))
+        )
+        for semana, total in rows:
+            linha(semana.date())[nome] += total  # TruncWeek já vem no fuso local
+
+    return [semanas[semana] for semana in sorted(semanas) if any(
+        semanas[semana][nome] for nome in ("encontrados", *SERIES_RECENTES)
+    )]
+
+
+def _pendentes(agora) -> dict:
+    faixas = {
+        f"ate_{dias}_dias": Count("id", filter=Q(data_envio__gte=agora - timedelta(days=dias)))
+        for dias in FAIXAS_PENDENTES
+    }
+    result = Reivindicacao.objects.filter(status="Pendente").aggregate(
+        total=Count("id"), mais_antiga=Min("data_envio"), **faixas
+    )
+    mais_antiga = result.pop("mais_antiga")
+    result["mais_antiga"] = mais_antiga.isoformat() if mais_antiga else None
+    result["itens"] = Item.objects.filter(reivindicacoes_pendentes__gt=0).count()
+    return result
+
+
+def _tempo_ate_devolucao() -> dict:
+    """
+    Mediana (em dias) de devolvido_em - data_criacao: o banco ordena e
+    devolve só a(s) linha(s) do meio (LIMIT/OFFSET), sem trazer as
+    durações para o Python.
+    """
+    devolvidos = Item.objects.filter(devolvido_em__isnull=False)
+    total = devolvidos.count()
+    if not total:
+        return {"devolvidos": 0, "mediana_dias": None}
+
+    tempos = (
+        devolvidos
+        .annotate(tempo=ExpressionWrapper(F("devolvido_em") - F("data_criacao"), output_field=DurationField()))
+        .order_by("tempo")
+        .values_list("tempo", flat=True)
+    )
+    meio = total // 2
+    if total % 2:
+        mediana = tempos[meio]
+    else:
+        antes, depois = tempos[meio - 1:meio + 1]
+        mediana = (antes + depois) / 2
+    # max: itens antigos têm a data da devolução aproximada (migração 0013)
+    return {"devolvidos": total, "mediana_dias": round(max(mediana.total_seconds(), 0) / 86400, 2)}
+
+
+def calcular(anterior=None) -> dict:
+    """
+    Todas as estatísticas. `anterior` (o dict do último cálculo) deixa
+    a série semanal incremental; sem ele, tudo do zero.
+    """
+    agora = timezone.now()
+    contagens = _contagens()
+    return {
+        "itens": {
+            "total": sum(linha["total"] for linha in contagens["status"]),
+            "por_status": contagens["status"],
+            "por_categoria": contagens["categoria"],
+            "por_local": contagens["local_encontrado"],
+        },
+        "por_semana": _por_semana(anterior),
+        "reivindicacoes_pendentes": _pendentes(agora),
+        "tempo_ate_devolucao": _tempo_ate_devolucao(),
+        "calculado_em": agora.isoformat(),
+    }
+
+
+def _versoes() -> tuple:
+    versoes = dict(
+        VersaoDados.objects
+        .filter(nome__in=(Item.CONJUNTO, Reivindicacao.CONJUNTO))
+        .values_list("nome", "versao")
+    )
+    return versoes.get(Item.CONJUNTO, 0), versoes.get(Reivindicacao.CONJUNTO, 0)
+
+
+def atualizar(forcar: bool = False) -> tuple:
+    """
+    Recalcula se os dados mudaram desde o último cálculo (ou sempre e
+    do zero, com forcar=True). Devolve (Estatistica, recalculou?).
+
+    As versões são lidas antes do cálculo: se algo mudar no meio, a
+    linha fica com a versão anterior e o próximo atualizar refaz.
+    """
+    versao_itens, versao_reivindicacoes = _versoes()
+    atual = Estatistica.objects.filter(nome=NOME).first()
+    if (
+        not forcar
+        and atual is not None
+        and (atual.versao_itens, atual.versao_reivindicacoes) == (versao_itens, versao_reivindicacoes)
+    ):
+        return atual, False
+
+    inicio = time.perf_counter()
+    dados = calcular(None if forcar or atual is None else atual.dados)
+    estatistica, _ = Estatistica.objects.update_or_create(
+        nome=NOME,
+        defaults={
+            "dados": dados,
+            "versao_itens": versao_itens,
+            "versao_reivindicacoes": versao_reivindicacoes,
+            "segundos": time.perf_counter() - inicio,
+        },
+    )
+    return estatistica, True
+
+
+def obter() -> dict:
+    """
+    O que o endpoint devolve. Se nunca foi calculado, calcula agora
+    (só na primeira vez; depois é trabalho do comando).
+    """
+    estatistica = Estatistica.objects.filter(nome=NOME).first()
+    if estatistica is None:
+        estatistica, _ = atualizar()
+    return {
+        **estatistica.dados,
+        "atualizado_em": estatistica.atualizado_em.isoformat(),
+        "desatualizado": _versoes() != (estatistica.versao_itens, estatistica.versao_reivindicacoes),
+    }
@@ -0,0 +1,122 @@
+# ============================================================
+# Achados e Perdidos - UnDF
+# Arquivo: events.py
+#
+# Pub/sub em memória para os eventos do painel interno (SSE).
+#
+# - signals.py publica "reivindicacao-criada" / "reivindicacao-atualizada"
+#   depois do commit de cada gravação;
+# - cada aba do painel aberta em /api/interno/eventos/ é um assinante,
+#   com uma asyncio.Queue no event loop do servidor ASGI.
+#
+# Como tudo isso é por processo, um "vigia" por processo olha a versão
+# dos dados (VersaoDados) a cada poucos segundos e publica
+# "dados-alterados" quando outra instância/worker gravou algo. O custo
+# é uma consulta por processo, não por conexão aberta.
+# ============================================================
+
+import asyncio
+import json
+import threading
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+
+from . import cache
+
+
+# Intervalo do vigia de versões (segundos).
+WATCH_INTERVAL = getattr(settings, "ITENS_EVENTOS_INTERVALO", 5)
+
+# Eventos guardados por assinante antes de começar a descartar
+# (aba travada não pode crescer a memória do servidor).
+QUEUE_SIZE = 100
+
+
+class Subscription:
+    """
+    Um assinante: a fila de eventos e o event loop dono dela.
+    """
+
+    def __init__(self, loop):
+        self.loop = loop
+        self.queue = asyncio.Queue(maxsize=QUEUE_SIZE)
+
+    def deliver(self, message: str) -> None:
+        # roda dentro do loop (via call_soon_threadsafe)
+        try:
+            self.queue.put_nowait(message)
+        except asyncio.QueueFull:
+            pass
+
+
+class Broker:
+    """
+    Distribui eventos para todas as conexões SSE abertas neste processo.
+
+    publish() pode ser chamado de qualquer thread (views síncronas rodam
+    em threads); a entrega acontece no loop de cada assinante.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._subscribers = set()
+        self._watcher = None
+
+    def subscribe(self) -> Subscription:
+        loop = asyncio.get_running_loop()
+        subscription = Subscription(loop)
+        with self._lock:
+            self._subscribers.add(subscription)
+            if self._watcher is None or self._watcher.done():
+                self._watcher = loop.create_task(self._watch_versions())
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        with self._lock:
+            self._subscribers.discard(subscription)
+
+    def publish(self, event: str, data: dict) -> None:
+        message = format_event(event, data)
+        with self._lock:
+            subscribers = list(self._subscribers)
+        for subscription in subscribers:
+            try:
+                subscription.loop.call_soon_threadsafe(subscription.deliver, message)
+            except RuntimeError:
+                # loop já foi fechado (servidor desligando)
+                self.unsubscribe(subscription)
+
+    async def _watch_versions(self):
+        """
+        Publica "dados-alterados" quando a versão de itens/reivindicações
+        muda por gravações feitas em outro processo. Para sozinho quando
+        não sobra nenhum assinante.
+        """
+        get_versions = sync_to_async(
+            lambda: (cache.get_version(cache.ITENS)[0], cache.get_version(cache.REIVINDICACOES)[0]),
+            thread_sensitive=False,
+        )
+        last = await get_versions()
+        while True:
+            await asyncio.sleep(WATCH_INTERVAL)
+            with self._lock:
+                if not self._subscribers:
+                    return
+            current = await get_versions()
+            if current != last:
+                last = current
+                self.publish("dados-alterados", {
+                    "itens": current[0],
+                    "reivindicacoes": current[1],
+                })
+
+
+def format_event(event: str, data: dict) -> str:
+    """
+    Formata um evento no protocolo text/event-stream.
+    """
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+broker = Broker()
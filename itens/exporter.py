@@ -0,0 +1,183 @@
+# ============================================================
+# Achados e Perdidos - UnDF
+# Arquivo: exporter.py
+#
+# Exportação completa de itens e reivindicações para a auditoria
+# (comando `manage.py exportar` e /api/interno/exportar/<conjunto>/).
+#
+# As tabelas são lidas em blocos (values_list + .iterator) e cada bloco
+# vira um pedaço do arquivo, então a memória fica do tamanho de um
+# bloco, não da tabela. Dois formatos:
+#
+# - "csv": uma linha por registro, com cabeçalho;
+# - "colunar": NDJSON com um cabeçalho e depois um "grupo de linhas"
+#   por bloco, guardado por coluna (como num Parquet). As colunas com
+#   poucos valores distintos (status, categoria, vinculo) vão como
+#   índices num dicionário: cada grupo traz só os valores novos do
+#   dicionário e o leitor vai acumulando (ver read_columnar).
+#
+#   {"formato": "achados-colunar", "versao": 1, "conjunto": "itens",
+#    "colunas": [...], "dicionario": ["status", "categoria"]}
+#   {"linhas": 2, "novos": {"status": ["Em estoque"]},
+#    "colunas": {"id": [1, 2], "status": [0, 0], ...}}
+# ============================================================
+
+import csv
+import json
+
+from .models import Item, Reivindicacao
+
+
+# Linhas lidas do banco por vez (= linhas por grupo no formato colunar).
+CHUNK_SIZE = 2000
+
+FORMATS = ("csv", "colunar")
+
+CONTENT_TYPES = {
+    "csv": "text/csv; charset=utf-8",
+    "colunar": "application/x-ndjson",
+}
+
+EXTENSIONS = {"csv": "csv", "colunar": "ndjson"}
+
+# Conjunto -> (modelo, colunas exportadas).
+DATASETS = {
+    "itens": (Item, [
+        "id", "nome", "descricao", "categoria", "local_encontrado",
+        "data_encontrado", "status", "aprovado", "data_criacao",
+        "atualizado_em", "revisao",
+    ]),
+    "reivindicacoes": (Reivindicacao, [
+        "id", "item_id", "nome_requerente", "vinculo", "identificacao",
+        "contato", "detalhes", "status", "data_envio", "atualizado_em",
+        "revisao",
+    ]),
+}
+
+# Colunas guardadas como índice num dicionário no formato colunar.
+DICTIONARY_COLUMNS = {"status", "categoria", "vinculo"}
+
+
+def _chunks(conjunto: str):
+    """
+    Gera listas de tuplas (uma por linha), CHUNK_SIZE por vez, em ordem
+    de id.
+    """
+    model, columns = DATASETS[conjunto]
+    rows = (
+        model.objects
+        .order_by("id")
+        .values_list(*columns)
+        .iterator(chunk_size=CHUNK_SIZE)
+    )
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) >= CHUNK_SIZE:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def _json_default(value):
+    # datas e horas com precisão total (o DjangoJSONEncoder corta em ms)
+    return value.isoformat()
+
+
+class _Echo:
+    """
+    "Arquivo" que só devolve o que recebe, para o csv.writer escrever
+    direto nos pedaços da resposta.
+    """
+
+    def write(self, value):
+        return value
+
+
+def csv_chunks(conjunto: str, counter=None):
+    """
+    Gera o CSV em pedaços (um por bloco lido do banco). `counter`, se
+    vier, é uma lista de um elemento onde vou somando as linhas.
+    """
+    _, columns = DATASETS[conjunto]
+    writer = csv.writer(_Echo())
+    yield writer.writerow(columns)
+    for chunk in _chunks(conjunto):
+        yield "".join(writer.writerow(row) for row in chunk)
+        if counter is not None:
+            counter[0] += len(chunk)
+
+
+def columnar_chunks(conjunto: str, counter=None):
+    """
+    Gera o formato colunar (ver o topo do arquivo): uma linha de
+    cabeçalho e uma linha por grupo de até CHUNK_SIZE registros.
+    """
+    _, columns = DATASETS[conjunto]
+    encoded = [column for column in columns if column in DICTIONARY_COLUMNS]
+    dictionaries = {column: {} for column in encoded}
+
+    header = {
+        "formato": "achados-colunar",
+        "versao": 1,
+        "conjunto": conjunto,
+        "colunas": columns,
+        "dicionario": encoded,
+    }
+    yield json.dumps(header) + "\n"
+
+    for chunk in _chunks(conjunto):
+        data = dict(zip(columns, (list(values) for values in zip(*chunk))))
+        novos = {}
+        for column in encoded:
+            dictionary = dictionaries[column]
+            indexes = []
+            for value in data[column]:
+                index = dictionary.get(value)
+                if index is None:
+                    index = dictionary[value] = len(dictionary)
+                    novos.setdefault(column, []).append(value)
+                indexes.append(index)
+            data[column] = indexes
+
+        group = {"linhas": len(chunk), "novos": novos, "colunas": data}
+        yield json.dumps(group, default=_json_default) + "\n"
+        if counter is not None:
+            counter[0] += len(chunk)
+
+
+def export_chunks(conjunto: str, formato: str, counter=None):
+    """
+    Pedaços (str) do arquivo de `conjunto` em `formato`.
+    """
+    if conjunto not in DATASETS:
+        raise ValueError(f"Conjunto inválido: {conjunto}")
+    if formato == "csv":
+        return csv_chunks(conjunto, counter)
+    if formato == "colunar":
+        return columnar_chunks(conjunto, counter)
+    raise ValueError(f"Formato inválido: {formato}")
+
+
+def read_columnar(lines):
+    """
+    Lê um arquivo no formato colunar e gera um dicionário por registro
+    (para conferência / scripts da auditoria).
+    """
+    lines = iter(lines)
+    header = json.loads(next(lines))
+    columns = header["colunas"]
+    dictionaries = {column: [] for column in header["dicionario"]}
+
+    for line in lines:
+        if not line.strip():
+            continue
+        group = json.loads(line)
+        for column, values in group["novos"].items():
+            dictionaries[column].extend(values)
+        data = group["colunas"]
+        for column, dictionary in dictionaries.items():
+            data[column] = [dictionary[index] for index in data[column]]
+        for values in zip(*(data[column] for column in columns)):
+            yield dict(zip(columns, values))
@@ -0,0 +1,214 @@
+# ============================================================
+# Achados e Perdidos - UnDF
+# Arquivo: fila.py
+#
+# Fila de reivindicações (write-behind), para picos de envio: depois
+# de um evento, centenas de estudantes mandam reivindicação ao mesmo
+# tempo e, no SQLite, cada INSERT espera a trava de escrita do banco.
+#
+# Com settings.ITENS_FILA_REIVINDICACOES (caminho de um arquivo) a
+# view só valida o formulário, anota a reivindicação neste diário e
+# devolve 202 com um ticket. O diário é outro arquivo SQLite, só
+# dele: anotar é um INSERT pequeno que não disputa a trava do banco
+# principal. `manage.py processar_fila` lê o diário e grava as
+# reivindicações em lotes, cada lote numa transação (um INSERT, uma
+# versão nova e um UPDATE de contador por item, em vez de um de cada
+# por reivindicação).
+#
+# O ticket também vai na Reivindicacao (coluna única): se o processo
+# cair entre o commit do lote e a marcação no diário, o lote é lido
+# de novo e o que já foi gravado é só marcado, sem duplicar.
+#
+# Sem a configuração, nada muda: a view grava na hora (201).
+# ============================================================
+
+import json
+import sqlite3
+import threading
+import time
+import uuid
+from collections import defaultdict
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F
+
+from . import events
+from .models import Item, Reivindicacao, VersaoDados
+
+
+PENDENTE = "pendente"
+REGISTRADA = "registrada"
+ERRO = "erro"
+
+# Reivindicações gravadas por transação no processar_fila.
+BATCH_SIZE = 500
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS fila (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    ticket TEXT NOT NULL UNIQUE,
+    item_id INTEGER NOT NULL,
+    dados TEXT NOT NULL,
+    status TEXT NOT NULL DEFAULT 'pendente',
+    reivindicacao_id INTEGER,
+    erro TEXT,
+    criado_em REAL NOT NULL,
+    processado_em REAL
+);
+CREATE INDEX IF NOT EXISTS fila_pendentes ON fila (status, id);
+"""
+
+_local = threading.local()
+
+
+def caminho() -> str:
+    return getattr(settings, "ITENS_FILA_REIVINDICACOES", "") or ""
+
+
+def ativa() -> bool:
+    return bool(caminho())
+
+
+def _conexao() -> sqlite3.Connection:
+    """
+    Uma conexão por thread (e por arquivo, por causa dos testes).
+    WAL: quem anota não espera quem lê; synchronous=FULL: o 202 só sai
+    depois que a reivindicação está no disco.
+    """
+    path = caminho()
+    conexoes = getattr(_local, "conexoes", None)
+    if conexoes is None:
+        conexoes = _local.conexoes = {}
+    conn = conexoes.get(path)
+    if conn is None:
+        conn = sqlite3.connect(path, timeout=10, isolation_level=None)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=FULL")
+        conn.executescript(_SCHEMA)
+        conexoes[path] = conn
+    return conn
+
+
+def enfileirar(item_id: int, fields: dict) -> str:
+    """
+    Anota uma reivindicação (campos já validados por claim_fields) e
+    devolve o ticket.
+    """
+    ticket = uuid.uuid4().hex
+    _conexao().execute(
+        "INSERT INTO fila (ticket, item_id, dados, criado_em) VALUES (?, ?, ?, ?)",
+        (ticket, item_id, json.dumps(fields, ensure_ascii=False), time.time()),
+    )
+    return ticket
+
+
+def consultar(ticket: str):
+    """
+    {"ticket", "status", "reivindicacao_id", "erro"} ou None se o
+    ticket não existe.
+    """
+    row = _conexao().execute(
+        "SELECT status, reivindicacao_id, erro FROM fila WHERE ticket = ?", (ticket,)
+    ).fetchone()
+    if row is None:
+        return None
+    status, reivindicacao_id, erro = row
+    return {"ticket": ticket, "status": status, "reivindicacao_id": reivindicacao_id, "erro": erro}
+
+
+def pendentes() -> int:
+    return _conexao().execute("SELECT COUNT(*) FROM fila WHERE status = ?", (PENDENTE,)).fetchone()[0]
+
+
+def processar(batch_size: int = BATCH_SIZE) -> dict:
+    """
+    Grava no banco um lote de reivindicações pendentes do diário.
+    Devolve {"registradas": n, "erros": n} (zeros com a fila vazia).
+    """
+    conn = _conexao()
+    rows = conn.execute(
+        "SELECT ticket, item_id, dados FROM fila WHERE status = ? ORDER BY id LIMIT ?",
+        (PENDENTE, batch_size),
+    ).fetchall()
+    if not rows:
+        return {"registradas": 0, "erros": 0}
+
+    tickets = [ticket for ticket, _, _ in rows]
+    with transaction.atomic():
+        # gravadas num lote anterior que caiu antes de marcar o diário
+        gravadas = dict(
+            Reivindicacao.objects.filter(ticket__in=tickets).values_list("ticket", "id")
+        )
+        existentes = set(
+            Item.objects.filter(pk__in={item_id for _, item_id, _ in rows}).values_list("id", flat=True)
+        )
+        novas = [
+            Reivindicacao(item_id=item_id, ticket=ticket, **json.loads(dados))
+            for ticket, item_id, dados in rows
+            if ticket not in gravadas and item_id in existentes
+        ]
+        if novas:
+            # bulk_create não passa pelo save() nem pelos sinais: faço
+            # aqui o que ComRevisao.save e o signals.py fariam
+            revisao = VersaoDados.incrementar(Reivindicacao.CONJUNTO, len(novas))
+            for reivindicacao in novas:
+                reivindicacao.revisao = revisao
+            Reivindicacao.objects.bulk_create(novas)
+            _somar_pendentes(novas)
+            transaction.on_commit(lambda: _publicar(novas))
+        gravadas.update((reivindicacao.ticket, reivindicacao.pk) for reivindicacao in novas)
+
+    agora = time.time()
+    erros = [ticket for ticket, item_id, _ in rows if ticket not in gravadas]
+    conn.execute("BEGIN")
+    try:
+        conn.executemany(
+            "UPDATE fila SET status = ?, reivindicacao_id = ?, processado_em = ? WHERE ticket = ?",
+            [(REGISTRADA, pk, agora, ticket) for ticket, pk in gravadas.items()],
+        )
+        conn.executemany(
+            "UPDATE fila SET status = ?, erro = ?, processado_em = ? WHERE ticket = ?",
+            [(ERRO, "Item não encontrado", agora, ticket) for ticket in erros],
+        )
+    except BaseException:
+        conn.execute("ROLLBACK")
+        raise
+    conn.execute("COMMIT")
+    return {"registradas": len(gravadas), "erros": len(erros)}
+
+
+def _somar_pendentes(novas) -> None:
+    # um UPDATE por quantidade (no pico, quase todas são 1 por item)
+    por_item = defaultdict(int)
+    for reivindicacao in novas:
+        por_item[reivindicacao.item_id] += 1
+    por_quantidade = defaultdict(list)
+    for item_id, quantidade in por_item.items():
+        por_quantidade[quantidade].append(item_id)
+    contador = Item.CONTADORES["Pendente"]
+    for quantidade, ids in por_quantidade.items():
+        # sem revisão nova no item, como em services.ajustar_contadores
+        Item.objects.filter(pk__in=ids).update(**{contador: F(contador) + quantidade})
+
+
+def _publicar(novas) -> None:
+    for reivindicacao in novas:
+        events.broker.publish("reivindicacao-criada", {
+            "id": reivindicacao.pk,
+            "item_id": reivindicacao.item_id,
+            "status": reivindicacao.status,
+            "revisao": reivindicacao.revisao,
+        })
+
+
+def limpar(horas: float) -> int:
+    """
+    Apaga do diário o que já foi processado há mais de `horas` (o
+    ticket deixa de ser consultável). Devolve quantas linhas saíram.
+    """
+    limite = time.time() - horas * 3600
+    cursor = _conexao().execute(
+        "DELETE FROM fila WHERE status != ? AND processado_em < ?", (PENDENTE, limite)
+    )
+    return cursor.rowcount
@@ -0,0 +1,206 @@
+# ============================================================
+# Achados e Perdidos - UnDF
+# Arquivo: importer.py
+#
+# Importação de itens em lote (planilhas da segurança e da biblioteca,
+# registros antigos). Usado pelo comando `manage.py importar_itens` e
+# pela API interna /api/interno/itens/importar/.
+#
+# O arquivo é lido linha a linha (CSV, NDJSON ou um array JSON), cada
+# linha passa pelas mesmas regras do cadastro pelo painel
+# (clean_item_data, usada também em internal_item_create) e as válidas
+# vão para o banco com bulk_create, em lotes, cada lote na sua
+# transação. Em vez de um INSERT + incremento de versão + reindexação
+# por item, é um de cada por lote.
+# ============================================================
+
+import codecs
+import csv
+import json
+from datetime import datetime
+
+from django.db import transaction
+
+from . import dedup, search
+from .models import Item, VersaoDados
+
+
+# Itens gravados por transação.
+DEFAULT_BATCH_SIZE = 1000
+
+FORMATS = ("csv", "json", "ndjson")
+
+REQUIRED_FIELDS = ("nome", "local_encontrado", "data_encontrado")
+OPTIONAL_FIELDS = ("categoria", "descricao", "aprovado")
+
+# Valores de "aprovado" no CSV que contam como sim.
+CSV_TRUE = {"1", "true", "sim", "s", "yes", "y", "x"}
+
+
+def _text_field(data: dict, name: str) -> str:
+    value = data.get(name)
+    if value is None:
+        return ""
+    if not isinstance(value, str):
+        raise ValueError(f"Campo {name} inválido")
+    value = value.strip()
+    max_length = Item._meta.get_field(name).max_length
+    if max_length and len(value) > max_length:
+        raise ValueError(f"Campo {name} muito longo (máx. {max_length} caracteres)")
+    return value
+
+
+def clean_item_data(data) -> dict:
+    """
+    Valida os campos de um item novo e devolve os kwargs para Item().
+    Levanta ValueError com a mensagem de erro.
+
+    Campos:
+    - nome, local_encontrado, data_encontrado ('YYYY-MM-DD'): obrigatórios;
+    - categoria, descricao: opcionais;
+    - aprovado: opcional, só vale se for bool (senão False).
+    """
+    if not isinstance(data, dict):
+        raise ValueError("Linha inválida (esperado um objeto JSON)")
+
+    nome = _text_field(data, "nome")
+    local_encontrado = _text_field(data, "local_encontrado")
+    data_str = _text_field(data, "data_encontrado")
+
+    if not (nome and local_encontrado and data_str):
+        raise ValueError("Campos obrigatórios faltando")
+
+    try:
+        data_encontrado = datetime.strptime(data_str, "%Y-%m-%d").date()
+    except ValueError:
+        raise ValueError("Formato de data inválido")
+
+    categoria = _text_field(data, "categoria")
+    descricao = _text_field(data, "descricao")
+    aprovado = data.get("aprovado")
+
+    return {
+        "nome": nome,
+        "local_encontrado": local_encontrado,
+        "data_encontrado": data_encontrado,
+        "categoria": categoria or None,
+        "descricao": descricao or None,
+        "aprovado": aprovado if isinstance(aprovado, bool) else False,
+        # status padrão é "Em estoque"
+    }
+
+
+# ----------------- Leitura dos arquivos -----------------
+
+
+def detect_format(filename: str) -> str:
+    """
+    Formato pelo nome do arquivo (.csv, .ndjson/.jsonl, .json).
+    """
+    name = (filename or "").lower()
+    if name.endswith(".csv"):
+        return "csv"
+    if name.endswith((".ndjson", ".jsonl")):
+        return "ndjson"
+    if name.endswith(".json"):
+        return "json"
+    raise ValueError("Não sei o formato do arquivo; informe csv, json ou ndjson")
+
+
+def _csv_rows(lines):
+    reader = csv.DictReader(lines)
+    missing = [name for name in REQUIRED_FIELDS if name not in (reader.fieldnames or ())]
+    if missing:
+        raise ValueError(f"Colunas faltando no CSV: {', '.join(missing)}")
+
+    for row in reader:
+        aprovado = (row.get("aprovado") or "").strip().lower()
+        row["aprovado"] = aprovado in CSV_TRUE
+        # linha física do arquivo (contando o cabeçalho)
+        yield reader.line_num, row
+
+
+def _ndjson_rows(lines):
+    for number, line in enumerate(lines, start=1):
+        if not line.strip():
+            continue
+        try:
+            yield number, json.loads(line)
+        except json.JSONDecodeError:
+            yield number, line
+
+
+def _json_rows(lines):
+    # um array JSON precisa ser lido inteiro; para arquivos grandes, NDJSON
+    try:
+        data = json.loads("".join(lines))
+    except json.JSONDecodeError:
+        raise ValueError("JSON inválido")
+    if not isinstance(data, list):
+        raise ValueError("O JSON deve ser uma lista de itens")
+    yield from enumerate(data, start=1)
+
+
+def read_rows(chunks, formato: str):
+    """
+    Lê as linhas de um arquivo em `formato` a partir de um iterável de
+    bytes (arquivo aberto em modo binário, upload do Django) e gera
+    (número da linha, dados).
+    """
+    readers = {"csv": _csv_rows, "json": _json_rows, "ndjson": _ndjson_rows}
+    if formato not in readers:
+        raise ValueError(f"Formato inválido: {formato}")
+    lines = codecs.iterdecode(chunks, "utf-8-sig")
+    return readers[formato](lines)
+
+
+# ----------------- Gravação -----------------
+
+
+def _insert_batch(batch: list) -> int:
+    """
+    Grava um lote de itens numa transação: uma versão nova para o lote
+    inteiro (total + len(batch)), o INSERT e a reindexação da busca
+    e do índice de duplicados.
+    bulk_create não chama save() nem os sinais, por isso faço aqui o
+    que ComRevisao.save e signals.item_saved fariam.
+    """
+    with transaction.atomic():
+        revisao = VersaoDados.incrementar(Item.CONJUNTO, len(batch))
+        for item in batch:
+            item.revisao = revisao
+        created = Item.objects.bulk_create(batch)
+        search.index_items(created)
+        dedup.index_items(created, created=True)
+    return len(created)
+
+
+def import_items(rows, batch_size: int = DEFAULT_BATCH_SIZE) -> dict:
+    """
+    Valida e grava as linhas de read_rows(). Linhas inválidas ficam de
+    fora e entram no relatório; as válidas são gravadas em lotes de
+    `batch_size`. Um erro do banco interrompe a importação, mas os lotes
+    anteriores já ficaram gravados.
+
+    Devolve {"linhas", "importados", "erros": [{"linha", "erro"}]}.
+    """
+    report = {"linhas": 0, "importados": 0, "erros": []}
+    batch = []
+
+    for linha, data in rows:
+        report["linhas"] += 1
+        try:
+            fields = clean_item_data(data)
+        except ValueError as exc:
+            report["erros"].append({"linha": linha, "erro": str(exc)})
+            continue
+
+        batch.append(Item(**fields))
+        if len(batch) >= batch_size:
+            report["importados"] += _insert_batch(batch)
+            batch = []
+
+    if batch:
+        report["importados"] += _insert_batch(batch)
+
+    return report
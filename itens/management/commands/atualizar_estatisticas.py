@@ -0,0 +1,54 @@
+# ============================================================
+# Achados e Perdidos - UnDF
+# Arquivo: management/commands/atualizar_estatisticas.py
+#
+# Recalcula as estatísticas do painel (ver itens/estatisticas.py) se
+# os dados mudaram desde o último cálculo.
+#
+#   python manage.py atualizar_estatisticas            # cron, a cada 5 min
+#   python manage.py atualizar_estatisticas --forcar
+#   python manage.py atualizar_estatisticas --a-cada 300
+# ============================================================
+
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import close_old_connections
+
+from itens import estatisticas
+
+
+class Command(BaseCommand):
+    help = "Recalcula as estatísticas do painel interno (só se os dados mudaram)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--forcar", action="store_true", help="Recalcula mesmo sem mudanças.")
+        parser.add_argument(
+            "--a-cada",
+            type=float,
+            default=0,
+            help="Fica rodando e confere a cada tantos segundos (padrão: uma vez só).",
+        )
+
+    def handle(self, *args, **options):
+        if options["a_cada"] < 0:
+            raise CommandError("--a-cada não pode ser negativo.")
+
+        forcar = options["forcar"]
+        try:
+            while True:
+                close_old_connections()
+                estatistica, recalculou = estatisticas.atualizar(forcar=forcar)
+                if recalculou:
+                    self.stdout.write(self.style.SUCCESS(
+                        f"Estatísticas recalculadas em {estatistica.segundos:.2f}s "
+                        f"(itens v{estatistica.versao_itens}, reivindicações v{estatistica.versao_reivindicacoes})."
+                    ))
+                elif not options["a_cada"]:
+                    self.stdout.write("Nada mudou desde o último cálculo.")
+                if not options["a_cada"]:
+                    return
+                forcar = False
+                time.sleep(options["a_cada"])
+        except KeyboardInterrupt:
+            pass
@@ -0,0 +1,432 @@
+# ============================================================
+# Achados e Perdidos - UnDF
+# Arquivo: management/commands/benchmark_api.py
+#
+# Passa por todas as rotas de itens/urls.py com o cliente de testes do
+# Django e mede, por cenário: latência (p50/p99/máx), consultas ao banco
+# por requisição e pico de memória alocada (tracemalloc).
+#
+#   python manage.py gerar_dados 100k --semente 1
+#   python manage.py benchmark_api --saida antes.json
+#   ... mudança ...
+#   python manage.py benchmark_api --saida depois.json --comparar antes.json
+#
+# Roda tudo dentro de uma transação desfeita no final: as rotas que
+# gravam (reivindicação nova, edição, devolução...) não alteram o banco.
+# Cada rota de itens/urls.py precisa ter cenário aqui (ou estar em
+# SKIPPED com o motivo); rota nova sem cenário é erro, para o benchmark
+# não ficar para trás.
+#
+# A memória é medida numa passada separada, uma requisição por cenário,
+# porque o tracemalloc deixa tudo bem mais lento e estragaria a latência.
+# ============================================================
+
+import json
+import platform
+import random
+import statistics
+import subprocess
+import time
+import tracemalloc
+from contextlib import ExitStack
+from datetime import date, datetime
+
+import django
+from asgiref.sync import async_to_sync
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections, transaction
+from django.test import Client
+from django.urls import reverse
+
+from itens import urls
+from itens.models import Item, Reivindicacao
+
+
+# Rotas que não dá para medir com o cliente de testes (WSGI).
+SKIPPED = {
+    "internal_events": "SSE: resposta infinita e só funciona com ASGI",
+    "claim_ticket_status": "só responde com a fila de reivindicações ligada (ITENS_FILA_REIVINDICACOES)",
+}
+
+
+class _Rollback(Exception):
+    pass
+
+
+def _percentile(values, pct):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    index = min(len(values) - 1, int(round(pct / 100 * (len(values) - 1))))
+    return values[index]
+
+
+class _QueryCounter:
+    """
+    execute_wrapper que só conta as consultas (em qualquer banco).
+    """
+
+    def __init__(self):
+        self.total = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.total += 1
+        return execute(sql, params, many, context)
+
+
+class Context:
+    """
+    Ids e valores de exemplo usados para montar as requisições.
+    """
+
+    def __init__(self, seed):
+        self.rng = random.Random(seed)
+        self.item_ids = list(Item.objects.order_by("?").values_list("id", flat=True)[:500])
+        self.claim_ids = list(Reivindicacao.objects.order_by("?").values_list("id", flat=True)[:500])
+        if not self.item_ids or not self.claim_ids:
+            raise CommandError("Banco sem itens/reivindicações; rode gerar_dados antes.")
+        self.words = sorted({nome.split()[0] for nome in Item.objects.values_list("nome", flat=True)[:1000]})
+        self.cursor = None
+        self.claim_status = {}
+
+    def item_id(self):
+        return self.rng.choice(self.item_ids)
+
+    def claim_id(self):
+        return self.rng.choice(self.claim_ids)
+
+    def word(self):
+        return self.rng.choice(self.words).lower()
+
+
+def _read_body(response) -> bytes:
+    """
+    Corpo inteiro de uma resposta em streaming, inclusive das views
+    async (conteúdo async, consumido aqui num event loop próprio).
+    """
+    if response.is_async:
+        async def consume():
+            return [chunk async for chunk in response.streaming_content]
+
+        return b"".join(async_to_sync(consume)())
+    return b"".join(response.streaming_content)
+
+
+def _json(data):
+    return {"data": json.dumps(data), "content_type": "application/json"}
+
+
+def _import_file(ctx):
+    lines = ["nome,local_encontrado,data_encontrado,categoria"]
+    for n in range(100):
+        lines.append(f"Objeto de benchmark {n},Biblioteca,{date.today().isoformat()},Outros")
+    arquivo = SimpleUploadedFile("benchmark.csv", "\n".join(lines).encode("utf-8"), content_type="text/csv")
+    return {"data": {"arquivo": arquivo}}
+
+
+def _claim_status(ctx):
+    # alterna pendente/recusada; aprovar daria 409 em boa parte dos itens
+    claim_id = ctx.claim_id()
+    status = "Recusada" if ctx.claim_status.get(claim_id) != "Recusada" else "Pendente"
+    ctx.claim_status[claim_id] = status
+    return reverse("internal_claim_update_status", args=[claim_id]), _json({"status": status})
+
+
+# (nome do cenário, rota, método, função(ctx) -> (caminho, kwargs do client))
+SCENARIOS = [
+    ("home", "home", "get", lambda ctx: (reverse("home"), {})),
+    ("internal_dashboard", "internal_dashboard", "get", lambda ctx: (reverse("internal_dashboard"), {})),
+    ("item_list_create", "item_list_create", "get", lambda ctx: (reverse("item_list_create"), {})),
+    (
+        "item_list_create pagina2",
+        "item_list_create",
+        "get",
+        lambda ctx: (reverse("item_list_create"), {"data": {"cursor": ctx.cursor}} if ctx.cursor else {}),
+    ),
+    (
+        "item_list_create busca",
+        "item_list_create",
+        "get",
+        lambda ctx: (reverse("item_list_create"), {"data": {"q": ctx.word()}}),
+    ),
+    (
+        "item_list_create POST",
+        "item_list_create",
+        "post",
+        lambda ctx: (
+            reverse("item_list_create"),
+            _json({"name": "Objeto de benchmark", "location": "Biblioteca", "date": date.today().isoformat()}),
+        ),
+    ),
+    ("item_search", "item_search", "get", lambda ctx: (reverse("item_search"), {"data": {"q": ctx.word()}})),
+    (
+        "item_suggestions",
+        "item_suggestions",
+        "get",
+        lambda ctx: (reverse("item_suggestions"), {"data": {"q": f"perdi {ctx.word()} preto perto da biblioteca"}}),
+    ),
+    (
+        "item_mark_returned",
+        "item_mark_returned",
+        "delete",
+        lambda ctx: (reverse("item_mark_returned", args=[ctx.item_id()]), {}),
+    ),
+    (
+        "item_claim_create",
+        "item_claim_create",
+        "post",
+        lambda ctx: (
+            reverse("item_claim_create", args=[ctx.item_id()]),
+            _json({"nome": "Benchmark", "detalhes": "reivindicação de teste", "vinculo": "Estudante"}),
+        ),
+    ),
+    ("internal_claims_list", "internal_claims_list", "get", lambda ctx: (reverse("internal_claims_list"), {})),
+    (
+        "internal_claims_list ndjson",
+        "internal_claims_list",
+        "get",
+        lambda ctx: (reverse("internal_claims_list"), {"data": {"formato": "ndjson"}}),
+    ),
+    ("internal_claim_update_status", "internal_claim_update_status", "post", _claim_status),
+    (
+        "internal_claims_matches",
+        "internal_claims_matches",
+        "get",
+        lambda ctx: (reverse("internal_claims_matches"), {}),
+    ),
+    ("internal_items_list", "internal_items_list", "get", lambda ctx: (reverse("internal_items_list"), {})),
+    (
+        "internal_items_list campos",
+        "internal_items_list",
+        "get",
+        lambda ctx: (reverse("internal_items_list"), {"data": {"fields": "id,nome,status"}}),
+    ),
+    # variantes async (aqui pelo test client, síncrono; a comparação
+    # com clientes simultâneos é no benchmark_asgi)
+    ("item_list_create_async", "item_list_create_async", "get", lambda ctx: (reverse("item_list_create_async"), {})),
+    (
+        "item_claim_create_async",
+        "item_claim_create_async",
+        "post",
+        lambda ctx: (
+            reverse("item_claim_create_async", args=[ctx.item_id()]),
+            _json({"nome": "Benchmark", "detalhes": "reivindicação de teste", "vinculo": "Estudante"}),
+        ),
+    ),
+    (
+        "internal_claims_list_async",
+        "internal_claims_list_async",
+        "get",
+        lambda ctx: (reverse("internal_claims_list_async"), {}),
+    ),
+    (
+        "internal_items_list_async",
+        "internal_items_list_async",
+        "get",
+        lambda ctx: (reverse("internal_items_list_async"), {}),
+    ),
+    (
+        "internal_item_create",
+        "internal_item_create",
+        "post",
+        lambda ctx: (
+            reverse("internal_item_create"),
+            _json({
+                "nome": "Objeto de benchmark",
+                "local_encontrado": "Biblioteca",
+                "data_encontrado": date.today().isoformat(),
+                "categoria": "Outros",
+            }),
+        ),
+    ),
+    (
+        "internal_items_bulk",
+        "internal_items_bulk",
+        "post",
+        lambda ctx: (
+            reverse("internal_items_bulk"),
+            _json({"ids": ctx.rng.sample(ctx.item_ids, min(50, len(ctx.item_ids))), "acao": "aprovar"}),
+        ),
+    ),
+    ("internal_items_import", "internal_items_import", "post", lambda ctx: (reverse("internal_items_import"), _import_file(ctx))),
+    (
+        "internal_item_update",
+        "internal_item_update",
+        "post",
+        lambda ctx: (
+            reverse("internal_item_update", args=[ctx.item_id()]),
+            _json({"descricao": "Descrição alterada pelo benchmark."}),
+        ),
+    ),
+    (
+        "internal_item_mark_returned",
+        "internal_item_mark_returned",
+        "post",
+        lambda ctx: (reverse("internal_item_mark_returned", args=[ctx.item_id()]), {}),
+    ),
+    (
+        "internal_item_back_to_stock",
+        "internal_item_back_to_stock",
+        "post",
+        lambda ctx: (reverse("internal_item_back_to_stock", args=[ctx.item_id()]), {}),
+    ),
+    (
+        "internal_export itens csv",
+        "internal_export",
+        "get",
+        lambda ctx: (reverse("internal_export", args=["itens"]), {}),
+    ),
+    (
+        "internal_export reivindicacoes colunar",
+        "internal_export",
+        "get",
+        lambda ctx: (reverse("internal_export", args=["reivindicacoes"]), {"data": {"formato": "colunar"}}),
+    ),
+    ("internal_metrics", "internal_metrics", "get", lambda ctx: (reverse("internal_metrics"), {})),
+    ("internal_statistics", "internal_statistics", "get", lambda ctx: (reverse("internal_statistics"), {})),
+]
+
+
+def _missing_routes():
+    names = {pattern.name for pattern in urls.urlpatterns if pattern.name}
+    covered = {route for _, route, _, _ in SCENARIOS} | set(SKIPPED)
+    return sorted(names - covered)
+
+
+def _git_commit():
+    try:
+        result = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, timeout=5
+        )
+    except (OSError, subprocess.SubprocessError):
+        return None
+    return result.stdout.strip() or None
+
+
+class Command(BaseCommand):
+    help = "Mede latência, consultas e memória de cada rota de itens/urls.py (resultado em JSON)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--repeticoes", type=int, default=20, help="Requisições por cenário (padrão: 20).")
+        parser.add_argument("--filtro", help="Só os cenários cujo nome contém este texto.")
+        parser.add_argument("--semente", type=int, default=1, help="Semente para escolher ids (padrão: 1).")
+        parser.add_argument("--saida", help="Grava o resultado neste arquivo JSON.")
+        parser.add_argument("--comparar", help="JSON de uma execução anterior, para mostrar a diferença.")
+
+    def handle(self, *args, **options):
+        missing = _missing_routes()
+        if missing:
+            raise CommandError(f"Rotas sem cenário no benchmark: {', '.join(missing)}")
+        if options["repeticoes"] < 1:
+            raise CommandError("--repeticoes precisa ser positivo.")
+
+        scenarios = [s for s in SCENARIOS if not options["filtro"] or options["filtro"] in s[0]]
+        anterior = None
+        if options["comparar"]:
+            with open(options["comparar"], encoding="utf-8") as f:
+                anterior = json.load(f)
+
+        result = {
+            "data": datetime.now().isoformat(timespec="seconds"),
+            "commit": _git_commit(),
+            "python": platform.python_version(),
+            "django": django.get_version(),
+            "banco": connections["default"].vendor,
+            "itens": Item.objects.count(),
+            "reivindicacoes": Reivindicacao.objects.count(),
+            "repeticoes": options["repeticoes"],
+            "ignoradas": SKIPPED,
+            "cenarios": {},
+        }
+
+        try:
+            with transaction.atomic():
+                result["cenarios"] = self._run(scenarios, options)
+                raise _Rollback
+        except _Rollback:
+            pass
+
+        self._print(result, anterior)
+        if options["saida"]:
+            with open(options["saida"], "w", encoding="utf-8") as f:
+                json.dump(result, f, indent=2, ensure_ascii=False)
+            self.stdout.write(f"Resultado gravado em {options['saida']}.")
+
+    def _run(self, scenarios, options):
+        ctx = Context(options["semente"])
+        client = Client()
+
+        # cursor da segunda página da listagem pública
+        first = client.get(reverse("item_list_create"))
+        if first.status_code == 200:
+            ctx.cursor = first.json().get("next_cursor")
+
+        results = {}
+        for name, route, method, build in scenarios:
+            latencies, queries, statuses = [], [], {}
+            for _ in range(options["repeticoes"]):
+                elapsed, count, status = self._request(client, method, build(ctx))
+                latencies.append(elapsed * 1000)
+                queries.append(count)
+                statuses[str(status)] = statuses.get(str(status), 0) + 1
+            results[name] = {
+                "rota": route,
+                "metodo": method.upper(),
+                "primeira_ms": latencies[0],
+                "p50_ms": statistics.median(latencies),
+                "p99_ms": _percentile(latencies, 99),
+                "max_ms": max(latencies),
+                "consultas_p50": statistics.median(queries),
+                "consultas_max": max(queries),
+                "status": statuses,
+            }
+
+        # passada separada para a memória (uma requisição por cenário)
+        tracemalloc.start()
+        try:
+            for name, route, method, build in scenarios:
+                tracemalloc.reset_peak()
+                base = tracemalloc.get_traced_memory()[0]
+                self._request(client, method, build(ctx))
+                results[name]["pico_memoria_kib"] = (tracemalloc.get_traced_memory()[1] - base) / 1024
+        finally:
+            tracemalloc.stop()
+        return results
+
+    def _request(self, client, method, request):
+        path, kwargs = request
+        counter = _QueryCounter()
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(counter))
+            inicio = time.perf_counter()
+            response = getattr(client, method)(path, **kwargs)
+            if response.streaming:
+                _read_body(response)
+            elapsed = time.perf_counter() - inicio
+        # sem response.close(): o cliente de testes já fecha a resposta
+        # sem o close_old_connections, que derrubaria a conexão (e a
+        # transação do benchmark)
+        return elapsed, counter.total, response.status_code
+
+    def _print(self, result, anterior):
+        self.stdout.write(
+            f"{result['itens']} itens, {result['reivindicacoes']} reivindicações, "
+            f"{result['repeticoes']} repetições ({result['banco']}, commit {result['commit'] or '?'})"
+        )
+        anteriores = (anterior or {}).get("cenarios", {})
+        for name, r in result["cenarios"].items():
+            line = (
+                f"{name:40} p50={r['p50_ms']:8.1f}ms p99={r['p99_ms']:8.1f}ms "
+                f"consultas={r['consultas_p50']:5g} memória={r['pico_memoria_kib']:9.0f}KiB "
+                f"status={','.join(sorted(r['status']))}"
+            )
+            old = anteriores.get(name)
+            if old and old["p50_ms"]:
+                line += f"  p50 {r['p50_ms'] / old['p50_ms']:.2f}x"
+                if old["consultas_p50"] != r["consultas_p50"]:
+                    line += f" consultas {old['consultas_p50']:g}->{r['consultas_p50']:g}"
+            self.stdout.write(line)
+        for route, motivo in result["ignoradas"].items():
+            self.stdout.write(f"{route:40} ignorada: {motivo}")
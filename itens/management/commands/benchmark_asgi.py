@@ -0,0 +1,372 @@
+# ============================================================
+# Achados e Perdidos - UnDF
+# Arquivo: management/commands/benchmark_asgi.py
+#
+# Carga com muitos clientes lentos, para comparar as views normais e
+# as variantes async (/api/async/) servidas pelo core/asgi.py, e o
+# WSGI com N workers síncronos (como o gunicorn padrão).
+#
+#   python manage.py benchmark_asgi
+#   python manage.py benchmark_asgi --lentos 200 --atraso 200 --json
+#   python manage.py benchmark_asgi --modo asgi-async --modo wsgi
+#
+# Tudo no mesmo processo, sem servidor de verdade: o event loop faz o
+# papel do uvicorn (chama a aplicação ASGI com o scope/receive/send)
+# e, no modo "wsgi", um pool de --workers threads faz o papel dos
+# workers. Dois tipos de cliente, ao mesmo tempo, até o prazo:
+#
+# - lentos: mandam uma reivindicação com o corpo em --partes pedaços,
+#   esperando --atraso ms antes de cada um (celular em rede ruim);
+# - rapidos: leem a listagem pública sem parar.
+#
+# A latência conta desde o início do envio, então inclui a espera
+# por um worker livre. Roda numa cópia temporária do banco (as
+# reivindicações criadas não ficam no original).
+#
+# --fila liga a fila de reivindicações (itens/fila.py) num diário
+# temporário, com o processar_fila rodando numa thread ao lado: os
+# lentos recebem 202 e o resultado mostra quantas o worker gravou e
+# quantas sobraram no diário no fim (o atraso da fila).
+# ============================================================
+
+import asyncio
+import json
+import os
+import random
+import shutil
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+from itens import fila
+from itens.models import Item
+
+
+MODES = ("asgi-sync", "asgi-async", "wsgi")
+
+# Rotas de cada modo: (listagem, reivindicação).
+PATHS = {
+    "asgi-sync": ("/api/itens/", "/api/itens/{}/claim/"),
+    "asgi-async": ("/api/async/itens/", "/api/async/itens/{}/claim/"),
+    "wsgi": ("/api/itens/", "/api/itens/{}/claim/"),
+}
+
+
+def _percentile(values, pct):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    index = min(len(values) - 1, int(round(pct / 100 * (len(values) - 1))))
+    return values[index]
+
+
+def _claim_body(rng) -> bytes:
+    return json.dumps({
+        "nome": "Cliente lento",
+        "contato": "lento@example.com",
+        "detalhes": "reivindicação de teste " + "x" * rng.randrange(200, 800),
+    }).encode()
+
+
+def _parts(body: bytes, partes: int) -> list:
+    size = -(-len(body) // partes)
+    return [body[i:i + size] for i in range(0, len(body), size)] or [b""]
+
+
+class _SlowInput:
+    """
+    wsgi.input que entrega o corpo aos poucos, como um socket de um
+    cliente lento: cada pedaço só chega depois de `delay` segundos.
+    """
+
+    def __init__(self, parts, delay):
+        self.parts = list(parts)
+        self.delay = delay
+        self.buffer = b""
+
+    def read(self, size=-1):
+        while self.parts and (size < 0 or len(self.buffer) < size):
+            time.sleep(self.delay)
+            self.buffer += self.parts.pop(0)
+        if size < 0:
+            size = len(self.buffer)
+        data, self.buffer = self.buffer[:size], self.buffer[size:]
+        return data
+
+    def readline(self, size=-1):
+        # o corpo é JSON numa linha só
+        return self.read(size)
+
+    def close(self):
+        pass
+
+
+def _drain(parar, estado):
+    """
+    O processar_fila, numa thread, até o fim da medição. Depois anota
+    o que sobrou no diário e esvazia (o próximo modo começa do zero).
+    """
+    try:
+        while not parar.is_set():
+            registradas = fila.processar()["registradas"]
+            estado["registradas"] += registradas
+            if not registradas:
+                parar.wait(0.05)
+        estado["pendentes_no_fim"] = fila.pendentes()
+        while fila.processar()["registradas"]:
+            pass
+    finally:
+        connections.close_all()
+
+
+class Command(BaseCommand):
+    help = "Benchmark de clientes lentos: views síncronas x async no ASGI, e WSGI com N workers."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--modo",
+            action="append",
+            choices=MODES,
+            help="Modo a medir (pode repetir; padrão: todos).",
+        )
+        parser.add_argument("--lentos", type=int, default=50, help="Clientes enviando reivindicações devagar.")
+        parser.add_argument("--rapidos", type=int, default=10, help="Clientes lendo a listagem sem parar.")
+        parser.add_argument("--partes", type=int, default=5, help="Pedaços em que o corpo é enviado.")
+        parser.add_argument("--atraso", type=float, default=100.0, help="Milissegundos antes de cada pedaço.")
+        parser.add_argument("--segundos", type=float, default=5.0)
+        parser.add_argument("--workers", type=int, default=4, help="Threads do modo wsgi (workers do gunicorn).")
+        parser.add_argument(
+            "--fila",
+            action="store_true",
+            help="Liga a fila de reivindicações, com o processar_fila numa thread.",
+        )
+        parser.add_argument("--json", action="store_true", help="Resultado em JSON.")
+
+    def handle(self, *args, **options):
+        for name in ("lentos", "rapidos", "partes", "workers"):
+            if options[name] < (1 if name in ("partes", "workers") else 0):
+                raise CommandError(f"--{name} inválido.")
+        if options["atraso"] < 0 or options["segundos"] <= 0:
+            raise CommandError("--atraso e --segundos precisam ser positivos.")
+
+        db = settings.DATABASES["default"]
+        if db["ENGINE"] != "django.db.backends.sqlite3":
+            raise CommandError("Este benchmark é só para SQLite (roda numa cópia do arquivo).")
+
+        ids = list(Item.objects.filter(status="Em estoque").values_list("id", flat=True)[:5000])
+        if not ids:
+            raise CommandError("Banco sem itens em estoque; importe alguns antes (importar_itens).")
+
+        original = dict(db)
+        tmpdir = tempfile.mkdtemp(prefix="benchmark-asgi-")
+        copia = os.path.join(tmpdir, "db.sqlite3")
+        connections.close_all()
+        shutil.copy(db["NAME"], copia)
+
+        fila_original = settings.ITENS_FILA_REIVINDICACOES
+        results = {}
+        try:
+            db["NAME"] = copia
+            if options["fila"]:
+                settings.ITENS_FILA_REIVINDICACOES = os.path.join(tmpdir, "fila.sqlite3")
+            for mode in options["modo"] or MODES:
+                results[mode] = asyncio.run(self._run(mode, ids, options))
+                connections.close_all()
+        finally:
+            settings.ITENS_FILA_REIVINDICACOES = fila_original
+            connections.close_all()
+            db.clear()
+            db.update(original)
+            shutil.rmtree(tmpdir, ignore_errors=True)
+
+        if options["json"]:
+            self.stdout.write(json.dumps(results, indent=2))
+            return
+
+        self.stdout.write(
+            f"lentos={options['lentos']} rapidos={options['rapidos']} "
+            f"corpo em {options['partes']}x{options['atraso']:.0f}ms segundos={options['segundos']} "
+            f"(wsgi: {options['workers']} workers){' com fila' if options['fila'] else ''}"
+        )
+        for mode, result in results.items():
+            self.stdout.write(f"{mode}:")
+            for papel in ("lentos", "rapidos"):
+                r = result[papel]
+                self.stdout.write(
+                    f"  {papel:8} {r['requisicoes']:6} req ({r['por_segundo']:7.1f}/s)  "
+                    f"p50={r['p50_ms']:7.1f}ms p99={r['p99_ms']:7.1f}ms máx={r['max_ms']:7.1f}ms  "
+                    f"erros={r['erros']}"
+                )
+            if "fila" in result:
+                self.stdout.write(
+                    f"  fila: {result['fila']['registradas']} gravadas pelo worker, "
+                    f"{result['fila']['pendentes_no_fim']} ainda no diário no fim"
+                )
+
+    async def _run(self, mode, ids, options):
+        list_path, claim_path = PATHS[mode]
+        delay = options["atraso"] / 1000
+        deadline = time.perf_counter() + options["segundos"]
+
+        if mode == "wsgi":
+            from django.core.handlers.wsgi import WSGIHandler
+
+            pool = ThreadPoolExecutor(max_workers=options["workers"])
+            call = self._wsgi_caller(WSGIHandler(), pool)
+        else:
+            from core.asgi import application
+
+            pool = None
+            call = self._asgi_caller(application)
+
+        latencies = {"lentos": [], "rapidos": []}
+        errors = {"lentos": [], "rapidos": []}
+
+        async def client(papel, seed):
+            rng = random.Random(seed)
+            while time.perf_counter() < deadline:
+                if papel == "lentos":
+                    request = ("POST", claim_path.format(rng.choice(ids)), "", _parts(_claim_body(rng), options["partes"]))
+                else:
+                    request = ("GET", list_path, f"page={rng.randrange(1, 6)}&limit=20", [b""])
+                inicio = time.perf_counter()
+                try:
+                    status = await call(*request, delay if papel == "lentos" else 0)
+                except Exception as exc:
+                    errors[papel].append(f"{type(exc).__name__}: {exc}")
+                    continue
+                if status >= 400:
+                    errors[papel].append(f"HTTP {status}")
+                    continue
+                latencies[papel].append((time.perf_counter() - inicio) * 1000)
+
+        parar = threading.Event()
+        estado = {"registradas": 0}
+        worker = None
+        if fila.ativa():
+            worker = threading.Thread(target=_drain, args=(parar, estado))
+            worker.start()
+
+        inicio = time.perf_counter()
+        try:
+            await asyncio.gather(
+                *(client("lentos", seed) for seed in range(options["lentos"])),
+                *(client("rapidos", -seed - 1) for seed in range(options["rapidos"])),
+            )
+        finally:
+            if pool is not None:
+                pool.shutdown(wait=True)
+            if worker is not None:
+                parar.set()
+                worker.join()
+        elapsed = time.perf_counter() - inicio
+
+        result = {
+            papel: {
+                "requisicoes": len(values),
+                "por_segundo": len(values) / elapsed,
+                "p50_ms": statistics.median(values) if values else 0.0,
+                "p99_ms": _percentile(values, 99),
+                "max_ms": max(values, default=0.0),
+                "erros": len(errors[papel]),
+                "exemplos_erro": sorted(set(errors[papel]))[:3],
+            }
+            for papel, values in latencies.items()
+        }
+        if worker is not None:
+            result["fila"] = estado
+        return result
+
+    @staticmethod
+    def _asgi_caller(application):
+        async def call(method, path, query, parts, delay):
+            body_length = sum(len(part) for part in parts)
+            scope = {
+                "type": "http",
+                "asgi": {"version": "3.0"},
+                "http_version": "1.1",
+                "method": method,
+                "scheme": "http",
+                "path": path,
+                "raw_path": path.encode(),
+                "query_string": query.encode(),
+                "root_path": "",
+                "headers": [
+                    (b"host", b"localhost"),
+                    (b"content-type", b"application/json"),
+                    (b"content-length", str(body_length).encode()),
+                ],
+                "client": ("127.0.0.1", 50000),
+                "server": ("localhost", 80),
+            }
+            pending = list(parts)
+            finished = asyncio.Event()
+            status = []
+
+            async def receive():
+                if pending:
+                    if delay:
+                        await asyncio.sleep(delay)
+                    body = pending.pop(0)
+                    return {"type": "http.request", "body": body, "more_body": bool(pending)}
+                # corpo todo enviado: o cliente só desconecta depois da resposta
+                await finished.wait()
+                return {"type": "http.disconnect"}
+
+            async def send(message):
+                if message["type"] == "http.response.start":
+                    status.append(message["status"])
+                elif message["type"] == "http.response.body" and not message.get("more_body"):
+                    finished.set()
+
+            await application(scope, receive, send)
+            finished.set()
+            return status[0]
+
+        return call
+
+    @staticmethod
+    def _wsgi_caller(application, pool):
+        def run(method, path, query, parts, delay):
+            environ = {
+                "REQUEST_METHOD": method,
+                "PATH_INFO": path,
+                "QUERY_STRING": query,
+                "SCRIPT_NAME": "",
+                "SERVER_NAME": "localhost",
+                "SERVER_PORT": "80",
+                "SERVER_PROTOCOL": "HTTP/1.1",
+                "REMOTE_ADDR": "127.0.0.1",
+                "CONTENT_TYPE": "application/json",
+                "CONTENT_LENGTH": str(sum(len(part) for part in parts)),
+                "wsgi.version": (1, 0),
+                "wsgi.url_scheme": "http",
+                "wsgi.input": _SlowInput(parts, delay),
+                "wsgi.errors": sys.stderr,
+                "wsgi.multithread": True,
+                "wsgi.multiprocess": False,
+                "wsgi.run_once": False,
+            }
+            status = []
+            response = application(environ, lambda line, headers, exc_info=None: status.append(line))
+            try:
+                for _ in response:
+                    pass
+            finally:
+                if hasattr(response, "close"):
+                    response.close()
+            return int(status[0].split()[0])
+
+        async def call(*request):
+            # o worker fica ocupado do primeiro byte do corpo até o fim
+            # da resposta, como no gunicorn síncrono
+            return await asyncio.get_running_loop().run_in_executor(pool, run, *request)
+
+        return call
@@ -0,0 +1,193 @@
+# ============================================================
+# Achados e Perdidos - UnDF
+# Arquivo: management/commands/benchmark_concorrencia.py
+#
+# Mede leitores x escritores simultâneos no SQLite, para comparar os
+# perfis de settings.SQLITE_PERFIS ("padrao" e "wal").
+#
+#   python manage.py benchmark_concorrencia --perfil padrao
+#   python manage.py benchmark_concorrencia --perfil wal --escritores 4
+#
+# Roda numa cópia temporária do banco (o original não é alterado):
+# processos "escritores" criam reivindicações e editam itens, como
+# item_claim_create e o painel; processos "leitores" fazem as consultas
+# das listagens. No fim mostra latência (p50/p99/máx) e erros de cada
+# lado. No perfil "wal" a latência das leituras não deve subir com os
+# escritores, e não deve haver "database is locked".
+# ============================================================
+
+import json
+import multiprocessing
+import os
+import random
+import shutil
+import statistics
+import tempfile
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import OperationalError, connection, connections, transaction
+
+from itens.models import Item, Reivindicacao
+
+
+def _percentile(values, pct):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    index = min(len(values) - 1, int(round(pct / 100 * (len(values) - 1))))
+    return values[index]
+
+
+class Command(BaseCommand):
+    help = "Benchmark de leituras e escritas simultâneas no SQLite (perfis padrao/wal)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--perfil", choices=sorted(settings.SQLITE_PERFIS), default=settings.SQLITE_PERFIL)
+        parser.add_argument("--leitores", type=int, default=4)
+        parser.add_argument("--escritores", type=int, default=2)
+        parser.add_argument("--segundos", type=float, default=5.0)
+        parser.add_argument(
+            "--espera",
+            type=float,
+            default=5.0,
+            help="Milissegundos que cada escrita segura a transação aberta (simula o resto da requisição).",
+        )
+        parser.add_argument("--json", action="store_true", help="Resultado em JSON.")
+
+    def handle(self, *args, **options):
+        db = settings.DATABASES["default"]
+        if db["ENGINE"] != "django.db.backends.sqlite3":
+            raise CommandError("Este benchmark é só para SQLite.")
+
+        ids = list(Item.objects.values_list("id", flat=True)[:5000])
+        if not ids:
+            raise CommandError("Banco sem itens; importe alguns antes (importar_itens).")
+
+        original = dict(db)
+        tmpdir = tempfile.mkdtemp(prefix="benchmark-sqlite-")
+        copia = os.path.join(tmpdir, "db.sqlite3")
+        connections.close_all()
+        shutil.copy(db["NAME"], copia)
+
+        try:
+            db["NAME"] = copia
+            db["OPTIONS"] = dict(settings.SQLITE_PERFIS[options["perfil"]])
+            if options["perfil"] != "wal":
+                # o modo WAL fica gravado no arquivo; volto para o padrão
+                with connection.cursor() as cursor:
+                    cursor.execute("PRAGMA journal_mode=DELETE")
+                connection.close()
+            result = self._run(ids, options)
+        finally:
+            connections.close_all()
+            db.clear()
+            db.update(original)
+            shutil.rmtree(tmpdir, ignore_errors=True)
+
+        result["perfil"] = options["perfil"]
+        if options["json"]:
+            self.stdout.write(json.dumps(result, indent=2))
+            return
+
+        self.stdout.write(
+            f"perfil={result['perfil']} leitores={options['leitores']} "
+            f"escritores={options['escritores']} segundos={options['segundos']}"
+        )
+        for papel in ("leituras", "escritas"):
+            r = result[papel]
+            self.stdout.write(
+                f"{papel:9} {r['operacoes']:7} ops ({r['por_segundo']:.0f}/s)  "
+                f"p50={r['p50_ms']:.1f}ms p99={r['p99_ms']:.1f}ms máx={r['max_ms']:.1f}ms  "
+                f"erros={r['erros']}"
+            )
+
+    def _run(self, ids, options):
+        # um processo por leitor/escritor, como os workers do gunicorn
+        # (threads dividiriam o GIL e esconderiam a espera pelo banco)
+        context = multiprocessing.get_context("fork")
+        queue = context.Queue()
+        deadline = time.time() + options["segundos"]
+        espera = options["espera"] / 1000
+
+        processes = [
+            context.Process(target=_worker, args=("leituras", ids, deadline, espera, queue))
+            for _ in range(options["leitores"])
+        ] + [
+            context.Process(target=_worker, args=("escritas", ids, deadline, espera, queue))
+            for _ in range(options["escritores"])
+        ]
+        connections.close_all()
+        for process in processes:
+            process.start()
+
+        latencies = {"leituras": [], "escritas": []}
+        errors = {"leituras": [], "escritas": []}
+        for _ in processes:
+            papel, local_latencies, local_errors = queue.get()
+            latencies[papel].extend(local_latencies)
+            errors[papel].extend(local_errors)
+        for process in processes:
+            process.join()
+
+        result = {}
+        for papel, values in latencies.items():
+            result[papel] = {
+                "operacoes": len(values),
+                "por_segundo": len(values) / options["segundos"],
+                "p50_ms": statistics.median(values) if values else 0.0,
+                "p99_ms": _percentile(values, 99),
+                "max_ms": max(values, default=0.0),
+                "erros": len(errors[papel]),
+                "exemplos_erro": sorted(set(errors[papel]))[:3],
+            }
+        return result
+
+
+def _read_once(rng, ids, espera):
+    list(
+        Item.objects
+        .filter(status="Em estoque", aprovado=True)
+        .order_by("-data_encontrado", "-data_criacao", "-id")
+        .values_list("id", "nome", "local_encontrado")[:20]
+    )
+    list(
+        Reivindicacao.objects
+        .order_by("-data_envio")
+        .values_list("id", "status", "item__nome")[:50]
+    )
+
+
+def _write_once(rng, ids, espera):
+    item_id = rng.choice(ids)
+    with transaction.atomic():
+        Reivindicacao.objects.create(
+            item_id=item_id,
+            nome_requerente="Benchmark",
+            detalhes="reivindicação de teste",
+        )
+        time.sleep(espera)
+        Item.objects.filter(pk=item_id).update_revisado(aprovado=rng.random() < 0.5)
+
+
+def _worker(papel, ids, deadline, espera, queue):
+    """
+    Processo filho: repete a operação até o prazo e devolve
+    (papel, latências em ms, erros) pela fila.
+    """
+    operation = _read_once if papel == "leituras" else _write_once
+    rng = random.Random()
+    latencies, errors = [], []
+    try:
+        while time.time() < deadline:
+            inicio = time.perf_counter()
+            try:
+                operation(rng, ids, espera)
+            except OperationalError as exc:
+                errors.append(str(exc))
+                continue
+            latencies.append((time.perf_counter() - inicio) * 1000)
+    finally:
+        connection.close()
+        queue.put((papel, latencies, errors))
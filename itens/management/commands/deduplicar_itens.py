@@ -0,0 +1,110 @@
+# ============================================================
+# Achados e Perdidos - UnDF
+# Arquivo: management/commands/deduplicar_itens.py
+#
+# Passada no acervo todo procurando itens cadastrados em dobro (ver
+# itens/dedup.py). Só lista os grupos: quem decide qual cadastro fica
+# é o balcão, no painel.
+#
+#   python manage.py deduplicar_itens
+#   python manage.py deduplicar_itens --dias 14 --todos --json
+#   python manage.py deduplicar_itens --reindexar
+#
+# Itens ainda sem chaves LSH (criados antes do índice existir, ou por
+# SQL na mão) são indexados antes da passada; --reindexar refaz todos.
+# ============================================================
+
+import json
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from itens import dedup
+from itens.models import Item
+
+
+# Itens lidos/indexados por vez na (re)indexação.
+BATCH_SIZE = 2000
+
+
+class Command(BaseCommand):
+    help = "Lista grupos de itens provavelmente cadastrados em dobro (MinHash + LSH)."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--dias",
+            type=int,
+            default=dedup.WINDOW_DAYS,
+            help=f"Diferença máxima entre as datas em que os itens foram achados (padrão: {dedup.WINDOW_DAYS}).",
+        )
+        parser.add_argument(
+            "--todos",
+            action="store_true",
+            help='Inclui itens reivindicados/devolvidos (padrão: só "Em estoque").',
+        )
+        parser.add_argument("--reindexar", action="store_true", help="Refaz as chaves LSH de todos os itens.")
+        parser.add_argument("--json", action="store_true", help="Saída em JSON.")
+
+    def handle(self, *args, **options):
+        if options["dias"] < 0:
+            raise CommandError("--dias não pode ser negativo.")
+
+        inicio = time.perf_counter()
+        if options["reindexar"]:
+            indexados = self._index(Item.objects.all(), created=False)
+        else:
+            indexados = self._index(Item.objects.filter(assinaturas_lsh__isnull=True), created=True)
+
+        itens = Item.objects.all() if options["todos"] else Item.objects.filter(status="Em estoque")
+        groups = dedup.duplicate_groups(itens, window_days=options["dias"])
+        segundos = time.perf_counter() - inicio
+
+        if options["json"]:
+            self.stdout.write(json.dumps({
+                "indexados": indexados,
+                "grupos": [
+                    {
+                        "similaridade": round(group["similaridade"], 3),
+                        "itens": [
+                            {
+                                "id": item.id,
+                                "nome": item.nome,
+                                "local_encontrado": item.local_encontrado,
+                                "data_encontrado": item.data_encontrado.isoformat(),
+                                "status": item.status,
+                            }
+                            for item in group["itens"]
+                        ],
+                    }
+                    for group in groups
+                ],
+            }, indent=2, ensure_ascii=False))
+            return
+
+        if indexados:
+            self.stdout.write(f"{indexados} itens indexados.")
+        for group in groups:
+            self.stdout.write(f"Grupo (similaridade {group['similaridade']:.2f}):")
+            for item in group["itens"]:
+                self.stdout.write(
+                    f"  #{item.id:<8} {item.nome} - {item.local_encontrado or '-'} "
+                    f"({item.data_encontrado:%d/%m/%Y}, {item.status})"
+                )
+        self.stdout.write(self.style.SUCCESS(
+            f"{len(groups)} grupos de prováveis duplicados "
+            f"({sum(len(group['itens']) for group in groups)} itens) em {segundos:.1f}s."
+        ))
+
+    def _index(self, queryset, created: bool) -> int:
+        """
+        Indexa em lotes por id (keyset), sem carregar tudo na memória.
+        """
+        total, last_id = 0, 0
+        queryset = queryset.only("id", *dedup.TEXT_FIELDS).order_by("id")
+        while True:
+            batch = list(queryset.filter(id__gt=last_id)[:BATCH_SIZE])
+            if not batch:
+                return total
+            dedup.index_items(batch, created=created)
+            total += len(batch)
+            last_id = batch[-1].pk
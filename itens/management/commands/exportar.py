@@ -0,0 +1,50 @@
+# ============================================================
+# Achados e Perdidos - UnDF
+# Arquivo: management/commands/exportar.py
+#
+# Exporta itens ou reivindicações para CSV ou para o formato colunar
+# (ver exporter.py), lendo o banco em blocos.
+#
+#   python manage.py exportar itens --saida itens.csv
+#   python manage.py exportar reivindicacoes --formato colunar --saida reiv.ndjson
+# ============================================================
+
+import sys
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from itens import exporter
+
+
+class Command(BaseCommand):
+    help = "Exporta itens ou reivindicações (CSV ou colunar) em streaming."
+
+    def add_arguments(self, parser):
+        parser.add_argument("conjunto", choices=sorted(exporter.DATASETS))
+        parser.add_argument("--formato", choices=exporter.FORMATS, default="csv")
+        parser.add_argument(
+            "--saida",
+            help="Arquivo de saída (padrão: saída padrão).",
+        )
+
+    def handle(self, *args, **options):
+        contador = [0]
+        chunks = exporter.export_chunks(options["conjunto"], options["formato"], contador)
+
+        inicio = time.perf_counter()
+        if options["saida"]:
+            try:
+                with open(options["saida"], "w", newline="", encoding="utf-8") as saida:
+                    saida.writelines(chunks)
+            except OSError as exc:
+                raise CommandError(f"Não consegui gravar o arquivo: {exc}")
+        else:
+            sys.stdout.writelines(chunks)
+        duracao = time.perf_counter() - inicio
+
+        # o resumo vai para stderr, para não misturar com o arquivo no stdout
+        por_segundo = contador[0] / duracao if duracao else 0
+        self.stderr.write(self.style.SUCCESS(
+            f"{contador[0]} linhas exportadas em {duracao:.2f}s ({por_segundo:.0f} linhas/s)."
+        ))
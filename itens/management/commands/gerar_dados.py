@@ -0,0 +1,242 @@
+# ============================================================
+# Achados e Perdidos - UnDF
+# Arquivo: management/commands/gerar_dados.py
+#
+# Gera itens e reivindicações fictícios (mas com cara de campus) para
+# testar desempenho com volume: 10k, 100k, 1M itens...
+#
+#   python manage.py gerar_dados 10k
+#   python manage.py gerar_dados 1M --media-reivindicacoes 1.5 --semente 7
+#
+# Os dados são coerentes com as regras do painel:
+# - item "Reivindicado"/"Devolvido" com reivindicações tem exatamente uma
+#   "Aprovada" (as outras foram recusadas);
+# - item "Em estoque" só tem reivindicações "Pendente" ou "Recusada";
+# - os contadores do item (reivindicacoes_pendentes...) batem com as
+#   reivindicações geradas.
+#
+# Grava em lotes como a importação (importer._insert_batch): bulk_create,
+# uma versão nova por lote em cada conjunto, a busca textual e o índice
+# de duplicados em dia.
+# Os dados são somados aos que já existem no banco.
+# ============================================================
+
+import random
+import time
+from datetime import date, timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+
+from itens import dedup, search
+from itens.models import Item, Reivindicacao, VersaoDados
+
+
+# Itens gravados por transação (com as reivindicações deles).
+BATCH_SIZE = 5000
+
+OBJETOS = {
+    "Documentos": ["Carteira de identidade", "Carteira de estudante", "CNH", "Crachá", "Passaporte"],
+    "Eletrônicos": ["Celular", "Fone de ouvido", "Carregador", "Pen drive", "Calculadora", "Notebook", "Mouse"],
+    "Vestuário": ["Casaco", "Moletom", "Boné", "Jaqueta", "Cachecol", "Tênis"],
+    "Acessórios": ["Óculos", "Relógio", "Guarda-chuva", "Chaveiro", "Carteira", "Garrafa térmica", "Pulseira"],
+    "Material escolar": ["Caderno", "Estojo", "Livro", "Mochila", "Apostila", "Agenda"],
+    "Outros": ["Chave", "Marmita", "Cartão do RU", "Squeeze", "Bolsa"],
+}
+
+CORES = ["preto", "preta", "azul", "vermelho", "branco", "cinza", "verde", "rosa", "amarelo", "marrom"]
+
+DETALHES = [
+    "com adesivo na parte de trás",
+    "com o nome escrito à caneta",
+    "dentro de uma capa transparente",
+    "com um arranhão na lateral",
+    "com chaveiro de pelúcia",
+    "quase novo",
+    "bem gasto",
+    "com etiqueta de patrimônio",
+]
+
+LOCAIS = [
+    "Biblioteca", "Restaurante Universitário", "Bloco A", "Bloco B", "Bloco C",
+    "Laboratório de Informática", "Auditório", "Ginásio", "Estacionamento",
+    "Cantina", "Secretaria Acadêmica", "Sala 101", "Sala 204", "Parada de ônibus",
+]
+
+NOMES = [
+    "Ana", "Bruno", "Camila", "Daniel", "Eduarda", "Felipe", "Gabriela", "Henrique",
+    "Isabela", "João", "Larissa", "Lucas", "Mariana", "Pedro", "Rafaela", "Thiago",
+]
+
+SOBRENOMES = [
+    "Silva", "Souza", "Oliveira", "Santos", "Pereira", "Lima", "Carvalho",
+    "Ferreira", "Rodrigues", "Almeida", "Costa", "Gomes", "Ribeiro", "Martins",
+]
+
+VINCULOS = [value for value, _ in Reivindicacao.VINCULO_CHOICES]
+
+# Dias para trás em que os itens podem ter sido encontrados.
+JANELA_DIAS = 730
+
+
+def quantidade(value: str) -> int:
+    """
+    Aceita "5000", "10k", "1.5M".
+    """
+    text = value.strip().lower()
+    multiplier = 1
+    if text[-1:] in ("k", "m"):
+        multiplier = 1000 if text[-1] == "k" else 1_000_000
+        text = text[:-1]
+    try:
+        total = int(float(text) * multiplier)
+    except ValueError:
+        raise CommandError(f'Quantidade inválida: "{value}"')
+    if total < 1:
+        raise CommandError("A quantidade precisa ser positiva.")
+    return total
+
+
+class Generator:
+    """
+    Monta os objetos (sem gravar). Uma semente fixa gera sempre os
+    mesmos dados, para comparar execuções do benchmark.
+    """
+
+    def __init__(self, seed, media_reivindicacoes: float):
+        self.rng = random.Random(seed)
+        # número de reivindicações por item ~ geométrica com essa média
+        self.p_mais_uma = media_reivindicacoes / (1 + media_reivindicacoes)
+        self.hoje = date.today()
+        self.agora = timezone.now()
+
+    def item(self):
+        """
+        Devolve (Item, [status das reivindicações dele]).
+        """
+        rng = self.rng
+        categoria = rng.choice(list(OBJETOS))
+        objeto = rng.choice(OBJETOS[categoria])
+        cor = rng.choice(CORES)
+        local = rng.choice(LOCAIS)
+
+        claims = []
+        while len(claims) < 10 and rng.random() < self.p_mais_uma:
+            claims.append("Pendente")
+
+        status = "Em estoque"
+        if claims and rng.random() < 0.4:
+            # alguém já provou que era dono: uma aprovada, o resto recusado
+            status = "Reivindicado" if rng.random() < 0.3 else "Devolvido"
+            claims = ["Recusada"] * len(claims)
+            claims[rng.randrange(len(claims))] = "Aprovada"
+        else:
+            claims = ["Recusada" if rng.random() < 0.2 else "Pendente" for _ in claims]
+            if not claims and rng.random() < 0.05:
+                status = "Devolvido"  # devolvido direto no balcão
+
+        item = Item(
+            nome=f"{objeto} {cor}",
+            descricao=f"{objeto} {cor} {rng.choice(DETALHES)}, deixado perto de {local.lower()}.",
+            categoria=categoria,
+            local_encontrado=local,
+            data_encontrado=self.hoje - timedelta(days=rng.randrange(JANELA_DIAS)),
+            status=status,
+            devolvido_em=self.agora if status == "Devolvido" else None,
+            aprovado=rng.random() < 0.85,
+            reivindicacoes_pendentes=claims.count("Pendente"),
+            reivindicacoes_aprovadas=claims.count("Aprovada"),
+            reivindicacoes_recusadas=claims.count("Recusada"),
+        )
+        return item, claims
+
+    def reivindicacao(self, item, status):
+        rng = self.rng
+        nome = f"{rng.choice(NOMES)} {rng.choice(SOBRENOMES)}"
+        usuario = nome.lower().replace(" ", ".")
+        return Reivindicacao(
+            item=item,
+            nome_requerente=nome,
+            vinculo=rng.choice(VINCULOS),
+            identificacao=str(rng.randrange(10_000_000, 99_999_999)),
+            contato=f"{usuario}@exemplo.edu.br",
+            detalhes=f"É meu, {rng.choice(DETALHES)}. Perdi no(a) {item.local_encontrado}.",
+            status=status,
+        )
+
+
+def _insert_batch(generator, size: int):
+    """
+    Grava `size` itens e as reivindicações deles numa transação e
+    devolve (itens, reivindicações) gravados.
+    """
+    planned = [generator.item() for _ in range(size)]
+    with transaction.atomic():
+        revisao = VersaoDados.incrementar(Item.CONJUNTO, size)
+        items = [item for item, _ in planned]
+        for item in items:
+            item.revisao = revisao
+        created = Item.objects.bulk_create(items)
+        search.index_items(created)
+        dedup.index_items(created, created=True)
+
+        # bulk_create preencheu os ids (SQLite/PostgreSQL)
+        claims = [
+            generator.reivindicacao(item, status)
+            for item, statuses in planned
+            for status in statuses
+        ]
+        if claims:
+            revisao = VersaoDados.incrementar(Reivindicacao.CONJUNTO, len(claims))
+            for claim in claims:
+                claim.revisao = revisao
+            Reivindicacao.objects.bulk_create(claims)
+    return len(created), len(claims)
+
+
+class Command(BaseCommand):
+    help = "Gera itens e reivindicações fictícios em volume (ex.: 10k, 100k, 1M) para testes de desempenho."
+
+    def add_arguments(self, parser):
+        parser.add_argument("itens", type=quantidade, help='Quantos itens gerar ("10k", "1M"...).')
+        parser.add_argument(
+            "--media-reivindicacoes",
+            type=float,
+            default=0.8,
+            help="Média de reivindicações por item (padrão: 0.8).",
+        )
+        parser.add_argument("--semente", type=int, default=None, help="Semente do gerador (dados repetíveis).")
+        parser.add_argument(
+            "--lote",
+            type=int,
+            default=BATCH_SIZE,
+            help=f"Itens gravados por transação (padrão: {BATCH_SIZE}).",
+        )
+
+    def handle(self, *args, **options):
+        if options["lote"] < 1:
+            raise CommandError("--lote precisa ser positivo.")
+        if options["media_reivindicacoes"] < 0:
+            raise CommandError("--media-reivindicacoes não pode ser negativa.")
+
+        generator = Generator(options["semente"], options["media_reivindicacoes"])
+        total = options["itens"]
+        itens = reivindicacoes = 0
+        inicio = time.perf_counter()
+        proximo_aviso = total // 10
+
+        while itens < total:
+            size = min(options["lote"], total - itens)
+            novos_itens, novas_reivindicacoes = _insert_batch(generator, size)
+            itens += novos_itens
+            reivindicacoes += novas_reivindicacoes
+            if total >= 50_000 and itens >= proximo_aviso and itens < total:
+                self.stdout.write(f"  {itens}/{total} itens...")
+                proximo_aviso += total // 10
+
+        segundos = time.perf_counter() - inicio
+        self.stdout.write(self.style.SUCCESS(
+            f"{itens} itens e {reivindicacoes} reivindicações gerados em {segundos:.1f}s "
+            f"({itens / segundos:.0f} itens/s)."
+        ))
@@ -0,0 +1,84 @@
+# ============================================================
+# Achados e Perdidos - UnDF
+# Arquivo: management/commands/importar_itens.py
+#
+# Importa itens de um arquivo CSV / NDJSON / JSON (ver importer.py).
+#
+#   python manage.py importar_itens planilha.csv
+#   python manage.py importar_itens legado.ndjson --lote 5000 --relatorio erros.csv
+# ============================================================
+
+import csv
+import sys
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from itens import importer
+
+
+class Command(BaseCommand):
+    help = "Importa itens de um arquivo CSV, NDJSON ou JSON, gravando em lotes."
+
+    def add_arguments(self, parser):
+        parser.add_argument("arquivo", help='Caminho do arquivo ("-" para a entrada padrão).')
+        parser.add_argument(
+            "--formato",
+            choices=importer.FORMATS,
+            help="Formato do arquivo (padrão: pela extensão).",
+        )
+        parser.add_argument(
+            "--lote",
+            type=int,
+            default=importer.DEFAULT_BATCH_SIZE,
+            help=f"Itens gravados por transação (padrão: {importer.DEFAULT_BATCH_SIZE}).",
+        )
+        parser.add_argument(
+            "--relatorio",
+            help="Grava as linhas recusadas neste CSV (linha, erro).",
+        )
+
+    def handle(self, *args, **options):
+        if options["lote"] < 1:
+            raise CommandError("Tamanho de lote inválido")
+
+        caminho = options["arquivo"]
+        try:
+            formato = options["formato"] or importer.detect_format(caminho)
+        except ValueError as exc:
+            raise CommandError(str(exc))
+
+        inicio = time.perf_counter()
+        try:
+            if caminho == "-":
+                report = self._import(sys.stdin.buffer, formato, options["lote"])
+            else:
+                with open(caminho, "rb") as arquivo:
+                    report = self._import(arquivo, formato, options["lote"])
+        except OSError as exc:
+            raise CommandError(f"Não consegui abrir o arquivo: {exc}")
+        duracao = time.perf_counter() - inicio
+
+        erros = report["erros"]
+        if options["relatorio"]:
+            with open(options["relatorio"], "w", newline="", encoding="utf-8") as saida:
+                writer = csv.DictWriter(saida, fieldnames=["linha", "erro"])
+                writer.writeheader()
+                writer.writerows(erros)
+        else:
+            for erro in erros:
+                self.stderr.write(f"linha {erro['linha']}: {erro['erro']}")
+
+        por_segundo = report["linhas"] / duracao if duracao else 0
+        self.stdout.write(self.style.SUCCESS(
+            f"{report['importados']} itens importados de {report['linhas']} linhas "
+            f"({len(erros)} recusadas) em {duracao:.2f}s ({por_segundo:.0f} linhas/s)."
+        ))
+
+    def _import(self, arquivo, formato, lote):
+        try:
+            return importer.import_items(importer.read_rows(arquivo, formato), lote)
+        except UnicodeDecodeError:
+            raise CommandError("O arquivo precisa estar em UTF-8")
+        except ValueError as exc:
+            raise CommandError(str(exc))
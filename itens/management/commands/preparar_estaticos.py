@@ -0,0 +1,121 @@
+# ============================================================
+# Achados e Perdidos - UnDF
+# Arquivo: management/commands/preparar_estaticos.py
+#
+# Passo de build dos arquivos estáticos: roda o collectstatic com o
+# OptimizedStaticFilesStorage (minificação, WebP, hash, .gz/.br; ver
+# itens/assets.py) e mostra quanto cada arquivo encolheu.
+#
+#   python manage.py preparar_estaticos
+#   python manage.py preparar_estaticos --json
+#
+# "original" é o arquivo da pasta static/ do app; "transferido" é o
+# menor que o WhiteNoise pode mandar (Brotli, gzip ou o próprio arquivo).
+# O relatório mostra só os arquivos do app (itens/), não os do admin.
+# ============================================================
+
+import json
+import os
+
+from django.contrib.staticfiles import finders
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+
+from itens import assets
+
+
+PREFIX = "itens/"
+
+class Command(BaseCommand):
+    help = "Gera os estáticos de produção (minificados, com hash, WebP, gzip e Brotli) e mostra a economia."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--json", action="store_true", help="Relatório em JSON.")
+
+    def handle(self, *args, **options):
+        storage = staticfiles_storage
+        if not isinstance(storage, assets.OptimizedStaticFilesStorage):
+            raise CommandError('STORAGES["staticfiles"] precisa ser itens.assets.OptimizedStaticFilesStorage.')
+
+        faltando = [
+            nome
+            for nome, modulo in (("rcssmin", assets.rcssmin), ("rjsmin", assets.rjsmin), ("Pillow", assets.Image))
+            if modulo is None
+        ]
+        try:
+            import brotli  # noqa: F401 (o WhiteNoise usa se estiver instalado)
+        except ImportError:
+            faltando.append("Brotli")
+
+        call_command("collectstatic", interactive=False, clear=True, verbosity=0)
+
+        report = self._report(storage)
+        report["bibliotecas_faltando"] = faltando
+        if options["json"]:
+            self.stdout.write(json.dumps(report, indent=2, ensure_ascii=False))
+            return
+
+        for row in report["arquivos"]:
+            self.stdout.write(
+                f"{row['nome']:40} {row['original']:9} -> {row['transferido']:8} bytes "
+                f"({row['codificacao']}, -{row['reducao_pct']:.0f}%)"
+            )
+        for row in report["webp"]:
+            self.stdout.write(f"{row['nome']:40} {'':9}    {row['bytes']:8} bytes (WebP)")
+        totais = report["totais"]
+        self.stdout.write(self.style.SUCCESS(
+            f"Total: {totais['original']} -> {totais['transferido']} bytes (-{totais['reducao_pct']:.0f}%); "
+            f"{totais['imutaveis']} arquivos com hash, servidos como immutable "
+            f"(visita repetida não faz requisição por eles)."
+        ))
+        if faltando:
+            self.stdout.write(self.style.WARNING(
+                f"Passos pulados por falta de biblioteca: {', '.join(faltando)} (ver requirements.txt)."
+            ))
+
+    def _report(self, storage):
+        files = sorted(
+            (name, hashed) for name, hashed in storage.hashed_files.items() if name.startswith(PREFIX)
+        )
+        rows = []
+        for name, hashed_name in files:
+            source = finders.find(name)
+            hashed_path = storage.path(hashed_name)
+            if not source or not os.path.exists(hashed_path):
+                continue
+            candidates = [("identidade", os.path.getsize(hashed_path))]
+            for suffix, encoding in ((".br", "br"), (".gz", "gzip")):
+                if os.path.exists(hashed_path + suffix):
+                    candidates.append((encoding, os.path.getsize(hashed_path + suffix)))
+            encoding, size = min(candidates, key=lambda candidate: candidate[1])
+            original = os.path.getsize(source)
+            rows.append({
+                "nome": name,
+                "arquivo": hashed_name,
+                "original": original,
+                "transferido": size,
+                "codificacao": encoding,
+                "reducao_pct": 100 * (1 - size / original) if original else 0.0,
+            })
+
+        # variantes WebP não têm "original" na pasta do app; entram
+        # como alternativa à imagem de origem
+        webp = [
+            {"nome": name, "arquivo": hashed, "bytes": os.path.getsize(storage.path(hashed))}
+            for name, hashed in files
+            if name.endswith(".webp") and not finders.find(name)
+        ]
+
+        original = sum(row["original"] for row in rows)
+        transferido = sum(row["transferido"] for row in rows)
+        return {
+            "arquivos": rows,
+            "webp": webp,
+            "totais": {
+                "original": original,
+                "transferido": transferido,
+                "reducao_pct": 100 * (1 - transferido / original) if original else 0.0,
+                "imutaveis": len(files),
+            },
+        }
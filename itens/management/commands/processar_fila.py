@@ -0,0 +1,83 @@
+# ============================================================
+# Achados e Perdidos - UnDF
+# Arquivo: management/commands/processar_fila.py
+#
+# Worker da fila de reivindicações (ver itens/fila.py): lê o diário e
+# grava as reivindicações no banco em lotes, uma transação por lote.
+#
+#   ITENS_FILA_REIVINDICACOES=/var/lib/achados/fila.sqlite3 \
+#       python manage.py processar_fila
+#   python manage.py processar_fila --uma-vez   # esvazia e sai (cron)
+#
+# Roda um por servidor (ao lado do gunicorn/uvicorn, no mesmo disco do
+# diário). Dois ao mesmo tempo não duplicam nada (o ticket é único na
+# Reivindicacao), só disputam os mesmos lotes.
+# ============================================================
+
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import close_old_connections
+
+from itens import fila
+
+
+class Command(BaseCommand):
+    help = "Grava no banco, em lotes, as reivindicações da fila (ITENS_FILA_REIVINDICACOES)."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--lote",
+            type=int,
+            default=fila.BATCH_SIZE,
+            help=f"Reivindicações por transação (padrão: {fila.BATCH_SIZE}).",
+        )
+        parser.add_argument(
+            "--intervalo",
+            type=float,
+            default=0.5,
+            help="Segundos de espera quando a fila está vazia (padrão: 0.5).",
+        )
+        parser.add_argument(
+            "--manter-horas",
+            type=float,
+            default=24.0,
+            help="Por quanto tempo os tickets processados continuam consultáveis (padrão: 24).",
+        )
+        parser.add_argument("--uma-vez", action="store_true", help="Esvazia a fila e sai.")
+
+    def handle(self, *args, **options):
+        if not fila.ativa():
+            raise CommandError("Fila desligada: defina ITENS_FILA_REIVINDICACOES.")
+        if options["lote"] < 1 or options["intervalo"] < 0:
+            raise CommandError("--lote e --intervalo inválidos.")
+
+        total = {"registradas": 0, "erros": 0}
+        ultima_limpeza = 0.0
+        try:
+            while True:
+                close_old_connections()
+                inicio = time.perf_counter()
+                result = fila.processar(options["lote"])
+                if result["registradas"] or result["erros"]:
+                    for key in total:
+                        total[key] += result[key]
+                    self.stdout.write(
+                        f"{result['registradas']} registradas, {result['erros']} com erro "
+                        f"em {(time.perf_counter() - inicio) * 1000:.0f}ms"
+                    )
+                    continue
+
+                # fila vazia
+                if time.time() - ultima_limpeza > 60:
+                    fila.limpar(options["manter_horas"])
+                    ultima_limpeza = time.time()
+                if options["uma_vez"]:
+                    break
+                time.sleep(options["intervalo"])
+        except KeyboardInterrupt:
+            pass
+
+        self.stdout.write(self.style.SUCCESS(
+            f"{total['registradas']} reivindicações registradas, {total['erros']} com erro."
+        ))
@@ -0,0 +1,55 @@
+# ============================================================
+# Achados e Perdidos - UnDF
+# Arquivo: management/commands/recontar_reivindicacoes.py
+#
+# Recalcula os contadores de reivindicações dos itens
+# (reivindicacoes_pendentes/aprovadas/recusadas) a partir da tabela de
+# reivindicações. Só os itens com contador errado são gravados (e
+# ganham revisão nova, para o painel receber a correção).
+#
+#   python manage.py recontar_reivindicacoes
+#   python manage.py recontar_reivindicacoes --simular
+# ============================================================
+
+from django.core.management.base import BaseCommand
+from django.db.models import F
+
+from itens.models import Item
+
+
+# Itens corrigidos por UPDATE.
+BATCH_SIZE = 500
+
+
+class Command(BaseCommand):
+    help = "Recalcula os contadores de reivindicações de cada item."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--simular",
+            action="store_true",
+            help="Só mostra quantos itens estão com contador errado.",
+        )
+
+    def handle(self, *args, **options):
+        reais = Item.contagens_reais()
+        apelidos = {f"real_{field}": expression for field, expression in reais.items()}
+
+        # NOT (pendentes = real AND aprovadas = real AND recusadas = real)
+        errados = (
+            Item.objects
+            .annotate(**apelidos)
+            .exclude(**{field: F(f"real_{field}") for field in reais})
+            .values_list("pk", flat=True)
+        )
+        ids = list(errados)
+
+        if options["simular"]:
+            self.stdout.write(f"{len(ids)} itens com contadores errados.")
+            return
+
+        for inicio in range(0, len(ids), BATCH_SIZE):
+            lote = ids[inicio:inicio + BATCH_SIZE]
+            Item.objects.filter(pk__in=lote).update_revisado(**Item.contagens_reais())
+
+        self.stdout.write(self.style.SUCCESS(f"{len(ids)} itens corrigidos."))
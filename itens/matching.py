@@ -0,0 +1,385 @@
+# ============================================================
+# Achados e Perdidos - UnDF
+# Arquivo: matching.py
+#
+# Sugestões de itens para uma descrição livre ("perdi um celular preto
+# com capinha no RU"), com ranking por TF-IDF.
+#
+# A busca do search.py exige todas as palavras; aqui qualquer palavra
+# em comum conta, pesada pela raridade (IDF) e pelo campo onde aparece
+# (nome pesa mais que descrição). Uso:
+# - público: sugestões antes de reivindicar (item_suggestions);
+# - painel: cada reivindicação pendente contra todos os itens em
+#   estoque, para achar reivindicação feita no item errado
+#   (internal_claims_matches).
+#
+# O índice fica em memória, por processo, como arrays do NumPy:
+# - para cada termo, a lista de itens que o contêm e o peso TF-IDF
+#   (já normalizado: o score final é o cosseno entre os textos);
+# - pontuar uma consulta é um np.bincount sobre as listas dos termos
+#   dela, sem percorrer item por item.
+# Ele é remontado quando a versão de "itens" muda (ver cache.py), no
+# máximo a cada MATCH_REBUILD_SECONDS. Entre uma remontagem e outra o
+# resultado é conferido no banco (status/aprovação atuais).
+#
+# O NumPy é opcional: sem ele, available() é False e as views
+# respondem 503.
+# ============================================================
+
+import math
+import re
+import threading
+import time
+import unicodedata
+from collections import Counter
+from functools import lru_cache
+
+from django.conf import settings
+
+from . import cache
+from .models import Item, Reivindicacao
+from .search import STOPWORDS
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+
+# Peso de cada campo na contagem de termos do item.
+FIELD_WEIGHTS = {"nome": 3.0, "categoria": 2.0, "local_encontrado": 1.5, "descricao": 1.0}
+
+# Bônus somados ao cosseno quando a categoria / o local informados
+# batem com os do item.
+CATEGORY_BOOST = 0.15
+LOCATION_BOOST = 0.10
+
+# Reivindicações pontuadas por vez no modo em lote (cada bloco ocupa
+# bloco x itens floats na memória).
+CLAIM_CHUNK = 32
+
+# "Outro item" só é sugerido quando passa o item atual por essa margem.
+BETTER_MARGIN = 0.05
+
+
+def available() -> bool:
+    return np is not None
+
+
+def _rebuild_seconds() -> float:
+    return getattr(settings, "ITENS_MATCH_REBUILD_SECONDS", 60)
+
+
+def _fold(text: str) -> str:
+    text = (text or "").lower()
+    if text.isascii():
+        return text
+    text = unicodedata.normalize("NFKD", text)
+    return "".join(char for char in text if not unicodedata.combining(char))
+
+
+@lru_cache(maxsize=100_000)
+def _term(word: str):
+    # por palavra, com cache: o vocabulário se repete muito entre itens
+    word = _fold(word)
+    if len(word) < 2 or word in STOPWORDS:
+        return None
+    if len(word) > 3 and word.endswith("s"):
+        word = word[:-1]
+    return word
+
+
+def terms(text: str) -> list:
+    """
+    Termos de um texto: sem acento, sem stopwords e sem o "s" do plural
+    ("Óculos escuros" -> ["oculo", "escuro"]).
+    """
+    result = []
+    for word in re.findall(r"\w+", (text or "").lower()):
+        term = _term(word)
+        if term is not None:
+            result.append(term)
+    return result
+
+
+class MatchIndex:
+    """
+    Índice invertido TF-IDF dos itens "Em estoque".
+    """
+
+    def __init__(self, rows, version=None):
+        """
+        rows: (id, nome, descricao, categoria, local_encontrado,
+        data_encontrado, aprovado) de cada item.
+        """
+        self.version = version
+        self.built_at = time.monotonic()
+
+        ids, dates, approved, categories, locations, bags = [], [], [], [], [], []
+        df = Counter()
+        for item_id, nome, descricao, categoria, local, data, aprovado in rows:
+            bag = Counter()
+            for field, text in (("nome", nome), ("descricao", descricao),
+                                ("categoria", categoria), ("local_encontrado", local)):
+                for term in terms(text):
+                    bag[term] += FIELD_WEIGHTS[field]
+            ids.append(item_id)
+            dates.append(data.toordinal())
+            approved.append(aprovado)
+            categories.append(_fold(categoria).strip())
+            locations.append(_fold(local).strip())
+            bags.append(bag)
+            df.update(bag.keys())
+
+        n = len(ids)
+        self.vocabulary = {term: col for col, term in enumerate(sorted(df))}
+        self.idf = np.array(
+            [math.log((1 + n) / (1 + df[term])) + 1 for term in sorted(df)], dtype=np.float32
+        )
+        self.ids = np.array(ids, dtype=np.int64)
+        self.position = {item_id: pos for pos, item_id in enumerate(ids)}
+        self.dates = np.array(dates, dtype=np.int32)
+        self.approved = np.array(approved, dtype=bool)
+        self.category_codes, self.categories = _encode(categories)
+        self.location_codes, self.locations = _encode(locations)
+
+        # postings (termo, item, peso), ordenados por termo
+        cols, items, raw = [], [], []
+        for pos, bag in enumerate(bags):
+            cols.extend(self.vocabulary[term] for term in bag)
+            items.extend([pos] * len(bag))
+            raw.extend(bag.values())
+        cols = np.array(cols, dtype=np.int32)
+        items = np.array(items, dtype=np.int32)
+        weights = np.array(raw, dtype=np.float32) * self.idf[cols]
+        # cada item com norma 1: o produto vira o cosseno
+        norms = np.sqrt(np.bincount(items, weights=weights * weights, minlength=n)).astype(np.float32)
+        weights /= norms[items]
+
+        order = np.argsort(cols, kind="stable")
+        self.post_items = items[order]
+        self.post_weights = weights[order]
+        self.term_ptr = np.zeros(len(self.vocabulary) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(cols, minlength=len(self.vocabulary)), out=self.term_ptr[1:])
+
+    def __len__(self):
+        return len(self.ids)
+
+    def query_vector(self, text: str):
+        """
+        (colunas, pesos) normalizados de um texto de consulta; termos
+        que não existem em nenhum item são ignorados.
+        """
+        bag = Counter(term for term in terms(text) if term in self.vocabulary)
+        if not bag:
+            return np.zeros(0, np.int32), np.zeros(0, np.float32)
+        cols = np.array([self.vocabulary[term] for term in bag], dtype=np.int32)
+        weights = np.array(list(bag.values()), dtype=np.float32) * self.idf[cols]
+        return cols, weights / np.linalg.norm(weights)
+
+    def _postings(self, cols, weights):
+        """
+        Junta as listas dos termos: (posições dos itens, contribuição).
+        """
+        starts, ends = self.term_ptr[cols], self.term_ptr[cols + 1]
+        lengths = ends - starts
+        if not lengths.sum():
+            return np.zeros(0, np.int64), np.zeros(0, np.float32)
+        # índices de todas as postings dos termos, sem laço em Python
+        offsets = np.repeat(starts - np.cumsum(lengths) + lengths, lengths)
+        index = np.arange(lengths.sum()) + offsets
+        return self.post_items[index], self.post_weights[index] * np.repeat(weights, lengths)
+
+    def scores(self, text: str, categoria: str = "", local: str = ""):
+        """
+        Score de todos os itens do índice para uma consulta.
+        """
+        cols, weights = self.query_vector(text)
+        positions, contributions = self._postings(cols, weights)
+        scores = np.bincount(positions, weights=contributions, minlength=len(self)).astype(np.float32)
+        self._boost(scores, categoria, local)
+        return scores
+
+    def _boost(self, scores, categoria, local):
+        code = self.categories.get(_fold(categoria).strip()) if categoria else None
+        if code is not None:
+            scores[self.category_codes == code] += CATEGORY_BOOST
+        local = _fold(local).strip() if local else ""
+        if local:
+            # "bloco" vale para "Bloco A", "Bloco B"...
+            codes = [code for name, code in self.locations.items() if local in name]
+            if codes:
+                scores[np.isin(self.location_codes, codes)] += LOCATION_BOOST
+
+    def top(self, scores, k: int, mask=None) -> list:
+        """
+        [(id do item, score)] dos k melhores com score > 0.
+        """
+        if mask is not None:
+            scores = np.where(mask, scores, 0)
+        candidates = np.flatnonzero(scores > 0)
+        if len(candidates) > k:
+            best = np.argpartition(-scores[candidates], k - 1)[:k]
+            candidates = candidates[best]
+        order = candidates[np.argsort(-scores[candidates], kind="stable")]
+        return [(int(self.ids[pos]), float(scores[pos])) for pos in order]
+
+    def date_mask(self, date_from=None, date_to=None):
+        if date_from is None and date_to is None:
+            return None
+        mask = np.ones(len(self), dtype=bool)
+        if date_from is not None:
+            mask &= self.dates >= date_from.toordinal()
+        if date_to is not None:
+            mask &= self.dates <= date_to.toordinal()
+        return mask
+
+    def score_claims(self, claims, k: int) -> list:
+        """
+        Pontua várias reivindicações contra todos os itens do índice.
+
+        claims: [(id da reivindicação, id do item reivindicado, texto)].
+        Devolve, na mesma ordem, (score do item reivindicado ou None,
+        [(id do item, score)] dos k melhores).
+
+        Cada bloco de CLAIM_CHUNK reivindicações vira um único bincount
+        (linha = reivindicação, coluna = item) e um argpartition.
+        """
+        results = []
+        n = len(self)
+        for start in range(0, len(claims), CLAIM_CHUNK):
+            chunk = claims[start:start + CLAIM_CHUNK]
+            all_positions, all_contributions = [], []
+            for row, (_, _, text) in enumerate(chunk):
+                positions, contributions = self._postings(*self.query_vector(text))
+                all_positions.append(positions + row * n)
+                all_contributions.append(contributions)
+            block = np.bincount(
+                np.concatenate(all_positions),
+                weights=np.concatenate(all_contributions),
+                minlength=len(chunk) * n,
+            ).reshape(len(chunk), n)
+
+            # negativo no próprio bloco (sem cópia): argpartition pelos
+            # k primeiros é bem mais rápido que pelos k últimos
+            np.negative(block, out=block)
+            kk = min(k, n)
+            if kk:
+                best = np.argpartition(block, kk - 1, axis=1)[:, :kk]
+                best_scores = np.take_along_axis(block, best, axis=1)
+                order = np.argsort(best_scores, axis=1, kind="stable")
+                best = np.take_along_axis(best, order, axis=1)
+                best_scores = -np.take_along_axis(best_scores, order, axis=1)
+            for row, (_, item_id, _) in enumerate(chunk):
+                pos = self.position.get(item_id)
+                current = -float(block[row, pos]) if pos is not None else None
+                top = []
+                if kk:
+                    top = [
+                        (int(self.ids[col]), float(score))
+                        for col, score in zip(best[row], best_scores[row])
+                        if score > 0
+                    ]
+                results.append((current, top))
+        return results
+
+
+def _encode(values):
+    """
+    Valores de texto -> (array de códigos, {valor: código}).
+    """
+    codes = {}
+    array = np.array([codes.setdefault(value, len(codes)) for value in values], dtype=np.int32)
+    return array, codes
+
+
+# ----------------- Índice do processo -----------------
+
+
+_index = None
+_lock = threading.Lock()
+
+
+def build_index(version=None) -> MatchIndex:
+    rows = (
+        Item.objects
+        .filter(status="Em estoque")
+        .values_list("id", "nome", "descricao", "categoria", "local_encontrado", "data_encontrado", "aprovado")
+        .iterator(chunk_size=5000)
+    )
+    return MatchIndex(rows, version)
+
+
+def get_index() -> MatchIndex:
+    """
+    Índice atual; remonta se os itens mudaram e o índice já tem mais de
+    MATCH_REBUILD_SECONDS (ou se ainda não existe).
+    """
+    global _index
+    version = cache.get_version(cache.ITENS)
+    index = _index
+    if index is not None and (
+        index.version == version or time.monotonic() - index.built_at < _rebuild_seconds()
+    ):
+        return index
+    with _lock:
+        if _index is index:  # outra thread pode ter remontado enquanto eu esperava
+            _index = build_index(version)
+        return _index
+
+
+def reset() -> None:
+    global _index
+    _index = None
+
+
+# ----------------- Consultas -----------------
+
+
+def suggest_items(text: str, categoria: str = "", local: str = "",
+                  date_from=None, date_to=None, k: int = 10, public: bool = True) -> list:
+    """
+    [(Item, score)] dos k itens em estoque mais parecidos com a descrição.
+    Com public=True só entram os aprovados (listagem pública).
+    """
+    index = get_index()
+    mask = index.date_mask(date_from, date_to)
+    if public:
+        mask = index.approved if mask is None else mask & index.approved
+    # peço a mais: o índice pode estar um pouco atrasado em relação ao banco
+    ranked = index.top(index.scores(text, categoria, local), k * 2, mask)
+
+    itens = Item.objects.filter(pk__in=[item_id for item_id, _ in ranked], status="Em estoque")
+    if public:
+        itens = itens.filter(aprovado=True)
+    by_id = {item.pk: item for item in itens}
+    return [(by_id[item_id], score) for item_id, score in ranked if item_id in by_id][:k]
+
+
+def match_pending_claims(k: int = 3) -> list:
+    """
+    Cada reivindicação pendente (detalhes) contra todos os itens em
+    estoque. Devolve dicts com o score do item reivindicado, os k
+    melhores candidatos e "sugerir_outro" quando algum outro item passa
+    o atual por BETTER_MARGIN.
+    """
+    index = get_index()
+    claims = list(
+        Reivindicacao.objects
+        .filter(status="Pendente")
+        .order_by("id")
+        .values_list("id", "item_id", "detalhes")
+    )
+    results = []
+    for (claim_id, item_id, _), (current, top) in zip(claims, index.score_claims(claims, k)):
+        best_other = next(((other, score) for other, score in top if other != item_id), None)
+        results.append({
+            "id": claim_id,
+            "item_id": item_id,
+            "score_atual": current,
+            "candidatos": [{"item_id": other, "score": round(score, 4)} for other, score in top],
+            "sugerir_outro": bool(
+                best_other and best_other[1] > (current or 0) + BETTER_MARGIN
+            ),
+        })
+    return results
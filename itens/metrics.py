@@ -0,0 +1,215 @@
+# ============================================================
+# Achados e Perdidos - UnDF
+# Arquivo: metrics.py
+#
+# Métricas por view: tempo da requisição, quantidade de consultas e
+# tempo gasto no banco, agregados em histogramas por nome de URL
+# ("item_list_create", "internal_claims_list"...). Saem em formato
+# Prometheus em /api/interno/metricas/.
+#
+# Como medir as consultas sem custo quando ninguém está olhando:
+# - todo banco recebe, ao conectar, um execute_wrapper (ver
+#   instrument_connection, ligado no signals.py) que soma tempo e
+#   quantidade num acumulador guardado numa ContextVar;
+# - o MetricsMiddleware cria o acumulador no começo da requisição e
+#   registra o resultado no fim. Fora de requisições (comandos) a
+#   ContextVar está vazia e o wrapper só repassa a consulta.
+# A ContextVar acompanha o sync_to_async, então consultas feitas em
+# threads por views async também entram na conta.
+#
+# Os números são por processo (cada worker do gunicorn tem os seus).
+# ============================================================
+
+import threading
+import time
+from bisect import bisect_left
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+
+
+# Limites dos buckets (segundos) para tempo da requisição e do banco.
+TIME_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Limites dos buckets para quantidade de consultas por requisição.
+QUERY_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+
+# Nome usado quando a URL não bateu com nenhuma rota (404 etc.), para
+# não criar uma série por endereço digitado.
+UNRESOLVED = "<nao_resolvida>"
+
+_request_stats = ContextVar("itens_request_stats", default=None)
+
+
+class _Stats:
+    __slots__ = ("queries", "db_time")
+
+    def __init__(self):
+        self.queries = 0
+        self.db_time = 0.0
+
+
+class Histogram:
+    """
+    Histograma cumulativo no estilo Prometheus, uma série por conjunto
+    de labels.
+    """
+
+    def __init__(self, name, help_text, buckets):
+        self.name = name
+        self.help_text = help_text
+        self.buckets = tuple(buckets)
+        self.series = {}  # labels -> [contagem por bucket..., +Inf], soma
+
+    def observe(self, labels, value):
+        series = self.series.get(labels)
+        if series is None:
+            series = self.series[labels] = [[0] * (len(self.buckets) + 1), 0]
+        series[0][bisect_left(self.buckets, value)] += 1
+        series[1] += value
+
+    def render(self, label_names):
+        yield f"# HELP {self.name} {self.help_text}"
+        yield f"# TYPE {self.name} histogram"
+        for labels, (counts, total) in sorted(self.series.items()):
+            base = ",".join(f'{name}="{_escape(value)}"' for name, value in zip(label_names, labels))
+            cumulative = 0
+            for bound, count in zip(self.buckets + ("+Inf",), counts):
+                cumulative += count
+                yield f'{self.name}_bucket{{{base},le="{bound}"}} {cumulative}'
+            yield f"{self.name}_sum{{{base}}} {total}"
+            yield f"{self.name}_count{{{base}}} {cumulative}"
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+class Registry:
+    """
+    Guarda os histogramas das requisições deste processo.
+    """
+
+    LABELS = ("view", "method")
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.duration = Histogram(
+            "itens_http_request_duration_seconds",
+            "Tempo de resposta da view (até devolver a resposta).",
+            TIME_BUCKETS,
+        )
+        self.db_time = Histogram(
+            "itens_db_query_duration_seconds",
+            "Tempo gasto em consultas ao banco por requisição.",
+            TIME_BUCKETS,
+        )
+        self.queries = Histogram(
+            "itens_db_queries_per_request",
+            "Quantidade de consultas ao banco por requisição.",
+            QUERY_BUCKETS,
+        )
+        self.responses = {}  # (view, method, status) -> total
+
+    def record(self, view, method, status, duration, stats):
+        labels = (view, method)
+        with self._lock:
+            self.duration.observe(labels, duration)
+            self.db_time.observe(labels, stats.db_time)
+            self.queries.observe(labels, stats.queries)
+            key = (view, method, str(status))
+            self.responses[key] = self.responses.get(key, 0) + 1
+
+    def render(self) -> str:
+        with self._lock:
+            lines = []
+            for histogram in (self.duration, self.db_time, self.queries):
+                lines.extend(histogram.render(self.LABELS))
+            lines.append("# HELP itens_http_responses_total Respostas por view e status HTTP.")
+            lines.append("# TYPE itens_http_responses_total counter")
+            for (view, method, status), total in sorted(self.responses.items()):
+                lines.append(
+                    f'itens_http_responses_total{{view="{_escape(view)}",'
+                    f'method="{_escape(method)}",status="{status}"}} {total}'
+                )
+        return "\n".join(lines) + "\n"
+
+    def reset(self):
+        with self._lock:
+            for histogram in (self.duration, self.db_time, self.queries):
+                histogram.series.clear()
+            self.responses.clear()
+
+
+registry = Registry()
+
+
+# ----------------- Consultas ao banco -----------------
+
+
+def _query_timer(execute, sql, params, many, context):
+    stats = _request_stats.get()
+    if stats is None:
+        return execute(sql, params, many, context)
+    inicio = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        stats.db_time += time.perf_counter() - inicio
+        stats.queries += 1
+
+
+def instrument_connection(sender, connection, **kwargs):
+    """
+    Receiver de connection_created: põe o medidor de consultas na
+    conexão nova (uma vez só, mesmo se ela reconectar).
+    """
+    if _query_timer not in connection.execute_wrappers:
+        connection.execute_wrappers.append(_query_timer)
+
+
+# ----------------- Middleware -----------------
+
+
+class MetricsMiddleware:
+    """
+    Mede cada requisição e registra no `registry` pelo nome da rota.
+    Funciona com views síncronas e assíncronas.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        stats = _Stats()
+        token = _request_stats.set(stats)
+        inicio = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            _request_stats.reset(token)
+        self._record(request, response, time.perf_counter() - inicio, stats)
+        return response
+
+    async def __acall__(self, request):
+        stats = _Stats()
+        token = _request_stats.set(stats)
+        inicio = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            _request_stats.reset(token)
+        self._record(request, response, time.perf_counter() - inicio, stats)
+        return response
+
+    def _record(self, request, response, duration, stats):
+        match = getattr(request, "resolver_match", None)
+        view = match.url_name if match and match.url_name else UNRESOLVED
+        registry.record(view, request.method, response.status_code, duration, stats)
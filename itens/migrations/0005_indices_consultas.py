@@ -0,0 +1,25 @@
+# Generated by Django 5.2.7 on 2026-10-17 18:08
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('itens', '0004_alter_item_options_alter_reivindicacao_options_and_more'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='item',
+            index=models.Index(condition=models.Q(('aprovado', True), ('status', 'Em estoque')), fields=['-data_encontrado', '-data_criacao', '-id'], name='item_publico_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='item',
+            index=models.Index(fields=['-data_encontrado', '-data_criacao'], name='item_data_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='reivindicacao',
+            index=models.Index(fields=['-data_envio'], name='reivindicacao_envio_idx'),
+        ),
+    ]
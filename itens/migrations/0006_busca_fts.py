@@ -0,0 +1,51 @@
+from django.db import migrations
+
+
+# Tabela virtual FTS5 usada por itens/search.py. Só existe no SQLite;
+# nos outros bancos a busca usa icontains e esta migração não faz nada.
+FTS_TABLE = "itens_item_fts"
+
+
+def create_fts_table(apps, schema_editor):
+    connection = schema_editor.connection
+    if connection.vendor != "sqlite":
+        return
+
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT sqlite_compileoption_used('ENABLE_FTS5')")
+        if not cursor.fetchone()[0]:
+            return
+
+        # remove_diacritics 2: "cartao" encontra "Cartão".
+        # prefix '2 3': índices extras para buscas por prefixo curtas.
+        cursor.execute(
+            f"CREATE VIRTUAL TABLE {FTS_TABLE} USING fts5("
+            "nome, descricao, categoria, local_encontrado, "
+            "tokenize = 'unicode61 remove_diacritics 2', "
+            "prefix = '2 3')"
+        )
+        cursor.execute(
+            f"INSERT INTO {FTS_TABLE} "
+            "(rowid, nome, descricao, categoria, local_encontrado) "
+            "SELECT id, nome, COALESCE(descricao, ''), COALESCE(categoria, ''), "
+            "COALESCE(local_encontrado, '') FROM itens_item"
+        )
+
+
+def drop_fts_table(apps, schema_editor):
+    connection = schema_editor.connection
+    if connection.vendor != "sqlite":
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(f"DROP TABLE IF EXISTS {FTS_TABLE}")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('itens', '0005_indices_consultas'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_fts_table, drop_fts_table),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 5.2.7 on 2026-10-17 18:09
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('itens', '0006_busca_fts'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='VersaoDados',
+            fields=[
+                ('nome', models.CharField(max_length=30, primary_key=True, serialize=False)),
+                ('versao', models.PositiveBigIntegerField(default=0)),
+                ('atualizado_em', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 5.2.7 on 2026-10-17 18:11
+
+from django.db import migrations, models
+
+
+def fill_totals(apps, schema_editor):
+    # Contadores começam com o total atual de cada tabela; daqui em
+    # diante os sinais de inclusão/exclusão mantêm o número.
+    VersaoDados = apps.get_model('itens', 'VersaoDados')
+    for nome, model_name in (('itens', 'Item'), ('reivindicacoes', 'Reivindicacao')):
+        model = apps.get_model('itens', model_name)
+        VersaoDados.objects.update_or_create(
+            nome=nome, defaults={'total': model.objects.count()}
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('itens', '0007_versao_dados'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='versaodados',
+            name='total',
+            field=models.BigIntegerField(default=0, help_text='Quantidade de linhas, mantida a cada inclusão/exclusão.'),
+        ),
+        migrations.RunPython(fill_totals, migrations.RunPython.noop),
+    ]
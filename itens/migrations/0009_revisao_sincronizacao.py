@@ -0,0 +1,46 @@
+# Generated by Django 5.2.7 on 2026-10-17 18:13
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('itens', '0008_versao_dados_total'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='item',
+            name='atualizado_em',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AddField(
+            model_name='item',
+            name='revisao',
+            field=models.PositiveBigIntegerField(db_index=True, default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='reivindicacao',
+            name='atualizado_em',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AddField(
+            model_name='reivindicacao',
+            name='revisao',
+            field=models.PositiveBigIntegerField(db_index=True, default=0, editable=False),
+        ),
+        migrations.CreateModel(
+            name='Remocao',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('conjunto', models.CharField(max_length=30)),
+                ('objeto_id', models.BigIntegerField()),
+                ('revisao', models.PositiveBigIntegerField()),
+                ('data', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['conjunto', 'revisao'], name='remocao_revisao_idx')],
+            },
+        ),
+    ]
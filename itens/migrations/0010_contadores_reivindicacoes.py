@@ -0,0 +1,54 @@
+# Generated by Django 5.2.7 on 2026-10-17 18:25
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def fill_counters(apps, schema_editor):
+    # Contagem inicial, num UPDATE só com uma subconsulta por status.
+    Item = apps.get_model('itens', 'Item')
+    Reivindicacao = apps.get_model('itens', 'Reivindicacao')
+    counters = {
+        'Pendente': 'reivindicacoes_pendentes',
+        'Aprovada': 'reivindicacoes_aprovadas',
+        'Recusada': 'reivindicacoes_recusadas',
+    }
+    expressions = {}
+    for status, field in counters.items():
+        count = (
+            Reivindicacao.objects
+            .filter(item=OuterRef('pk'), status=status)
+            .order_by()
+            .values('item')
+            .annotate(total=Count('id'))
+            .values('total')
+        )
+        expressions[field] = Coalesce(Subquery(count), 0)
+    Item.objects.update(**expressions)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('itens', '0009_revisao_sincronizacao'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='item',
+            name='reivindicacoes_aprovadas',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='item',
+            name='reivindicacoes_pendentes',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='item',
+            name='reivindicacoes_recusadas',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(fill_counters, migrations.RunPython.noop),
+    ]
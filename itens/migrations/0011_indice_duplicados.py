@@ -0,0 +1,22 @@
+# Generated by Django 5.2.7 on 2026-10-17 18:48
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('itens', '0010_contadores_reivindicacoes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AssinaturaLSH',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('chave', models.BigIntegerField(db_index=True)),
+                ('item', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='assinaturas_lsh', to='itens.item')),
+            ],
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.7 on 2026-10-17 19:09
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('itens', '0011_indice_duplicados'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='reivindicacao',
+            name='ticket',
+            field=models.CharField(blank=True, editable=False, max_length=32, null=True, unique=True),
+        ),
+    ]
@@ -0,0 +1,38 @@
+# Generated by Django 5.2.7 on 2026-10-17 19:13
+
+from django.db import migrations, models
+from django.db.models import F
+
+
+def fill_devolvido_em(apps, schema_editor):
+    # Para o que já estava devolvido, a melhor aproximação é a última
+    # gravação do item.
+    Item = apps.get_model('itens', 'Item')
+    Item.objects.filter(status='Devolvido').update(devolvido_em=F('atualizado_em'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('itens', '0012_reivindicacao_ticket'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Estatistica',
+            fields=[
+                ('nome', models.CharField(max_length=30, primary_key=True, serialize=False)),
+                ('dados', models.JSONField(default=dict)),
+                ('versao_itens', models.PositiveBigIntegerField(default=0)),
+                ('versao_reivindicacoes', models.PositiveBigIntegerField(default=0)),
+                ('segundos', models.FloatField(default=0, help_text='Tempo do último cálculo.')),
+                ('atualizado_em', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='item',
+            name='devolvido_em',
+            field=models.DateTimeField(blank=True, editable=False, null=True),
+        ),
+        migrations.RunPython(fill_devolvido_em, migrations.RunPython.noop),
+    ]
@@ -1,7 +1,64 @@
-from django.db import models
+from django.db import connection, models, transaction
+from django.db.models import Count, F, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+from django.utils import timezone
 
 
-class Item(models.Model):
+class RevisaoQuerySet(models.QuerySet):
+    def update_revisado(self, revisao=None, **kwargs) -> int:
+        """
+        UPDATE em lote que também grava uma revisão nova (a mesma para
+        todas as linhas do lote), já que QuerySet.update() não passa
+        pelo save(). Devolve quantas linhas mudaram.
+
+        `revisao` é para quem já incrementou a versão do conjunto na
+        mesma transação (ver VersaoDados.incrementar_varios); sem ela,
+        incremento aqui.
+
+        Sem savepoint próprio: dentro de outra transação, um erro aqui
+        já desfaz a transação toda (e são dois comandos a menos).
+        """
+        if revisao is not None:
+            return self.update(revisao=revisao, atualizado_em=timezone.now(), **kwargs)
+        with transaction.atomic(savepoint=False):
+            revisao = VersaoDados.incrementar(self.model.CONJUNTO)
+            return self.update(revisao=revisao, atualizado_em=timezone.now(), **kwargs)
+
+
+class ComRevisao(models.Model):
+    """
+    Base para modelos sincronizados por revisão (painel interno).
+
+    Cada gravação pega a próxima versão do conjunto de dados (tabela
+    VersaoDados) e guarda em `revisao`, na mesma transação. Assim o
+    painel pode pedir só o que mudou depois da última revisão que viu
+    (?since=<revisao>), e o cache/ETag são invalidados de brinde.
+    """
+
+    # nome do conjunto de dados em VersaoDados ("itens", "reivindicacoes")
+    CONJUNTO = None
+
+    revisao = models.PositiveBigIntegerField(default=0, db_index=True, editable=False)
+    atualizado_em = models.DateTimeField(auto_now=True)
+
+    objects = RevisaoQuerySet.as_manager()
+
+    class Meta:
+        abstract = True
+
+    def save(self, *args, **kwargs):
+        update_fields = kwargs.get("update_fields")
+        if update_fields is not None:
+            kwargs["update_fields"] = {*update_fields, "revisao", "atualizado_em"}
+
+        with transaction.atomic():
+            self.revisao = VersaoDados.incrementar(
+                self.CONJUNTO, 1 if self._state.adding else 0
+            )
+            super().save(*args, **kwargs)
+
+
+class Item(ComRevisao):
     STATUS_CHOICES = [
         ("Em estoque", "Em estoque"),
         ("Reivindicado", "Reivindicado"),
@@ -24,11 +81,83 @@ class Item(models.Model):
     )
     data_criacao = models.DateTimeField(auto_now_add=True)
 
+    # Quando o item passou a "Devolvido" (None nos outros status). Mantido
+    # pelo save() e pela ação "devolver" em lote; base do tempo até a
+    # devolução nas estatísticas (estatisticas.py).
+    devolvido_em = models.DateTimeField(blank=True, null=True, editable=False)
+
+    # Quantas reivindicações o item tem em cada status, para o painel não
+    # precisar contar na tabela de reivindicações a cada listagem.
+    # Mantidos com F() na mesma transação da reivindicação: pelos sinais
+    # (save/delete, ver signals.py) e, nos caminhos que usam update() ou
+    # bulk_create, por quem grava (services.py, fila.py). Mudar só o
+    # contador não dá revisão nova ao item (ver services.ajustar_contadores).
+    # `manage.py recontar_reivindicacoes` corrige se algo escapar (SQL na mão).
+    reivindicacoes_pendentes = models.PositiveIntegerField(default=0, editable=False)
+    reivindicacoes_aprovadas = models.PositiveIntegerField(default=0, editable=False)
+    reivindicacoes_recusadas = models.PositiveIntegerField(default=0, editable=False)
+
+    CONJUNTO = "itens"
+
+    # status da reivindicação -> contador no item
+    CONTADORES = {
+        "Pendente": "reivindicacoes_pendentes",
+        "Aprovada": "reivindicacoes_aprovadas",
+        "Recusada": "reivindicacoes_recusadas",
+    }
+
+    class Meta:
+        indexes = [
+            # Listagem pública (item_list_create): só itens em estoque e
+            # aprovados, na ordem do keyset. Índice parcial = bem menor.
+            models.Index(
+                fields=["-data_encontrado", "-data_criacao", "-id"],
+                condition=models.Q(status="Em estoque", aprovado=True),
+                name="item_publico_idx",
+            ),
+            # Listagem interna (internal_items_list): todos os itens, mesma ordem.
+            models.Index(
+                fields=["-data_encontrado", "-data_criacao"],
+                name="item_data_idx",
+            ),
+        ]
+
     def __str__(self):
         return self.nome
 
+    def save(self, *args, **kwargs):
+        devolvido_em = self.devolvido_em
+        if self.status != "Devolvido":
+            self.devolvido_em = None
+        elif devolvido_em is None:
+            self.devolvido_em = timezone.now()
+
+        update_fields = kwargs.get("update_fields")
+        if update_fields is not None and self.devolvido_em != devolvido_em:
+            kwargs["update_fields"] = {*update_fields, "devolvido_em"}
+        super().save(*args, **kwargs)
+
+    @classmethod
+    def contagens_reais(cls) -> dict:
+        """
+        Contador -> subconsulta com a contagem real na tabela de
+        reivindicações (para recalcular os contadores num UPDATE só).
+        """
+        expressions = {}
+        for status, field in cls.CONTADORES.items():
+            count = (
+                Reivindicacao.objects
+                .filter(item=OuterRef("pk"), status=status)
+                .order_by()
+                .values("item")
+                .annotate(total=Count("id"))
+                .values("total")
+            )
+            expressions[field] = Coalesce(Subquery(count), 0)
+        return expressions
+
 
-class Reivindicacao(models.Model):
+class Reivindicacao(ComRevisao):
     STATUS_CHOICES = [
         ("Pendente", "Pendente"),
         ("Aprovada", "Aprovada"),
@@ -84,5 +213,175 @@ class Reivindicacao(models.Model):
 
     data_envio = models.DateTimeField(auto_now_add=True)
 
+    # ticket da fila de reivindicações (fila.py), quando veio por ela
+    ticket = models.CharField(max_length=32, unique=True, null=True, blank=True, editable=False)
+
+    CONJUNTO = "reivindicacoes"
+
+    class Meta:
+        indexes = [
+            # Listagem interna (internal_claims_list), mais recentes primeiro.
+            models.Index(fields=["-data_envio"], name="reivindicacao_envio_idx"),
+        ]
+
     def __str__(self):
         return f"{self.nome_requerente} - {self.item.nome}"
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # (item, status) como estão no banco, para o sinal saber de qual
+        # contador tirar quando o save() mudar o status (ver signals.py)
+        if "item_id" in instance.__dict__ and "status" in instance.__dict__:
+            instance._contado = (instance.item_id, instance.status)
+        return instance
+
+
+class VersaoDados(models.Model):
+    """
+    Contador de alterações de um conjunto de dados ("itens",
+    "reivindicacoes"). Toda gravação incrementa a versão; o cache da
+    listagem pública usa a versão na chave, então nunca serve dado velho.
+    O total de linhas fica junto para o ETag não precisar de COUNT(*).
+    """
+
+    nome = models.CharField(max_length=30, primary_key=True)
+    versao = models.PositiveBigIntegerField(default=0)
+    atualizado_em = models.DateTimeField(auto_now=True)
+    total = models.BigIntegerField(
+        default=0,
+        help_text="Quantidade de linhas, mantida a cada inclusão/exclusão.",
+    )
+
+    def __str__(self):
+        return f"{self.nome} v{self.versao}"
+
+    @classmethod
+    def incrementar(cls, nome: str, delta: int = 0) -> int:
+        """
+        Incrementa a versão de um conjunto de dados e devolve o novo valor.
+        `delta` é quanto o total de linhas mudou (+1 inclusão, -1 exclusão).
+
+        No SQLite e no PostgreSQL faço tudo num UPDATE ... RETURNING (uma
+        ida ao banco). Nos outros bancos, UPDATE + SELECT numa transação.
+        Dentro de uma transação, o UPDATE trava a linha do contador até o
+        commit, então as revisões saem na mesma ordem dos commits.
+        """
+        agora = timezone.now()
+
+        if connection.vendor in ("sqlite", "postgresql"):
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    f"UPDATE {cls._meta.db_table} SET versao = versao + 1, "
+                    "total = total + %s, atualizado_em = %s "
+                    "WHERE nome = %s RETURNING versao",
+                    [delta, connection.ops.adapt_datetimefield_value(agora), nome],
+                )
+                row = cursor.fetchone()
+            if row:
+                return row[0]
+        else:
+            with transaction.atomic():
+                updated = cls.objects.filter(nome=nome).update(
+                    versao=F("versao") + 1, total=F("total") + delta, atualizado_em=agora
+                )
+                if updated:
+                    return cls.objects.get(nome=nome).versao
+
+        # contador ainda não existe: crio já com o total real da tabela.
+        # Numa inclusão o INSERT ainda não aconteceu (save e a importação
+        # incrementam antes), então somo o delta; numa exclusão a linha
+        # já saiu (post_delete) e o COUNT já está certo.
+        model = {"itens": Item, "reivindicacoes": Reivindicacao}[nome]
+        total = model.objects.count() + max(delta, 0)
+        versao, created = cls.objects.get_or_create(
+            nome=nome, defaults={"versao": 1, "total": total}
+        )
+        if created:
+            return versao.versao
+        return cls.incrementar(nome, delta)
+
+    @classmethod
+    def incrementar_varios(cls, nomes) -> dict:
+        """
+        Incrementa a versão de vários conjuntos de uma vez (sem mudar o
+        total) e devolve {nome: versão nova}. Para a mudança de status
+        de uma reivindicação, que grava nos dois conjuntos.
+
+        No SQLite é um UPDATE ... RETURNING só: a transação já tem a
+        trava de escrita do banco inteiro, então a ordem das linhas não
+        importa. Nos outros bancos, um incrementar() por conjunto, na
+        ordem dada, para as travas de linha saírem sempre na mesma ordem.
+        """
+        versoes = {}
+        if connection.vendor == "sqlite":
+            agora = connection.ops.adapt_datetimefield_value(timezone.now())
+            placeholders = ", ".join(["%s"] * len(nomes))
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    f"UPDATE {cls._meta.db_table} SET versao = versao + 1, atualizado_em = %s "
+                    f"WHERE nome IN ({placeholders}) RETURNING nome, versao",
+                    [agora, *nomes],
+                )
+                versoes.update(cursor.fetchall())
+        for nome in nomes:
+            if nome not in versoes:
+                versoes[nome] = cls.incrementar(nome)
+        return versoes
+
+
+class Remocao(models.Model):
+    """
+    "Lápide" de uma linha apagada, para a sincronização por revisão
+    saber o que remover (?since=<revisao> nas listas internas).
+    """
+
+    conjunto = models.CharField(max_length=30)
+    objeto_id = models.BigIntegerField()
+    revisao = models.PositiveBigIntegerField()
+    data = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["conjunto", "revisao"], name="remocao_revisao_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.conjunto} #{self.objeto_id} (rev. {self.revisao})"
+
+
+class AssinaturaLSH(models.Model):
+    """
+    Índice de itens parecidos (ver dedup.py): uma linha por faixa
+    ("band") da assinatura MinHash do item. Dois itens com a mesma
+    `chave` têm aquela faixa inteira igual, e por isso provavelmente
+    textos parecidos. Procurar duplicados é um `chave IN (...)` no
+    índice, sem comparar com a tabela toda.
+
+    Dado derivado, como a tabela da busca textual: sem revisão, e
+    `manage.py deduplicar_itens --reindexar` remonta do zero.
+    """
+
+    item = models.ForeignKey(Item, on_delete=models.CASCADE, related_name="assinaturas_lsh")
+    chave = models.BigIntegerField(db_index=True)
+
+    def __str__(self):
+        return f"item #{self.item_id}: {self.chave}"
+
+
+class Estatistica(models.Model):
+    """
+    Estatísticas do painel já calculadas (estatisticas.py): um JSON por
+    nome, com as versões dos dados usadas no cálculo para saber se
+    ficou desatualizado.
+    """
+
+    nome = models.CharField(max_length=30, primary_key=True)
+    dados = models.JSONField(default=dict)
+    versao_itens = models.PositiveBigIntegerField(default=0)
+    versao_reivindicacoes = models.PositiveBigIntegerField(default=0)
+    segundos = models.FloatField(default=0, help_text="Tempo do último cálculo.")
+    atualizado_em = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.nome} ({self.atualizado_em:%d/%m/%Y %H:%M})"
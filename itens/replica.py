@@ -0,0 +1,129 @@
+# ============================================================
+# Achados e Perdidos - UnDF
+# Arquivo: replica.py
+#
+# Leituras na réplica, escritas no primário.
+#
+# Só as views de leitura marcadas com @usa_replica (listagens e a
+# exportação) leem do banco "replica"; todo o resto, inclusive leituras
+# dentro de views que gravam, continua no "default". Assim quem acabou
+# de salvar nunca lê um dado atrasado da réplica no meio da própria
+# requisição.
+#
+# A marcação fica numa ContextVar durante a chamada da view, e o
+# ReplicaRouter (settings.DATABASE_ROUTERS) consulta essa variável. Se
+# não houver banco "replica" configurado, tudo vai para o "default".
+# ============================================================
+
+from contextvars import ContextVar
+from functools import wraps
+
+from asgiref.sync import iscoroutinefunction
+from django.conf import settings
+
+
+REPLICA = "replica"
+
+_usar_replica = ContextVar("usar_replica", default=False)
+
+
+def replica_configurada() -> bool:
+    return REPLICA in settings.DATABASES
+
+
+def usa_replica(methods=("GET", "HEAD")):
+    """
+    Decorator: as consultas da view (para os métodos em `methods`) leem
+    da réplica. Deve ficar por fora do @cache.list_condition, para o
+    ETag sair do mesmo banco que os dados.
+    """
+
+    def decorator(view):
+        if iscoroutinefunction(view):
+            @wraps(view)
+            async def async_wrapper(request, *args, **kwargs):
+                if request.method not in methods:
+                    return await view(request, *args, **kwargs)
+                # as consultas async (aget, aiterator...) rodam em threads
+                # via sync_to_async, que leva junto a ContextVar
+                token = _usar_replica.set(True)
+                try:
+                    response = await view(request, *args, **kwargs)
+                finally:
+                    _usar_replica.reset(token)
+
+                if getattr(response, "streaming", False):
+                    response.streaming_content = _na_replica_async(response.streaming_content)
+                return response
+
+            return async_wrapper
+
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            if request.method not in methods:
+                return view(request, *args, **kwargs)
+            token = _usar_replica.set(True)
+            try:
+                response = view(request, *args, **kwargs)
+            finally:
+                _usar_replica.reset(token)
+
+            if getattr(response, "streaming", False):
+                # respostas em streaming consultam o banco depois que a
+                # view já voltou, enquanto o corpo é enviado
+                response.streaming_content = _na_replica(response.streaming_content)
+            return response
+
+        return wrapper
+
+    return decorator
+
+
+def _na_replica(chunks):
+    chunks = iter(chunks)
+    while True:
+        token = _usar_replica.set(True)
+        try:
+            chunk = next(chunks, None)
+        finally:
+            _usar_replica.reset(token)
+        if chunk is None:
+            return
+        yield chunk
+
+
+async def _na_replica_async(chunks):
+    chunks = aiter(chunks)
+    while True:
+        token = _usar_replica.set(True)
+        try:
+            chunk = await anext(chunks, None)
+        finally:
+            _usar_replica.reset(token)
+        if chunk is None:
+            return
+        yield chunk
+
+
+class ReplicaRouter:
+    """
+    Router do Django: leituras marcadas vão para a réplica, o resto para
+    o primário. As duas conexões apontam para os mesmos dados, então
+    relações entre objetos dos dois lados são permitidas.
+    """
+
+    def db_for_read(self, model, **hints):
+        if _usar_replica.get() and replica_configurada():
+            return REPLICA
+        return "default"
+
+    def db_for_write(self, model, **hints):
+        return "default"
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # numa réplica de verdade o schema vem da replicação; com dois
+        # arquivos SQLite locais dá para rodar `migrate --database replica`
+        return True
@@ -0,0 +1,181 @@
+# ============================================================
+# Achados e Perdidos - UnDF
+# Arquivo: search.py
+#
+# Busca textual de itens. No SQLite uso uma tabela virtual FTS5
+# (itens_item_fts, criada na migração 0006) com o tokenizer unicode61
+# removendo acentos, então "cartao" encontra "Cartão". Em outros bancos
+# (ou se o SQLite não tiver FTS5) caio num icontains simples.
+#
+# A tabela FTS guarda só o texto; status/aprovação continuam vindo da
+# tabela itens_item, por isso mudanças de status não precisam reindexar.
+# ============================================================
+
+import re
+
+from asgiref.sync import sync_to_async
+from django.db import DEFAULT_DB_ALIAS, connections, router
+from django.db.models import Q
+from django.db.models.expressions import RawSQL
+
+from .models import Item
+
+
+FTS_TABLE = "itens_item_fts"
+
+# Campos indexados, na mesma ordem das colunas da tabela FTS.
+TEXT_FIELDS = ("nome", "descricao", "categoria", "local_encontrado")
+
+# Peso de cada coluna no bm25 (nome pesa mais que descrição, etc.).
+FTS_WEIGHTS = (10.0, 1.0, 4.0, 2.0)
+
+# Palavras que não ajudam a achar nada ("carteira preta do bloco").
+STOPWORDS = {
+    "a", "o", "as", "os", "e", "de", "da", "do", "das", "dos",
+    "em", "na", "no", "nas", "nos", "um", "uma", "com", "para", "por",
+}
+
+# (alias, nome do banco) -> a tabela FTS existe? O nome entra na chave
+# porque o mesmo alias pode trocar de banco (o banco de testes é criado
+# depois do import), e o alias porque a réplica pode não ter a tabela.
+_fts_available = {}
+
+
+def _fts_key(using: str) -> tuple:
+    return using, connections[using].settings_dict["NAME"]
+
+
+def fts_available(using: str = DEFAULT_DB_ALIAS) -> bool:
+    """
+    Diz se a tabela FTS5 existe no banco `using` (resultado fica em
+    memória, um por banco).
+    """
+    key = _fts_key(using)
+    if key not in _fts_available:
+        conn = connections[using]
+        _fts_available[key] = (
+            conn.vendor == "sqlite" and FTS_TABLE in conn.introspection.table_names()
+        )
+    return _fts_available[key]
+
+
+async def afts_available(using: str = DEFAULT_DB_ALIAS) -> bool:
+    """
+    fts_available para views async: a primeira checagem consulta o
+    banco (introspecção), e isso não pode rodar direto no event loop.
+    """
+    key = _fts_key(using)
+    if key not in _fts_available:
+        return await sync_to_async(fts_available)(using)
+    return _fts_available[key]
+
+
+def tokenize(term: str) -> list:
+    """
+    Quebra o texto digitado em palavras, sem stopwords.
+    """
+    words = re.findall(r"\w+", (term or "").lower())
+    return [word for word in words if word not in STOPWORDS]
+
+
+def match_expression(words: list) -> str:
+    """
+    Monta a expressão MATCH do FTS5: todas as palavras, cada uma como
+    prefixo ("cart" já encontra "carteira").
+    """
+    return " AND ".join(f'"{word}"*' for word in words)
+
+
+def filter_items(queryset, term: str):
+    """
+    Restringe um queryset de Item aos que batem com o texto.
+
+    Não mexe na ordenação, então dá para usar junto com o keyset da
+    listagem pública.
+    """
+    words = tokenize(term)
+    if not words:
+        return queryset
+
+    if fts_available(queryset.db):
+        return queryset.filter(id__in=RawSQL(
+            f"SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s",
+            [match_expression(words)],
+        ))
+
+    for word in words:
+        queryset = queryset.filter(
+            Q(nome__icontains=word)
+            | Q(descricao__icontains=word)
+            | Q(categoria__icontains=word)
+            | Q(local_encontrado__icontains=word)
+        )
+    return queryset
+
+
+def search_public_items(term: str, limit: int) -> list:
+    """
+    Busca itens da listagem pública (em estoque e aprovados), do mais
+    relevante para o menos relevante.
+    """
+    words = tokenize(term)
+    if not words:
+        return []
+
+    itens = Item.objects.filter(status="Em estoque", aprovado=True)
+    if not fts_available(itens.db):
+        itens = filter_items(itens, term)
+        return list(itens.order_by("-data_encontrado", "-data_criacao", "-id")[:limit])
+
+    weights = ", ".join(str(weight) for weight in FTS_WEIGHTS)
+    return list(itens.raw(
+        f"""
+        SELECT i.* FROM {FTS_TABLE} f
+        JOIN itens_item i ON i.id = f.rowid
+        WHERE {FTS_TABLE} MATCH %s AND i.status = %s AND i.aprovado
+        ORDER BY bm25({FTS_TABLE}, {weights}), i.data_encontrado DESC
+        LIMIT %s
+        """,
+        [match_expression(words), "Em estoque", limit],
+    ))
+
+
+def index_item(item: Item) -> None:
+    """
+    Grava (ou regrava) o texto de um item na tabela FTS.
+    """
+    index_items([item])
+
+
+def index_items(items) -> None:
+    """
+    Mesmo que index_item para vários itens de uma vez (importação em
+    lote): dois executemany em vez de dois comandos por item.
+    """
+    using = router.db_for_write(Item)
+    if not fts_available(using) or not items:
+        return
+    with connections[using].cursor() as cursor:
+        cursor.executemany(
+            f"DELETE FROM {FTS_TABLE} WHERE rowid = %s",
+            [[item.pk] for item in items],
+        )
+        cursor.executemany(
+            f"INSERT INTO {FTS_TABLE} (rowid, {', '.join(TEXT_FIELDS)}) "
+            "VALUES (%s, %s, %s, %s, %s)",
+            [
+                [item.pk] + [getattr(item, field) or "" for field in TEXT_FIELDS]
+                for item in items
+            ],
+        )
+
+
+def unindex_item(item_id: int) -> None:
+    """
+    Remove um item da tabela FTS (quando ele é apagado).
+    """
+    using = router.db_for_write(Item)
+    if not fts_available(using):
+        return
+    with connections[using].cursor() as cursor:
+        cursor.execute(f"DELETE FROM {FTS_TABLE} WHERE rowid = %s", [item_id])
@@ -0,0 +1,208 @@
+# ============================================================
+# Achados e Perdidos - UnDF
+# Arquivo: serializers.py
+#
+# Formato JSON de cada API, num lugar só.
+#
+# Cada endpoint tem um FieldSet: nome da chave no JSON -> coluna no
+# banco (+ conversão). As listas usam values_list só com as colunas
+# pedidas, sem montar objetos Item/Reivindicacao inteiros; os textos
+# longos (descricao, detalhes) podem ficar de fora com ?fields=.
+# ============================================================
+
+from itertools import islice
+
+from asgiref.sync import sync_to_async
+
+
+def _text(value):
+    return value or ""
+
+
+def _iso(value):
+    return value.isoformat() if value is not None else None
+
+
+def _same(value):
+    return value
+
+
+def _take(iterator, size) -> list:
+    return list(islice(iterator, size))
+
+
+class FieldSet:
+    """
+    Conjunto de campos de um endpoint.
+
+    `fields` é uma lista de (chave no JSON, caminho no ORM, conversão).
+    Chaves com ponto ("item.nome") viram objetos aninhados. `required`
+    sempre vai na resposta, mesmo que não venha em ?fields=.
+    """
+
+    def __init__(self, fields, required=("id",)):
+        self.fields = {key: (path, convert or _same) for key, path, convert in fields}
+        self.required = tuple(required)
+        self.default = tuple(self.fields)
+
+    def parse(self, value, extra_required=()) -> tuple:
+        """
+        Lê o parâmetro ?fields= (lista separada por vírgula). Um prefixo
+        como "item" seleciona todos os "item.*". Sem o parâmetro, todos
+        os campos. Levanta ValueError para campo desconhecido.
+        """
+        if not value:
+            names = list(self.default)
+        else:
+            names = []
+            for name in value.split(","):
+                name = name.strip()
+                if not name:
+                    continue
+                if name in self.fields:
+                    names.append(name)
+                    continue
+                nested = [key for key in self.fields if key.startswith(name + ".")]
+                if not nested:
+                    raise ValueError(f"Campo desconhecido: {name}")
+                names.extend(nested)
+
+        for name in self.required + tuple(extra_required):
+            if name not in names:
+                names.insert(0, name)
+        # mantém a ordem declarada no FieldSet, sem repetir
+        return tuple(key for key in self.fields if key in names)
+
+    def _build(self, names, values) -> dict:
+        data = {}
+        for name, value in zip(names, values):
+            _, convert = self.fields[name]
+            value = convert(value)
+            target = data
+            *parents, leaf = name.split(".")
+            for parent in parents:
+                target = target.setdefault(parent, {})
+            target[leaf] = value
+        return data
+
+    def rows(self, queryset, names=None, extra=(), chunk_size=None):
+        """
+        Busca só as colunas de `names` (values_list) e gera dicionários.
+
+        Com `extra` (caminhos do ORM) gera (dicionário, valores extras):
+        útil para colunas que a view precisa mas não vão no JSON, como a
+        chave do cursor da listagem pública. Com `chunk_size` lê em
+        blocos (.iterator), para streaming.
+        """
+        names, values = self._values(queryset, names, extra)
+        if chunk_size:
+            values = values.iterator(chunk_size=chunk_size)
+
+        size = len(names)
+        for row in values:
+            if extra:
+                yield self._build(names, row[:size]), row[size:]
+            else:
+                yield self._build(names, row)
+
+    async def arows(self, queryset, names=None, extra=(), chunk_size=None):
+        """
+        rows() para views async. Com `chunk_size`, cada bloco do
+        .iterator() é lido numa ida ao thread do banco (sync_to_async);
+        sem, a lista inteira numa ida só (async for do queryset).
+
+        Não uso o aiterator do Django aqui: com values_list ele executa
+        a consulta ainda no event loop (SynchronousOnlyOperation).
+        """
+        names, values = self._values(queryset, names, extra)
+        size = len(names)
+        if chunk_size:
+            # gerador: a consulta só roda no primeiro bloco, no thread
+            iterator = values.iterator(chunk_size=chunk_size)
+            while True:
+                chunk = await sync_to_async(_take)(iterator, chunk_size)
+                for row in chunk:
+                    yield self._row(names, size, row, extra)
+                if len(chunk) < chunk_size:
+                    return
+
+        async for row in values:
+            yield self._row(names, size, row, extra)
+
+    def _row(self, names, size, row, extra):
+        if extra:
+            return self._build(names, row[:size]), row[size:]
+        return self._build(names, row)
+
+    def _values(self, queryset, names, extra):
+        names = names or self.default
+        columns = [self.fields[name][0] for name in names] + list(extra)
+        return names, queryset.values_list(*columns)
+
+    def serialize(self, obj, names=None) -> dict:
+        """
+        Mesmo formato a partir de um objeto já carregado (criação,
+        edição, resultados da busca etc.).
+        """
+        names = names or self.default
+        values = []
+        for name in names:
+            value = obj
+            for attr in self.fields[name][0].split("__"):
+                value = getattr(value, attr)
+            values.append(value)
+        return self._build(names, values)
+
+
+# API pública (script.js): chaves em inglês.
+PUBLIC_ITEM = FieldSet([
+    ("id", "id", None),
+    ("name", "nome", None),
+    ("location", "local_encontrado", _text),
+    ("date", "data_encontrado", _iso),  # 'YYYY-MM-DD'
+    ("category", "categoria", _text),
+    ("description", "descricao", _text),
+    ("status", "status", None),
+])
+
+# Painel interno: itens.
+INTERNAL_ITEM = FieldSet([
+    ("id", "id", None),
+    ("nome", "nome", None),
+    ("status", "status", None),
+    ("aprovado", "aprovado", None),
+    ("local_encontrado", "local_encontrado", _text),
+    ("data_encontrado", "data_encontrado", _iso),
+    ("categoria", "categoria", _text),
+    ("descricao", "descricao", _text),
+    ("reivindicacoes_pendentes", "reivindicacoes_pendentes", None),
+    ("reivindicacoes_aprovadas", "reivindicacoes_aprovadas", None),
+    ("reivindicacoes_recusadas", "reivindicacoes_recusadas", None),
+    ("revisao", "revisao", None),
+])
+
+# Painel interno: reivindicações, com os dados principais do item.
+CLAIM = FieldSet([
+    ("id", "id", None),
+    ("status", "status", None),
+    ("data_envio", "data_envio", _iso),
+    ("nome_requerente", "nome_requerente", None),
+    ("contato", "contato", _text),
+    ("detalhes", "detalhes", None),
+    ("vinculo", "vinculo", _text),
+    ("identificacao", "identificacao", _text),
+    ("revisao", "revisao", None),
+    ("item.id", "item__id", None),
+    ("item.nome", "item__nome", None),
+    ("item.local_encontrado", "item__local_encontrado", _text),
+    ("item.data_encontrado", "item__data_encontrado", _iso),
+    ("item.status", "item__status", None),
+    ("item.aprovado", "item__aprovado", None),
+])
+
+
+def serialize_item(item) -> dict:
+    """
+    Item no formato do painel interno (criação/edição devolvem isso).
+    """
+    return INTERNAL_ITEM.serialize(item)
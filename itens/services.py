@@ -0,0 +1,159 @@
+# ============================================================
+# Achados e Perdidos - UnDF
+# Arquivo: services.py
+#
+# Regras de mudança de status das reivindicações (e do item junto).
+#
+# Antes a view salvava a reivindicação, depois lia e salvava o item,
+# cada passo por conta própria: duas pessoas aprovando reivindicações
+# diferentes do mesmo item ao mesmo tempo conseguiam aprovar as duas.
+# Agora a transição inteira roda numa transação que começa travando a
+# reivindicação e o item (select_for_update), então a segunda aprovação
+# espera a primeira terminar e já enxerga o item como "Reivindicado".
+#
+# São quatro idas ao banco, e com as revisões como estão não dá para
+# ter menos:
+#   1. a leitura travada: as regras dependem do status do item, dos
+#      contadores e do status anterior da reivindicação, e a mensagem
+#      do 409 também;
+#   2. as revisões novas (reivindicações e, se o status do item mudar,
+#      itens) num UPDATE ... RETURNING só. Tem que vir antes e separado:
+#      o SQLite não aceita UPDATE dentro de CTE/subconsulta, e cada
+#      conjunto precisa do próprio contador (?since= e ETags);
+#   3. um UPDATE nas reivindicações (a escolhida + as concorrentes
+#      pendentes, recusadas automaticamente);
+#   4. um UPDATE no item (status + contadores): outra tabela, outro
+#      comando.
+#
+# A criação de reivindicação também mora aqui, para a view síncrona e
+# a async (que não pode abrir transação no event loop) usarem a mesma.
+# ============================================================
+
+from django.db import transaction
+from django.db.models import Case, F, Q, Value, When
+from django.db.models.functions import Greatest
+
+from . import events
+from .models import Item, Reivindicacao, VersaoDados
+
+
+class TransicaoInvalida(Exception):
+    """
+    A mudança de status não é permitida no estado atual do item.
+    """
+
+
+def _counter_changes(deltas: dict) -> dict:
+    changes = {}
+    for status, delta in deltas.items():
+        if not delta:
+            continue
+        field = Item.CONTADORES[status]
+        changes[field] = F(field) + delta if delta > 0 else Greatest(F(field) + delta, 0)
+    return changes
+
+
+def ajustar_contadores(item_id: int, deltas: dict) -> None:
+    """
+    Soma `deltas` ({status: +n/-n}) nos contadores de reivindicações do
+    item, num UPDATE com F() (sem ler o item antes).
+
+    Sem revisão nova no item: os contadores não aparecem na listagem
+    pública, e cada reivindicação invalidaria o cache e o ETag dela. Quem
+    mostra os contadores (internal_items_list) também depende da versão
+    das reivindicações, que muda junto.
+    """
+    changes = _counter_changes(deltas)
+    if changes:
+        Item.objects.filter(pk=item_id).update(**changes)
+
+
+def registrar_reivindicacao(item_id: int, **fields) -> Reivindicacao:
+    """
+    Cria uma reivindicação "Pendente" para o item. O contador do item
+    sobe no post_save, na mesma transação (ver signals.py).
+    """
+    return Reivindicacao.objects.create(item_id=item_id, **fields)
+
+
+def alterar_status_reivindicacao(claim_id: int, new_status: str) -> dict:
+    """
+    Muda o status de uma reivindicação, aplicando as regras no item:
+
+    - aprovar: só com o item "Em estoque" e sem outra aprovada; o item
+      vira "Reivindicado" e as outras reivindicações pendentes dele são
+      recusadas;
+    - desfazer uma aprovação (voltar para Pendente/Recusada): só se o
+      item ainda não foi devolvido; ele volta para "Em estoque";
+    - os contadores de reivindicações do item acompanham tudo.
+
+    Levanta Reivindicacao.DoesNotExist ou TransicaoInvalida. Devolve
+    {"id", "status", "item_status", "recusadas"}.
+    """
+    with transaction.atomic():
+        rev = (
+            Reivindicacao.objects
+            .select_related("item")
+            .select_for_update()
+            .get(pk=claim_id)
+        )
+        item = rev.item
+        old_status = rev.status
+        result = {"id": rev.pk, "status": new_status, "item_status": item.status, "recusadas": 0}
+
+        if old_status == new_status:
+            return result
+
+        item_changes = {}
+        claims = Reivindicacao.objects.filter(pk=rev.pk)
+        new_claim_status = Value(new_status)
+
+        if new_status == "Aprovada":
+            if item.status != "Em estoque":
+                raise TransicaoInvalida(f"O item já está como \"{item.status}\"")
+            # item devolvido ao estoque na mão (internal_item_back_to_stock,
+            # ação "estoque" em lote) ainda tem a aprovação antiga
+            if item.reivindicacoes_aprovadas:
+                raise TransicaoInvalida("O item já tem uma reivindicação aprovada")
+            item_changes["status"] = "Reivindicado"
+            # a escolhida + as concorrentes pendentes, num UPDATE só
+            claims = Reivindicacao.objects.filter(
+                Q(pk=rev.pk) | Q(item_id=item.pk, status="Pendente")
+            )
+            new_claim_status = Case(
+                When(pk=rev.pk, then=Value(new_status)),
+                default=Value("Recusada"),
+            )
+        elif old_status == "Aprovada":
+            if item.status == "Devolvido":
+                raise TransicaoInvalida("O item já foi devolvido")
+            item_changes["status"] = "Em estoque"
+
+        # uma ida ao banco para as revisões novas; o item só ganha revisão
+        # se o status dele mudar (contadores, ver ajustar_contadores)
+        conjuntos = [Reivindicacao.CONJUNTO]
+        if "status" in item_changes:
+            conjuntos.append(Item.CONJUNTO)
+        revisoes = VersaoDados.incrementar_varios(conjuntos)
+        updated = claims.update_revisado(revisao=revisoes[Reivindicacao.CONJUNTO], status=new_claim_status)
+        recusadas = updated - 1
+
+        deltas = {status: 0 for status in Item.CONTADORES}
+        deltas[old_status] -= 1
+        deltas[new_status] += 1
+        deltas["Pendente"] -= recusadas
+        deltas["Recusada"] += recusadas
+        item_changes.update(_counter_changes(deltas))
+        if Item.CONJUNTO in revisoes:
+            Item.objects.filter(pk=item.pk).update_revisado(revisao=revisoes[Item.CONJUNTO], **item_changes)
+        else:
+            Item.objects.filter(pk=item.pk).update(**item_changes)
+
+        result["item_status"] = item_changes.get("status", item.status)
+        result["recusadas"] = recusadas
+
+        # update() não dispara o post_save (ver signals.py): aviso o painel aqui
+        data = {"id": rev.pk, "item_id": item.pk, "status": new_status, "recusadas": recusadas}
+        transaction.on_commit(lambda: events.broker.publish("reivindicacao-atualizada", data))
+
+    return result
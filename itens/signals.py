@@ -0,0 +1,115 @@
+# ============================================================
+# Achados e Perdidos - UnDF
+# Arquivo: signals.py
+#
+# Sinais dos modelos do app "itens". Centralizo aqui o que precisa
+# acontecer "do lado" de cada gravação, para não depender de cada view
+# (ou do admin) lembrar de fazer.
+# ============================================================
+
+from django.db import transaction
+from django.db.backends.signals import connection_created
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from . import dedup, events, metrics, search, services
+from .models import Item, Remocao, Reivindicacao, VersaoDados
+
+
+@receiver(post_save, sender=Item)
+def item_saved(sender, instance, created=False, update_fields=None, **kwargs):
+    """
+    Mantém a busca textual e o índice de duplicados (dedup.py) em dia.
+    Se só mudou status/aprovação, o texto é o mesmo e não preciso
+    reindexar.
+
+    (A versão/revisão já foi incrementada no save, ver ComRevisao.)
+    """
+    if update_fields is not None and not set(update_fields) & set(search.TEXT_FIELDS):
+        return
+    search.index_item(instance)
+    if update_fields is None or set(update_fields) & set(dedup.TEXT_FIELDS):
+        dedup.index_item(instance, created=created)
+
+
+@receiver(post_save, sender=Reivindicacao)
+def reivindicacao_saved(sender, instance, created=False, **kwargs):
+    """
+    Avisa o painel interno (SSE, ver events.py) sobre reivindicação nova
+    ou mudança de status. Só publico depois do commit, para o painel
+    não buscar algo que ainda não está visível no banco.
+    """
+    event = "reivindicacao-criada" if created else "reivindicacao-atualizada"
+    data = {
+        "id": instance.pk,
+        "item_id": instance.item_id,
+        "status": instance.status,
+        "revisao": instance.revisao,
+    }
+    transaction.on_commit(lambda: events.broker.publish(event, data))
+
+
+@receiver(pre_save, sender=Reivindicacao)
+def reivindicacao_antes(sender, instance, **kwargs):
+    """
+    Instância montada na mão com pk (não veio do banco, ver
+    Reivindicacao.from_db): leio o status salvo para os contadores.
+    """
+    if instance.pk is not None and not hasattr(instance, "_contado"):
+        instance._contado = (
+            sender.objects.filter(pk=instance.pk).values_list("item_id", "status").first()
+        )
+
+
+@receiver(post_save, sender=Reivindicacao)
+def reivindicacao_contadores(sender, instance, created=False, **kwargs):
+    """
+    Contadores de reivindicações do item (Item.CONTADORES): +1 no status
+    novo e -1 no anterior, se mudou. Vale para tudo que passa pelo
+    save() (views, admin, shell); os caminhos com update()/bulk_create
+    fazem a conta no próprio UPDATE (services.py, fila.py).
+    """
+    anterior = None if created else getattr(instance, "_contado", None)
+    atual = (instance.item_id, instance.status)
+    instance._contado = atual
+    if anterior == atual:
+        return
+    if anterior is None:
+        services.ajustar_contadores(instance.item_id, {instance.status: 1})
+    elif anterior[0] == instance.item_id:
+        services.ajustar_contadores(instance.item_id, {anterior[1]: -1, instance.status: 1})
+    else:
+        services.ajustar_contadores(anterior[0], {anterior[1]: -1})
+        services.ajustar_contadores(instance.item_id, {instance.status: 1})
+
+
+@receiver(post_delete, sender=Reivindicacao)
+def reivindicacao_removida(sender, instance, origin=None, **kwargs):
+    """
+    Reivindicação apagada sai do contador do item. Se quem está sendo
+    apagado é o próprio item (CASCADE), não há contador para acertar.
+    """
+    if isinstance(origin, Item) or getattr(origin, "model", None) is Item:
+        return
+    item_id, status = getattr(instance, "_contado", None) or (instance.item_id, instance.status)
+    services.ajustar_contadores(item_id, {status: -1})
+
+
+@receiver(post_delete, sender=Item)
+@receiver(post_delete, sender=Reivindicacao)
+def registro_removido(sender, instance, **kwargs):
+    """
+    Exclusão: nova versão do conjunto de dados (total - 1) e uma
+    lápide com essa revisão, para o painel remover a linha no próximo
+    ?since=. Itens também saem da busca textual.
+    """
+    revisao = VersaoDados.incrementar(sender.CONJUNTO, -1)
+    Remocao.objects.create(
+        conjunto=sender.CONJUNTO, objeto_id=instance.pk, revisao=revisao
+    )
+    if sender is Item:
+        search.unindex_item(instance.pk)
+
+
+# medidor de consultas das métricas por view (ver metrics.py)
+connection_created.connect(metrics.instrument_connection)
@@ -8,6 +8,22 @@ let allClaims = [];
 let allItems = [];
 let currentEditingItemId = null;
 
+// Itens marcados para ação em lote
+const selectedItemIds = new Set();
+
+// Última revisão recebida de cada lista (header X-Revisao / campo "revisao").
+// Depois da primeira carga completa, só peço o que mudou (?since=).
+let itemsRevision = null;
+let claimsRevision = null;
+
+// Atualização: o servidor avisa por SSE (/api/interno/eventos/) quando
+// algo muda. Se o SSE não estiver disponível (servidor WSGI), volto a
+// sincronizar de tempos em tempos.
+const FALLBACK_REFRESH_INTERVAL_MS = 30000;
+const EVENT_REFRESH_DELAY_MS = 300;
+let fallbackRefreshTimer = null;
+let eventRefreshTimer = null;
+
 // Referências de DOM
 let claimsListEl;
 let itemsListEl;
@@ -15,6 +31,10 @@ let searchClaimsInput;
 let searchItemsInput;
 let statusFilter;
 let approvalFilter;
+let bulkSelectAll;
+let bulkActionSelect;
+let bulkApplyButton;
+let bulkCountEl;
 
 // Form de item
 let itemForm;
@@ -38,6 +58,10 @@ document.addEventListener('DOMContentLoaded', () => {
     searchItemsInput = document.getElementById('searchItems');
     statusFilter = document.getElementById('filterStatus');
     approvalFilter = document.getElementById('filterAprovado');
+    bulkSelectAll = document.getElementById('bulkSelectAll');
+    bulkActionSelect = document.getElementById('bulkAction');
+    bulkApplyButton = document.getElementById('bulkApplyButton');
+    bulkCountEl = document.getElementById('bulkCount');
 
     itemForm = document.getElementById('itemForm');
     itemFormTitle = document.getElementById('itemFormTitle');
@@ -78,6 +102,19 @@ document.addEventListener('DOMContentLoaded', () => {
         });
     }
 
+    // Ações em lote
+    if (bulkSelectAll) {
+        bulkSelectAll.addEventListener('change', onBulkSelectAllChange);
+    }
+
+    if (bulkActionSelect) {
+        bulkActionSelect.addEventListener('change', updateBulkToolbar);
+    }
+
+    if (bulkApplyButton) {
+        bulkApplyButton.addEventListener('click', applyBulkAction);
+    }
+
     // Submissão do formulário de item (criar/editar)
     if (itemForm) {
         itemForm.addEventListener('submit', onItemFormSubmit);
@@ -96,11 +133,18 @@ document.addEventListener('DOMContentLoaded', () => {
 
     if (itemsListEl) {
         itemsListEl.addEventListener('click', onItemsListClick);
+        itemsListEl.addEventListener('change', onItemSelectChange);
     }
 
     // Carrega dados iniciais
     loadClaims();
     loadItems();
+
+    // Atualização ao vivo (só o que mudou) e ao voltar para a aba
+    subscribeToEvents();
+    document.addEventListener('visibilitychange', () => {
+        if (document.visibilityState === 'visible') refreshDashboard();
+    });
 });
 
 // ----------------- Tabs internas -----------------
@@ -125,6 +169,10 @@ function setupTabs() {
                     section.classList.add('hidden');
                 }
             });
+
+            if (targetId === 'tab-estatisticas') {
+                loadStatistics();
+            }
         });
     });
 }
@@ -156,15 +204,40 @@ function showInfoMessage(targetElement, text) {
 
 // ----------------- Carregamento de dados via API -----------------
 
+// Última resposta de cada lista: {etag, data, revision}. Na próxima carga
+// mando If-None-Match; se nada mudou o servidor devolve 304 e reaproveito.
+const responseCache = new Map();
+
+async function fetchJSONWithValidators(url) {
+    const cached = responseCache.get(url);
+    const headers = cached ? { 'If-None-Match': cached.etag } : {};
+
+    const response = await fetch(url, { headers });
+    if (response.status === 304 && cached) {
+        return cached;
+    }
+    if (!response.ok) {
+        throw new Error(`Erro ao carregar ${url}`);
+    }
+
+    const result = {
+        etag: response.headers.get('ETag'),
+        data: await response.json(),
+        revision: Number(response.headers.get('X-Revisao')) || 0,
+    };
+    if (result.etag) {
+        responseCache.set(url, result);
+    }
+    return result;
+}
+
 async function loadClaims() {
     if (!claimsListEl) return;
 
     try {
-        const response = await fetch('/api/interno/reivindicacoes/');
-        if (!response.ok) {
-            throw new Error('Erro ao carregar reivindicações');
-        }
-        allClaims = await response.json();
+        const { data, revision } = await fetchJSONWithValidators('/api/interno/reivindicacoes/');
+        allClaims = [...data];
+        claimsRevision = revision;
         renderClaims(getFilteredClaims());
     } catch (error) {
         console.error(error);
@@ -179,11 +252,9 @@ async function loadItems() {
     if (!itemsListEl) return;
 
     try {
-        const response = await fetch('/api/interno/itens/');
-        if (!response.ok) {
-            throw new Error('Erro ao carregar itens internos');
-        }
-        allItems = await response.json();
+        const { data, revision } = await fetchJSONWithValidators('/api/interno/itens/');
+        allItems = [...data];
+        itemsRevision = revision;
         renderItemsList();
     } catch (error) {
         console.error(error);
@@ -194,6 +265,174 @@ async function loadItems() {
     }
 }
 
+// ----------------- Sincronização incremental (?since=) -----------------
+
+// Aplica {alterados, removidos} numa lista local (substitui por id).
+function mergeDelta(list, delta, compare) {
+    const removed = new Set(delta.removidos);
+    const changed = new Map(delta.alterados.map((obj) => [obj.id, obj]));
+
+    const merged = list
+        .filter((obj) => !removed.has(obj.id) && !changed.has(obj.id))
+        .concat(delta.alterados.filter((obj) => !removed.has(obj.id)));
+
+    return merged.sort(compare);
+}
+
+function compareItems(a, b) {
+    // mesma ordem da API: data_encontrado desc, mais novo primeiro
+    if (a.data_encontrado !== b.data_encontrado) {
+        return a.data_encontrado < b.data_encontrado ? 1 : -1;
+    }
+    return b.id - a.id;
+}
+
+function compareClaims(a, b) {
+    if (a.data_envio !== b.data_envio) {
+        return a.data_envio < b.data_envio ? 1 : -1;
+    }
+    return b.id - a.id;
+}
+
+async function fetchDelta(url, since) {
+    const response = await fetch(`${url}?since=${since}`);
+    if (!response.ok) {
+        throw new Error(`Erro ao sincronizar ${url}`);
+    }
+    return response.json();
+}
+
+async function syncItems() {
+    if (itemsRevision === null) return loadItems();
+
+    const delta = await fetchDelta('/api/interno/itens/', itemsRevision);
+    itemsRevision = delta.revisao;
+    if (!delta.alterados.length && !delta.removidos.length) return;
+
+    allItems = mergeDelta(allItems, delta, compareItems);
+
+    // as reivindicações levam uma cópia do item: atualizo também
+    const changed = new Map(delta.alterados.map((item) => [item.id, item]));
+    allClaims = allClaims.map((claim) => {
+        const item = claim.item && changed.get(claim.item.id);
+        if (!item) return claim;
+        return {
+            ...claim,
+            item: {
+                ...claim.item,
+                nome: item.nome,
+                local_encontrado: item.local_encontrado,
+                data_encontrado: item.data_encontrado,
+                status: item.status,
+                aprovado: item.aprovado,
+            },
+        };
+    });
+
+    renderItemsList();
+    renderClaims(getFilteredClaims());
+}
+
+async function syncClaims() {
+    if (claimsRevision === null) return loadClaims();
+
+    const delta = await fetchDelta('/api/interno/reivindicacoes/', claimsRevision);
+    claimsRevision = delta.revisao;
+    if (!delta.alterados.length && !delta.removidos.length) return;
+
+    allClaims = mergeDelta(allClaims, delta, compareClaims);
+    renderClaims(getFilteredClaims());
+
+    // os contadores do item mudam sem revisão nova (não vêm no ?since=
+    // dos itens): recalculo a partir da lista completa de reivindicações
+    recountClaims();
+    renderItemsList();
+}
+
+const CLAIM_COUNTERS = {
+    Pendente: 'reivindicacoes_pendentes',
+    Aprovada: 'reivindicacoes_aprovadas',
+    Recusada: 'reivindicacoes_recusadas',
+};
+
+function recountClaims() {
+    const counts = new Map();
+    allClaims.forEach((claim) => {
+        const field = CLAIM_COUNTERS[claim.status];
+        if (!claim.item || !field) return;
+        const itemCounts = counts.get(claim.item.id) || {};
+        itemCounts[field] = (itemCounts[field] || 0) + 1;
+        counts.set(claim.item.id, itemCounts);
+    });
+
+    allItems = allItems.map((item) => {
+        const itemCounts = counts.get(item.id) || {};
+        const updated = { ...item };
+        Object.values(CLAIM_COUNTERS).forEach((field) => {
+            updated[field] = itemCounts[field] || 0;
+        });
+        return updated;
+    });
+}
+
+// ----------------- Eventos em tempo real (SSE) -----------------
+
+function subscribeToEvents() {
+    if (!window.EventSource) {
+        startFallbackRefresh();
+        return;
+    }
+
+    const source = new EventSource('/api/interno/eventos/');
+    const onChange = () => scheduleRefresh();
+
+    source.addEventListener('reivindicacao-criada', onChange);
+    source.addEventListener('reivindicacao-atualizada', onChange);
+    source.addEventListener('dados-alterados', onChange);
+
+    source.addEventListener('open', () => {
+        stopFallbackRefresh();
+        // posso ter perdido eventos enquanto estava desconectado
+        scheduleRefresh();
+    });
+
+    source.addEventListener('error', () => {
+        // CLOSED = o servidor recusou (ex.: 501 em WSGI); o navegador não
+        // tenta de novo, então volto para a atualização periódica.
+        if (source.readyState === EventSource.CLOSED) {
+            startFallbackRefresh();
+        }
+    });
+}
+
+// Vários eventos seguidos (ex.: aprovação = reivindicação + item) viram
+// uma sincronização só.
+function scheduleRefresh() {
+    clearTimeout(eventRefreshTimer);
+    eventRefreshTimer = setTimeout(refreshDashboard, EVENT_REFRESH_DELAY_MS);
+}
+
+function startFallbackRefresh() {
+    if (fallbackRefreshTimer) return;
+    fallbackRefreshTimer = setInterval(refreshDashboard, FALLBACK_REFRESH_INTERVAL_MS);
+}
+
+function stopFallbackRefresh() {
+    clearInterval(fallbackRefreshTimer);
+    fallbackRefreshTimer = null;
+}
+
+async function refreshDashboard() {
+    try {
+        // itens primeiro: a sincronização deles também corrige o item
+        // embutido nas reivindicações
+        if (itemsListEl) await syncItems();
+        if (claimsListEl) await syncClaims();
+    } catch (error) {
+        console.error(error);
+    }
+}
+
 // ===========================================================
 // REIVINDICAÇÕES
 // ===========================================================
@@ -348,6 +587,14 @@ async function updateClaimStatus(claimId, itemId, newStatus) {
             body: JSON.stringify({ status: newStatus }),
         });
 
+        // 409: a mudança não vale mais (ex.: outra pessoa já aprovou
+        // outra reivindicação deste item)
+        if (response.status === 409) {
+            alert(await response.text());
+            refreshDashboard();
+            return;
+        }
+
         if (!response.ok) {
             throw new Error('Erro ao atualizar status da reivindicação');
         }
@@ -378,6 +625,9 @@ async function updateClaimStatus(claimId, itemId, newStatus) {
 
         renderClaims(getFilteredClaims());
         renderItemsList();
+
+        // outras reivindicações do item foram recusadas junto
+        if (data.recusadas) refreshDashboard();
     } catch (error) {
         console.error(error);
         alert('Não foi possível salvar o status da reivindicação. Tente novamente.');
@@ -427,11 +677,13 @@ function renderItemsList() {
             itemsListEl,
             'Nenhum item cadastrado corresponde aos filtros selecionados.'
         );
+        updateBulkToolbar();
         return;
     }
 
     const html = items.map(createInternalItemCard).join('');
     itemsListEl.innerHTML = html;
+    updateBulkToolbar();
 }
 
 function createInternalItemCard(item) {
@@ -441,12 +693,17 @@ function createInternalItemCard(item) {
 
     const canBackToStock = item.status !== 'Em estoque';
     const canMarkReturned = item.status !== 'Devolvido';
+    const selected = selectedItemIds.has(item.id);
 
     return `
-        <div class="item-card claim-card internal-item-card"
+        <div class="item-card claim-card internal-item-card${selected ? ' selected' : ''}"
              data-item-id="${item.id}"
              style="cursor: pointer;">
             <div class="claim-main">
+                <label class="item-select">
+                    <input type="checkbox" class="item-select-checkbox" ${selected ? 'checked' : ''}>
+                    Selecionar
+                </label>
                 <h3>${escapeHtml(item.nome)}</h3>
                 <p class="item-location">
                     ${escapeHtml(item.local_encontrado || 'local não informado')}
@@ -460,6 +717,12 @@ function createInternalItemCard(item) {
                     <strong>Aprovação:</strong>
                     ${aprovacaoTexto}
                 </p>
+                <p class="claim-details">
+                    <strong>Reivindicações:</strong>
+                    ${item.reivindicacoes_pendentes || 0} pendente(s),
+                    ${item.reivindicacoes_aprovadas || 0} aprovada(s),
+                    ${item.reivindicacoes_recusadas || 0} recusada(s)
+                </p>
             </div>
             <div class="claim-actions">
                 <p class="claim-status-label">
@@ -611,6 +874,15 @@ async function onItemFormSubmit(event) {
             itemFormMessage.textContent = isEditing
                 ? 'Item atualizado com sucesso.'
                 : 'Item cadastrado com sucesso. Você pode continuar editando ou limpar o formulário para cadastrar outro.';
+
+            // o servidor avisa se o mesmo objeto parece já ter sido cadastrado
+            const duplicates = savedItem.possiveis_duplicados || [];
+            if (duplicates.length) {
+                const list = duplicates
+                    .map((dup) => `#${dup.id} ${dup.nome} (${dup.local_encontrado || '-'}, ${formatDate(dup.data_encontrado)})`)
+                    .join('; ');
+                itemFormMessage.textContent += ` Atenção: parecido com ${list}. Confira se não é o mesmo objeto.`;
+            }
         }
     } catch (error) {
         console.error(error);
@@ -629,6 +901,9 @@ async function onItemsListClick(event) {
     const itemId = Number(card.dataset.itemId);
     if (!itemId) return;
 
+    // Marcar/desmarcar para ação em lote não abre o formulário
+    if (event.target.closest('.item-select')) return;
+
     const markReturnedBtn = event.target.closest('.item-mark-returned-button');
     const resetBtn = event.target.closest('.item-reset-button');
 
@@ -718,4 +993,189 @@ async function resetItemToStock(itemId) {
         console.error(error);
         alert('Não foi possível voltar o item para estoque. Tente novamente.');
     }
-}
\ No newline at end of file
+}
+
+
+// ---------- Ações em lote ----------
+
+function onItemSelectChange(event) {
+    const checkbox = event.target.closest('.item-select-checkbox');
+    if (!checkbox) return;
+
+    const card = checkbox.closest('.internal-item-card');
+    const itemId = Number(card.dataset.itemId);
+
+    if (checkbox.checked) {
+        selectedItemIds.add(itemId);
+    } else {
+        selectedItemIds.delete(itemId);
+    }
+    card.classList.toggle('selected', checkbox.checked);
+    updateBulkToolbar();
+}
+
+function onBulkSelectAllChange() {
+    // Vale só para o que está visível com os filtros atuais
+    const items = getFilteredItems();
+    items.forEach((item) => {
+        if (bulkSelectAll.checked) {
+            selectedItemIds.add(item.id);
+        } else {
+            selectedItemIds.delete(item.id);
+        }
+    });
+    renderItemsList();
+}
+
+function updateBulkToolbar() {
+    // Some da seleção o que foi apagado/sumiu da lista
+    const existing = new Set(allItems.map((item) => item.id));
+    selectedItemIds.forEach((id) => {
+        if (!existing.has(id)) selectedItemIds.delete(id);
+    });
+
+    if (bulkCountEl) {
+        bulkCountEl.textContent = String(selectedItemIds.size);
+    }
+
+    if (bulkApplyButton) {
+        bulkApplyButton.disabled =
+            !selectedItemIds.size || !bulkActionSelect || !bulkActionSelect.value;
+    }
+
+    if (bulkSelectAll) {
+        const visible = getFilteredItems();
+        bulkSelectAll.checked =
+            visible.length > 0 && visible.every((item) => selectedItemIds.has(item.id));
+    }
+}
+
+async function applyBulkAction() {
+    const acao = bulkActionSelect ? bulkActionSelect.value : '';
+    const ids = [...selectedItemIds];
+    if (!acao || !ids.length) return;
+
+    const label = bulkActionSelect.options[bulkActionSelect.selectedIndex].text;
+    if (!confirm(`${label}: ${ids.length} item(ns) selecionado(s). Confirmar?`)) return;
+
+    bulkApplyButton.disabled = true;
+
+    try {
+        const response = await fetch('/api/interno/itens/lote/', {
+            method: 'POST',
+            headers: { 'Content-Type': 'application/json' },
+            body: JSON.stringify({ ids, acao }),
+        });
+
+        if (!response.ok) {
+            throw new Error('Erro ao aplicar ação em lote');
+        }
+
+        const data = await response.json();
+
+        // Cada resultado traz o campo alterado (status ou aprovado)
+        const changes = new Map();
+        data.resultados.forEach(({ id, resultado, ...fields }) => {
+            if (resultado !== 'nao_encontrado') changes.set(id, fields);
+        });
+
+        allItems = allItems.map((item) =>
+            changes.has(item.id) ? { ...item, ...changes.get(item.id) } : item
+        );
+
+        allClaims = allClaims.map((claim) => {
+            if (claim.item && changes.has(claim.item.id)) {
+                return { ...claim, item: { ...claim.item, ...changes.get(claim.item.id) } };
+            }
+            return claim;
+        });
+
+        selectedItemIds.clear();
+        renderItemsList();
+        renderClaims(getFilteredClaims());
+    } catch (error) {
+        console.error(error);
+        alert('Não foi possível aplicar a ação aos itens selecionados. Tente novamente.');
+        updateBulkToolbar();
+    }
+}
+
+// ----------------- Estatísticas -----------------
+
+// Semanas mostradas na tabela semanal (as mais recentes).
+const STATS_WEEKS = 12;
+
+// O servidor devolve tudo já calculado (atualizar_estatisticas): uma
+// requisição barata, então busco de novo a cada vez que a aba abre.
+async function loadStatistics() {
+    const summaryEl = document.getElementById('statsSummary');
+    const tablesEl = document.getElementById('statsTables');
+    const updatedEl = document.getElementById('statsUpdated');
+
+    try {
+        const response = await fetch('/api/interno/estatisticas/');
+        if (!response.ok) {
+            throw new Error('Erro ao carregar estatísticas');
+        }
+        const stats = await response.json();
+
+        const updated = new Date(stats.atualizado_em).toLocaleString('pt-BR');
+        updatedEl.textContent = stats.desatualizado
+            ? `Calculadas em ${updated} (há alterações mais recentes ainda não contadas).`
+            : `Calculadas em ${updated}.`;
+
+        const pendentes = stats.reivindicacoes_pendentes;
+        const devolucao = stats.tempo_ate_devolucao;
+        summaryEl.innerHTML = [
+            statsCard('Itens cadastrados', stats.itens.total),
+            statsCard('Reivindicações pendentes', pendentes.total, `${pendentes.itens} itens aguardando análise`),
+            statsCard('Pendentes há mais de 7 dias', pendentes.total - pendentes.ate_7_dias),
+            statsCard(
+                'Tempo até a devolução (mediana)',
+                devolucao.mediana_dias === null ? '-' : `${devolucao.mediana_dias} dias`,
+                `${devolucao.devolvidos} itens devolvidos`,
+            ),
+        ].join('');
+
+        const semanas = stats.por_semana.slice(-STATS_WEEKS).reverse();
+        tablesEl.innerHTML = [
+            statsTable('Por status', ['Status', 'Itens'], stats.itens.por_status.map((row) => [row.valor, row.total])),
+            statsTable('Por categoria', ['Categoria', 'Itens'], stats.itens.por_categoria.map((row) => [row.valor, row.total])),
+            statsTable('Por local', ['Local', 'Itens'], stats.itens.por_local.map((row) => [row.valor, row.total])),
+            statsTable(
+                'Últimas semanas',
+                ['Semana', 'Encontrados', 'Devolvidos', 'Reivindicações'],
+                semanas.map((row) => [formatDate(row.semana), row.encontrados, row.devolvidos, row.reivindicacoes]),
+            ),
+        ].join('');
+    } catch (error) {
+        console.error(error);
+        updatedEl.textContent = 'Não foi possível carregar as estatísticas.';
+    }
+}
+
+function statsCard(label, value, detail = '') {
+    return `
+        <div class="stats-card">
+            <span class="stats-label">${escapeHtml(label)}</span>
+            <strong class="stats-value">${escapeHtml(String(value))}</strong>
+            ${detail ? `<span class="stats-label">${escapeHtml(detail)}</span>` : ''}
+        </div>
+    `;
+}
+
+function statsTable(title, headers, rows) {
+    const head = headers.map((header) => `<th>${escapeHtml(header)}</th>`).join('');
+    const body = rows
+        .map((row) => `<tr>${row.map((cell) => `<td>${escapeHtml(String(cell))}</td>`).join('')}</tr>`)
+        .join('');
+    return `
+        <div class="stats-card">
+            <h3>${escapeHtml(title)}</h3>
+            <table class="stats-table">
+                <thead><tr>${head}</tr></thead>
+                <tbody>${body}</tbody>
+            </table>
+        </div>
+    `;
+}
@@ -3,17 +3,31 @@
 // Arquivo: script.js
 //
 // Script da parte pública:
-// - carrega itens da API /api/itens/;
+// - carrega itens da API /api/itens/ (paginada no servidor, por cursor);
 // - controla abas (Início / Itens mais recentes / Sobre);
-// - controla busca por texto;
+// - controla busca por texto (filtro feito no servidor, parâmetro "q");
 // - abre modal de Blind Claim e envia os dados para a API.
 // ============================================================
 
 const ITEMS_PER_PAGE = 10;
+const SEARCH_DEBOUNCE_MS = 300;
+
+// Estado de cada lista. A API devolve "next_cursor"; guardo os cursores
+// das páginas já visitadas para conseguir voltar (cursors[i] = página i+1).
+// `request` numera as buscas: resposta de uma busca antiga (ex.: "cel"
+// chegando depois de "celular") é descartada.
+function createListState() {
+    return {
+        cursors: [null],
+        page: 1,
+        hasNext: false,
+        items: [],
+        request: 0,
+    };
+}
 
-let allItems = [];
-let currentPageInicio = 1;
-let currentPageRecentes = 1;
+const listInicio = createListState();
+const listRecentes = createListState();
 
 // Elementos principais
 const tabs = document.querySelectorAll('.menu-item[data-tab]');
@@ -127,7 +141,7 @@ function createItemCard(item) {
     `;
 }
 
-function renderItems(containerElement, items, currentPage) {
+function renderItems(containerElement, items) {
     if (!containerElement) return;
 
     if (!items || items.length === 0) {
@@ -135,92 +149,155 @@ function renderItems(containerElement, items, currentPage) {
         return;
     }
 
-    const startIndex = (currentPage - 1) * ITEMS_PER_PAGE;
-    const endIndex = startIndex + ITEMS_PER_PAGE;
-    const pageItems = items.slice(startIndex, endIndex);
-
-    containerElement.innerHTML = '';
-    pageItems.forEach(item => {
-        containerElement.innerHTML += createItemCard(item);
-    });
+    containerElement.innerHTML = items.map(createItemCard).join('');
 }
 
-function renderPagination(containerElement, items, currentPage, onPageChange) {
+function renderPagination(containerElement, state, onPageChange) {
     if (!containerElement) return;
 
-    const totalPages = Math.ceil(items.length / ITEMS_PER_PAGE);
-    if (totalPages <= 1) {
+    if (state.page === 1 && !state.hasNext) {
         containerElement.innerHTML = '';
         return;
     }
 
     containerElement.innerHTML = '';
-    for (let page = 1; page <= totalPages; page++) {
-        const button = document.createElement('button');
-        button.classList.add('page-number');
-        if (page === currentPage) {
-            button.classList.add('active');
-        }
-        button.textContent = page;
-        button.addEventListener('click', () => onPageChange(page));
-        containerElement.appendChild(button);
+
+    const prevButton = document.createElement('button');
+    prevButton.classList.add('page-number');
+    prevButton.textContent = '‹';
+    prevButton.disabled = state.page === 1;
+    prevButton.addEventListener('click', () => onPageChange(state.page - 1));
+    containerElement.appendChild(prevButton);
+
+    const current = document.createElement('button');
+    current.classList.add('page-number', 'active');
+    current.textContent = state.page;
+    containerElement.appendChild(current);
+
+    const nextButton = document.createElement('button');
+    nextButton.classList.add('page-number');
+    nextButton.textContent = '›';
+    nextButton.disabled = !state.hasNext;
+    nextButton.addEventListener('click', () => onPageChange(state.page + 1));
+    containerElement.appendChild(nextButton);
+}
+
+// ----------------- Busca e paginação (no servidor) -----------------
+
+// Respostas já recebidas, por URL: {etag, data}. Mando o ETag de volta
+// em If-None-Match e, se nada mudou, o servidor responde 304 sem corpo.
+const responseCache = new Map();
+
+async function fetchJSONWithValidators(url) {
+    const cached = responseCache.get(url);
+    const headers = cached ? { 'If-None-Match': cached.etag } : {};
+
+    const response = await fetch(url, { headers });
+    if (response.status === 304 && cached) {
+        return cached.data;
+    }
+    if (!response.ok) {
+        throw new Error(`Erro ao carregar ${url}`);
+    }
+
+    const data = await response.json();
+    const etag = response.headers.get('ETag');
+    if (etag) {
+        responseCache.set(url, { etag, data });
     }
+    return data;
 }
 
-// ----------------- Filtro de busca -----------------
-
-function getFilteredItems(items, searchTerm) {
-    const term = (searchTerm || '').toLowerCase();
-    if (!term) return [...items];
-
-    return items.filter(item => {
-        const name = (item.name || '').toLowerCase();
-        const location = (item.location || '').toLowerCase();
-        const category = (item.category || '').toLowerCase();
-        return (
-            name.includes(term) ||
-            location.includes(term) ||
-            category.includes(term)
-        );
-    });
+async function fetchItemsPage(searchTerm, cursor) {
+    const params = new URLSearchParams({ limit: ITEMS_PER_PAGE });
+    const term = (searchTerm || '').trim();
+    if (term) params.set('q', term);
+    if (cursor) params.set('cursor', cursor);
+
+    // data = {results: [{id, name, location, date, category, description, status}], next_cursor}
+    return fetchJSONWithValidators(`/api/itens/?${params.toString()}`);
+}
+
+async function fetchSuggestions(searchTerm) {
+    // itens parecidos, sem exigir todas as palavras (503 se o servidor não tiver NumPy)
+    const params = new URLSearchParams({ q: searchTerm, limit: ITEMS_PER_PAGE });
+    try {
+        const data = await fetchJSONWithValidators(`/api/itens/sugestoes/?${params.toString()}`);
+        return data.results;
+    } catch (error) {
+        return [];
+    }
+}
+
+async function loadListPage(state, page, searchInput, listElement, paginationElement) {
+    const cursor = state.cursors[page - 1];
+    if (cursor === undefined) return;
+
+    const request = ++state.request;
+    const isStale = () => request !== state.request;
+
+    try {
+        const data = await fetchItemsPage(searchInput ? searchInput.value : '', cursor);
+        if (isStale()) return;
+
+        state.page = page;
+        state.items = data.results;
+        state.hasNext = !!data.next_cursor;
+        state.cursors = state.cursors.slice(0, page);
+        if (data.next_cursor) {
+            state.cursors.push(data.next_cursor);
+        }
+
+        const term = searchInput ? searchInput.value.trim() : '';
+        if (page === 1 && term && state.items.length === 0) {
+            const suggestions = await fetchSuggestions(term);
+            if (isStale()) return;
+            if (suggestions.length) {
+                renderItems(listElement, suggestions);
+                listElement.insertAdjacentHTML('afterbegin', '<p class="info-text">Nenhum item com todas essas palavras. Talvez seja um destes:</p>');
+                renderPagination(paginationElement, state, () => {});
+                return;
+            }
+        }
+
+        renderItems(listElement, state.items);
+        renderPagination(paginationElement, state, (newPage) => {
+            loadListPage(state, newPage, searchInput, listElement, paginationElement);
+        });
+    } catch (error) {
+        if (isStale()) return;
+        console.error(error);
+        if (listElement) {
+            listElement.innerHTML = '<p class="info-text">Não foi possível carregar os itens agora. Tente recarregar a página em alguns instantes.</p>';
+        }
+    }
 }
 
 function updateInicioList() {
-    const filtered = getFilteredItems(allItems, searchInputInicio ? searchInputInicio.value : '');
-    renderItems(itemsListInicio, filtered, currentPageInicio);
-    renderPagination(paginationInicio, filtered, currentPageInicio, (page) => {
-        currentPageInicio = page;
-        updateInicioList();
-    });
+    listInicio.cursors = [null];
+    return loadListPage(listInicio, 1, searchInputInicio, itemsListInicio, paginationInicio);
 }
 
 function updateRecentesList() {
-    // por simplicidade, "recentes" = primeiros N itens ordenados por data
-    const sorted = [...allItems].sort((a, b) => {
-        if (a.date < b.date) return 1;
-        if (a.date > b.date) return -1;
-        return 0;
-    });
-    const filtered = getFilteredItems(sorted, searchInputRecentes ? searchInputRecentes.value : '');
-    renderItems(itemsListRecentes, filtered, currentPageRecentes);
-    renderPagination(paginationRecentes, filtered, currentPageRecentes, (page) => {
-        currentPageRecentes = page;
-        updateRecentesList();
-    });
+    // a API já devolve do mais recente para o mais antigo
+    listRecentes.cursors = [null];
+    return loadListPage(listRecentes, 1, searchInputRecentes, itemsListRecentes, paginationRecentes);
+}
+
+function debounce(fn, delay) {
+    let timer = null;
+    return (...args) => {
+        clearTimeout(timer);
+        timer = setTimeout(() => fn(...args), delay);
+    };
 }
 
 if (searchInputInicio) {
-    searchInputInicio.addEventListener('input', () => {
-        currentPageInicio = 1;
-        updateInicioList();
-    });
+    searchInputInicio.addEventListener('input', debounce(updateInicioList, SEARCH_DEBOUNCE_MS));
 }
 
 if (searchInputRecentes) {
-    searchInputRecentes.addEventListener('input', () => {
-        currentPageRecentes = 1;
-        updateRecentesList();
-    });
+    searchInputRecentes.addEventListener('input', debounce(updateRecentesList, SEARCH_DEBOUNCE_MS));
 }
 
 // ----------------- Modal de Blind Claim -----------------
@@ -326,30 +403,9 @@ if (claimForm) {
 
 // ----------------- Carregar itens da API -----------------
 
-async function loadItems() {
-    try {
-        const response = await fetch('/api/itens/');
-        if (!response.ok) {
-            throw new Error('Erro ao carregar itens');
-        }
-
-        const data = await response.json();
-        // data = [{id, name, location, date (YYYY-MM-DD), category, description, status}, ...]
-        allItems = data;
-
-        currentPageInicio = 1;
-        currentPageRecentes = 1;
-        updateInicioList();
-        updateRecentesList();
-    } catch (error) {
-        console.error(error);
-        if (itemsListInicio) {
-            itemsListInicio.innerHTML = '<p class="info-text">Não foi possível carregar os itens agora. Tente recarregar a página em alguns instantes.</p>';
-        }
-        if (itemsListRecentes) {
-            itemsListRecentes.innerHTML = '<p class="info-text">Não foi possível carregar os itens agora.</p>';
-        }
-    }
+function loadItems() {
+    updateInicioList();
+    updateRecentesList();
 }
 
 document.addEventListener('DOMContentLoaded', () => {
@@ -0,0 +1,103 @@
+# ============================================================
+# Achados e Perdidos - UnDF
+# Arquivo: streaming.py
+#
+# Respostas JSON em streaming para as listas internas grandes
+# (ex.: auditoria de fim de ano com o histórico inteiro).
+#
+# Em vez de montar a lista toda em memória e só depois mandar, leio o
+# queryset em blocos (FieldSet.rows com chunk_size, ver serializers.py)
+# e vou escrevendo o JSON conforme as linhas chegam. A memória fica do
+# tamanho de um bloco e o primeiro byte sai logo.
+# ============================================================
+
+import json
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import StreamingHttpResponse
+
+
+# Linhas lidas do banco por vez.
+CHUNK_SIZE = 500
+
+# Objetos juntados num único pedaço da resposta (menos chamadas de write).
+OBJECTS_PER_WRITE = 100
+
+# Valores aceitos em ?formato= nas listas internas.
+FORMATS = ("json", "json-stream", "ndjson")
+
+
+def _batches(rows):
+    batch = []
+    for row in rows:
+        batch.append(json.dumps(row, cls=DjangoJSONEncoder))
+        if len(batch) >= OBJECTS_PER_WRITE:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+async def _abatches(rows):
+    batch = []
+    async for row in rows:
+        batch.append(json.dumps(row, cls=DjangoJSONEncoder))
+        if len(batch) >= OBJECTS_PER_WRITE:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def json_array_chunks(rows):
+    """
+    Gera um array JSON ("[...]") em pedaços, a partir de dicionários.
+    """
+    yield "["
+    first = True
+    for batch in _batches(rows):
+        yield ("" if first else ",") + ",".join(batch)
+        first = False
+    yield "]"
+
+
+def ndjson_chunks(rows):
+    """
+    Gera NDJSON: um objeto JSON por linha (bom para processar linha a
+    linha do outro lado, ex.: `jq` ou scripts de auditoria).
+    """
+    for batch in _batches(rows):
+        yield "\n".join(batch) + "\n"
+
+
+async def ajson_array_chunks(rows):
+    """
+    json_array_chunks para um iterável async (FieldSet.arows).
+    """
+    yield "["
+    first = True
+    async for batch in _abatches(rows):
+        yield ("" if first else ",") + ",".join(batch)
+        first = False
+    yield "]"
+
+
+async def andjson_chunks(rows):
+    async for batch in _abatches(rows):
+        yield "\n".join(batch) + "\n"
+
+
+def streaming_json_response(rows, formato: str) -> StreamingHttpResponse:
+    """
+    Resposta em streaming para `formato` "json-stream" (array JSON, o
+    mesmo conteúdo da resposta normal) ou "ndjson". `rows` é um
+    iterável de dicionários, de preferência lido em blocos do banco;
+    pode ser async (views async), e aí o corpo sai sem ocupar thread
+    entre um bloco e outro.
+    """
+    if hasattr(rows, "__aiter__"):
+        chunks = andjson_chunks(rows) if formato == "ndjson" else ajson_array_chunks(rows)
+    else:
+        chunks = ndjson_chunks(rows) if formato == "ndjson" else json_array_chunks(rows)
+    content_type = "application/x-ndjson" if formato == "ndjson" else "application/json"
+    return StreamingHttpResponse(chunks, content_type=content_type)
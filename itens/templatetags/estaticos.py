@@ -0,0 +1,52 @@
+# ============================================================
+# Achados e Perdidos - UnDF
+# Arquivo: templatetags/estaticos.py
+#
+# {% imagem_responsiva %}: <picture> com as variantes WebP geradas no
+# collectstatic (ver assets.py) e o PNG/JPG original como reserva.
+# ============================================================
+
+from django import template
+from django.conf import settings
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.templatetags.static import static
+from django.utils.html import format_html
+
+from ..assets import WEBP_WIDTHS, webp_variant_name
+
+register = template.Library()
+
+
+def available_variants(path: str) -> list:
+    """
+    [(largura, nome)] das variantes WebP que estão no manifesto do
+    collectstatic. Em DEBUG (arquivos servidos direto do app) ou sem
+    manifesto não há variantes.
+    """
+    hashed_files = getattr(staticfiles_storage, "hashed_files", None)
+    if settings.DEBUG or not hashed_files:
+        return []
+    variants = []
+    for width in WEBP_WIDTHS:
+        name = webp_variant_name(path, width)
+        if name in hashed_files:
+            variants.append((width, name))
+    return variants
+
+
+@register.simple_tag
+def imagem_responsiva(path, alt="", sizes="100vw"):
+    """
+    Uso: {% imagem_responsiva 'itens/logo.pequena.png' alt="Logo" sizes="240px" %}
+    """
+    img = format_html('<img src="{}" alt="{}">', static(path), alt)
+    variants = available_variants(path)
+    if not variants:
+        return img
+    srcset = ", ".join(f"{static(name)} {width}w" for width, name in variants)
+    return format_html(
+        '<picture><source type="image/webp" srcset="{}" sizes="{}">{}</picture>',
+        srcset,
+        sizes,
+        img,
+    )
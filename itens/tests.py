@@ -1,3 +1,1510 @@
-from django.test import TestCase
+import asyncio
+import base64
+import csv
+import io
+import json
+import os
+import shutil
+import sqlite3
+import tempfile
+import threading
+from datetime import date, datetime, timedelta
 
-# Create your tests here.
+from asgiref.sync import async_to_sync
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.contenttypes.models import ContentType
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.core.cache import cache as django_cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import connection, connections, transaction
+from django.db.backends.sqlite3.base import DatabaseWrapper as SQLiteDatabaseWrapper
+from django.db.models import F
+from django.http import HttpResponse, StreamingHttpResponse
+from django.template import Context, Template
+from django.test import RequestFactory, SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from unittest import mock, skipUnless
+
+from . import assets, dedup, estatisticas, events, exporter, fila, matching, metrics, search, streaming, urls, views
+from .management.commands import benchmark_api
+from .models import AssinaturaLSH, Item, Reivindicacao, VersaoDados
+from .replica import ReplicaRouter, usa_replica
+from .services import TransicaoInvalida, alterar_status_reivindicacao
+
+
+class KeysetPaginationTests(TestCase):
+    """
+    Listagem pública por cursor (keyset): percorrer todas as páginas dá
+    exatamente a lista ordenada, sem repetir nem pular, mesmo com itens
+    empatados na data e na hora de cadastro (o id desempata).
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        criacao = timezone.make_aware(datetime(2025, 3, 10, 12, 0))
+        for i in range(23):
+            item = Item.objects.create(
+                nome=f"Item {i}",
+                local_encontrado="Bloco A",
+                data_encontrado=date(2025, 3, 1 + i % 3),
+                aprovado=i % 5 != 0,
+            )
+            # empates de propósito: 3 datas e só 2 horários de cadastro
+            Item.objects.filter(pk=item.pk).update(data_criacao=criacao + timedelta(minutes=i % 2))
+
+    def setUp(self):
+        django_cache.clear()
+
+    def walk(self, limit):
+        ids, cursor = [], None
+        while True:
+            params = {"limit": limit, "fields": "id"}
+            if cursor:
+                params["cursor"] = cursor
+            page = self.client.get(reverse("item_list_create"), params).json()
+            self.assertLessEqual(len(page["results"]), limit)
+            ids += [row["id"] for row in page["results"]]
+            cursor = page["next_cursor"]
+            if cursor is None:
+                return ids
+
+    def test_walking_all_pages_matches_ordered_queryset(self):
+        expected = list(
+            Item.objects.filter(status="Em estoque", aprovado=True)
+            .order_by("-data_encontrado", "-data_criacao", "-id")
+            .values_list("id", flat=True)
+        )
+        for limit in (1, 4, 7, 100):
+            with self.subTest(limit=limit):
+                self.assertEqual(self.walk(limit), expected)
+
+    def test_malformed_cursor_or_limit_is_rejected(self):
+        url = reverse("item_list_create")
+        bad_cursor = base64.urlsafe_b64encode(b'["2025-03-01", 1]').decode()
+        for params in ({"cursor": "???"}, {"cursor": "bm9wZQ=="}, {"cursor": bad_cursor}, {"limit": "dez"}):
+            with self.subTest(params=params):
+                self.assertEqual(self.client.get(url, params).status_code, 400)
+
+
+@skipUnless(connection.vendor == "sqlite", "EXPLAIN QUERY PLAN é específico do SQLite")
+class QueryPlanTests(TestCase):
+    """
+    Garante que as listagens usam os índices da migração 0005.
+
+    Capturo o SQL que a própria view executa e rodo EXPLAIN QUERY PLAN
+    nele: se alguém mudar o queryset e o índice deixar de servir, o plano
+    volta a ter SCAN da tabela inteira ou "USE TEMP B-TREE" (ordenação
+    em memória) e o teste quebra.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        for i in range(30):
+            item = Item.objects.create(
+                nome=f"Carteira {i}",
+                local_encontrado="Bloco A",
+                data_encontrado=date(2025, 1, 1 + i % 5),
+                aprovado=i % 2 == 0,
+            )
+            Reivindicacao.objects.create(
+                item=item,
+                nome_requerente=f"Pessoa {i}",
+                detalhes="Tem meu nome por dentro.",
+            )
+
+    def query_plans(self, url, table):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+
+        plans = []
+        for query in ctx.captured_queries:
+            # a consulta do contador (cache.request_state) não interessa aqui
+            if f'FROM "{table}"' not in query["sql"] or "itens_versaodados" in query["sql"]:
+                continue
+            with connection.cursor() as cursor:
+                cursor.execute("EXPLAIN QUERY PLAN " + query["sql"])
+                plans.append(" | ".join(row[-1] for row in cursor.fetchall()))
+        self.assertTrue(plans, f"nenhuma consulta em {table} para {url}")
+        return response, plans
+
+    def assertUsesIndex(self, plans, index_name):
+        for plan in plans:
+            self.assertIn(f"USING INDEX {index_name}", plan)
+            self.assertNotIn("USE TEMP B-TREE", plan)
+
+    def test_public_list_uses_partial_index(self):
+        response, plans = self.query_plans(
+            reverse("item_list_create") + "?limit=5", "itens_item"
+        )
+        self.assertUsesIndex(plans, "item_publico_idx")
+
+        cursor = response.json()["next_cursor"]
+        _, plans = self.query_plans(
+            reverse("item_list_create") + f"?limit=5&cursor={cursor}", "itens_item"
+        )
+        self.assertUsesIndex(plans, "item_publico_idx")
+        for plan in plans:
+            # com cursor o banco tem que buscar (SEARCH), não varrer o índice
+            self.assertIn("SEARCH itens_item USING INDEX item_publico_idx", plan)
+
+    def test_internal_items_list_uses_date_index(self):
+        _, plans = self.query_plans(reverse("internal_items_list"), "itens_item")
+        self.assertUsesIndex(plans, "item_data_idx")
+
+    def test_internal_claims_list_uses_envio_index(self):
+        _, plans = self.query_plans(
+            reverse("internal_claims_list"), "itens_reivindicacao"
+        )
+        self.assertUsesIndex(plans, "reivindicacao_envio_idx")
+
+
+class SearchTests(TestCase):
+    """
+    Busca textual (search.py): acentos, prefixo de palavra, ordem por
+    relevância (bm25) e a tabela FTS acompanhando o que acontece com os
+    itens (save, importação, exclusão).
+    """
+
+    def setUp(self):
+        # checado aqui e não no decorator: no import o banco de testes
+        # ainda não existe
+        if not search.fts_available():
+            self.skipTest("SQLite sem FTS5")
+        django_cache.clear()
+        self.celular = Item.objects.create(
+            nome="Celular Samsung", descricao="Capinha azul", local_encontrado="Bloco A",
+            data_encontrado=date(2025, 3, 1), aprovado=True,
+        )
+        self.carteira = Item.objects.create(
+            nome="Carteira de couro", descricao="Com cartão do celular", local_encontrado="Biblioteca",
+            data_encontrado=date(2025, 3, 2), aprovado=True,
+        )
+
+    def ids(self, term, view="item_search"):
+        response = self.client.get(reverse(view), {"q": term, "fields": "id"})
+        self.assertEqual(response.status_code, 200)
+        return [row["id"] for row in response.json()["results"]]
+
+    def indexed(self, item_id):
+        with connection.cursor() as cursor:
+            cursor.execute(f"SELECT nome FROM {search.FTS_TABLE} WHERE rowid = %s", [item_id])
+            row = cursor.fetchone()
+        return row[0] if row else None
+
+    def test_accents_prefix_and_ranking(self):
+        self.assertEqual(self.ids("cartao"), [self.carteira.pk])
+        self.assertEqual(self.ids("CART"), [self.carteira.pk])
+        # prefixo de palavra, não pedaço no meio: "elular" não acha "Celular"
+        self.assertEqual(self.ids("elular"), [])
+        # no nome pesa mais que na descrição, mesmo o outro sendo mais novo
+        self.assertEqual(self.ids("celular"), [self.celular.pk, self.carteira.pk])
+        self.assertEqual(self.ids("celular azul", "item_list_create"), [self.celular.pk])
+
+    def test_index_follows_save_import_and_delete(self):
+        self.celular.nome = "Tablet Samsung"
+        self.celular.save()
+        self.assertEqual(self.indexed(self.celular.pk), "Tablet Samsung")
+        self.assertEqual(self.ids("tablet"), [self.celular.pk])
+
+        upload = SimpleUploadedFile(
+            "itens.csv", "nome,local_encontrado,data_encontrado,aprovado\nGuarda-chuva,RU,2025-03-05,sim\n".encode()
+        )
+        self.client.post(reverse("internal_items_import"), {"arquivo": upload})
+        guarda_chuva = Item.objects.get(nome="Guarda-chuva")
+        self.assertEqual(self.ids("guarda chuva"), [guarda_chuva.pk])
+
+        self.carteira.delete()
+        self.assertIsNone(self.indexed(self.carteira.pk))
+        self.assertEqual(self.ids("carteira"), [])
+
+
+class CacheInvalidationTests(TestCase):
+    """
+    Cache versionado (cache.py): a listagem pública e a busca saem do
+    cache enquanto nada muda e são remontadas depois de qualquer
+    gravação (criação, edição, lote e exclusão).
+    """
+
+    def setUp(self):
+        django_cache.clear()
+        self.item = Item.objects.create(
+            nome="Mochila preta", local_encontrado="Bloco A", data_encontrado=date(2025, 3, 1), aprovado=True,
+        )
+
+    def names(self, view, **params):
+        response = self.client.get(reverse(view), {"fields": "name", **params})
+        return [row["name"] for row in response.json()["results"]]
+
+    def test_cached_until_something_is_written(self):
+        self.assertEqual(self.names("item_list_create"), ["Mochila preta"])
+        # acerto: só a consulta do estado (versão), nada em itens_item
+        with self.assertNumQueries(1):
+            self.assertEqual(self.names("item_list_create"), ["Mochila preta"])
+
+        Item.objects.create(nome="Garrafa", local_encontrado="RU", data_encontrado=date(2025, 3, 2), aprovado=True)
+        self.assertEqual(self.names("item_list_create"), ["Garrafa", "Mochila preta"])
+
+        self.assertEqual(self.names("item_search", q="mochila"), ["Mochila preta"])
+        self.item.nome = "Mochila azul"
+        self.item.save()
+        self.assertEqual(self.names("item_search", q="mochila"), ["Mochila azul"])
+
+        self.client.post(
+            reverse("internal_items_bulk"),
+            json.dumps({"ids": [self.item.pk], "acao": "desaprovar"}),
+            content_type="application/json",
+        )
+        self.assertEqual(self.names("item_list_create"), ["Garrafa"])
+        self.assertEqual(self.names("item_search", q="mochila"), [])
+
+        Item.objects.get(nome="Garrafa").delete()
+        self.assertEqual(self.names("item_list_create"), [])
+
+
+class RevisionSyncTests(TestCase):
+    """
+    Sincronização por revisão (?since= nas listas internas): só o que
+    mudou depois da revisão pedida, inclusive UPDATE em lote, e os ids
+    apagados (lápides em Remocao).
+    """
+
+    def setUp(self):
+        self.items = [
+            Item.objects.create(nome=f"Item {i}", local_encontrado="Bloco A", data_encontrado=date(2025, 3, 1))
+            for i in range(5)
+        ]
+        self.claim = Reivindicacao.objects.create(item=self.items[0], nome_requerente="Ana", detalhes="É meu")
+
+    def sync(self, view, since):
+        response = self.client.get(reverse(view), {"since": since, "fields": "id"})
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        self.assertEqual(response["X-Revisao"], str(data["revisao"]))
+        return data
+
+    def test_since_returns_changes_and_tombstones(self):
+        since = self.sync("internal_items_list", 0)["revisao"]
+        self.assertEqual(self.sync("internal_items_list", since)["alterados"], [])
+
+        self.items[0].nome = "Renomeado"
+        self.items[0].save()
+        Item.objects.filter(pk__in=[self.items[1].pk, self.items[2].pk]).update_revisado(aprovado=True)
+        removido = self.items[3].pk
+        self.items[3].delete()
+
+        data = self.sync("internal_items_list", since)
+        self.assertEqual(
+            sorted(row["id"] for row in data["alterados"]),
+            [self.items[0].pk, self.items[1].pk, self.items[2].pk],
+        )
+        self.assertEqual(data["removidos"], [removido])
+        self.assertGreater(data["revisao"], since)
+        # a partir da revisão nova, nada
+        data = self.sync("internal_items_list", data["revisao"])
+        self.assertEqual((data["alterados"], data["removidos"]), ([], []))
+
+        # reivindicações: o delete em cascata do item também deixa lápide
+        since = self.sync("internal_claims_list", 0)["revisao"]
+        self.items[0].delete()
+        data = self.sync("internal_claims_list", since)
+        self.assertEqual((data["alterados"], data["removidos"]), ([], [self.claim.pk]))
+
+    def test_bad_since_is_rejected(self):
+        for since in ("abc", "-1", "1.5"):
+            with self.subTest(since=since):
+                response = self.client.get(reverse("internal_items_list"), {"since": since})
+                self.assertEqual(response.status_code, 400)
+
+
+class EventsTests(TestCase):
+    """
+    SSE do painel (internal_events): 501 fora do ASGI e, no ASGI, o
+    evento publicado no broker chega como um frame text/event-stream.
+    """
+
+    def test_wsgi_gets_501(self):
+        self.assertEqual(self.client.get(reverse("internal_events")).status_code, 501)
+
+    # o vigia de versões consulta o banco em outra thread; aqui não interessa
+    @mock.patch.object(events.Broker, "_watch_versions", mock.AsyncMock())
+    async def test_published_event_reaches_the_stream(self):
+        response = await self.async_client.get(reverse("internal_events"))
+        self.assertEqual(response["Content-Type"], "text/event-stream")
+        chunks = aiter(response.streaming_content)
+        try:
+            self.assertEqual(await anext(chunks), b"retry: 5000\n\n")
+            events.broker.publish("reivindicacao-criada", {"id": 7})
+            frame = await asyncio.wait_for(anext(chunks), 1)
+        finally:
+            await chunks.aclose()
+            # o wrapper do client não fecha o gerador da view na hora
+            for subscription in list(events.broker._subscribers):
+                events.broker.unsubscribe(subscription)
+
+        self.assertEqual(frame, b'event: reivindicacao-criada\ndata: {"id": 7}\n\n')
+
+
+@mock.patch.object(streaming, "OBJECTS_PER_WRITE", 4)
+@mock.patch.object(streaming, "CHUNK_SIZE", 10)
+class StreamingTests(TestCase):
+    """
+    Listas internas em streaming (?formato=json-stream / ndjson), com
+    mais linhas que um bloco de leitura (CHUNK_SIZE): o corpo junto é
+    o mesmo JSON da resposta normal, ou um objeto por linha.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        item = Item.objects.create(nome="Mochila", local_encontrado="Biblioteca", data_encontrado=date(2025, 3, 1))
+        for i in range(23):
+            Reivindicacao.objects.create(item=item, nome_requerente=f"P{i}", detalhes="É minha")
+
+    def body(self, view, formato):
+        response = self.client.get(reverse(view), {"formato": formato})
+        self.assertTrue(response.streaming)
+        if response.is_async:
+            async def consume():
+                return [chunk async for chunk in response.streaming_content]
+
+            chunks = async_to_sync(consume)()
+        else:
+            chunks = list(response.streaming_content)
+        self.assertGreater(len(chunks), 3)
+        return b"".join(chunks).decode()
+
+    def test_joined_stream_is_valid_json_or_ndjson(self):
+        expected = self.client.get(reverse("internal_claims_list")).json()
+        self.assertEqual(len(expected), 23)
+
+        for view in ("internal_claims_list", "internal_claims_list_async"):
+            with self.subTest(view=view):
+                self.assertEqual(json.loads(self.body(view, "json-stream")), expected)
+                lines = self.body(view, "ndjson").splitlines()
+                self.assertEqual([json.loads(line) for line in lines], expected)
+
+
+class FieldsParamTests(TestCase):
+    """
+    ?fields= (serializers.py): só os campos pedidos (mais o id) no JSON
+    e só as colunas deles no SELECT; campo desconhecido é 400.
+    """
+
+    def setUp(self):
+        django_cache.clear()
+        item = Item.objects.create(
+            nome="Mochila", descricao="Azul com chaveiro", local_encontrado="Biblioteca",
+            data_encontrado=date(2025, 3, 1), aprovado=True,
+        )
+        Reivindicacao.objects.create(item=item, nome_requerente="Ana", detalhes="Tem meu nome na etiqueta")
+
+    def get(self, view, fields):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(reverse(view), {"fields": fields})
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        rows = data["results"] if isinstance(data, dict) else data
+        selects = [
+            query["sql"].split(" FROM ")[0] for query in ctx.captured_queries
+            if query["sql"].startswith("SELECT") and "itens_versaodados" not in query["sql"]
+        ]
+        return rows, " ".join(selects)
+
+    def test_subset_is_returned_and_selected(self):
+        rows, select = self.get("item_list_create", "name,date")
+        self.assertEqual(list(rows[0]), ["id", "name", "date"])
+        self.assertIn('"nome"', select)
+        self.assertNotIn('"descricao"', select)
+
+        rows, select = self.get("internal_claims_list", "status,item.nome")
+        self.assertEqual(rows[0], {"id": rows[0]["id"], "status": "Pendente", "item": {"nome": "Mochila"}})
+        self.assertNotIn('"detalhes"', select)
+
+        # prefixo "item" = todos os item.*
+        rows, _ = self.get("internal_claims_list", "item")
+        self.assertEqual(set(rows[0]["item"]), {"id", "nome", "local_encontrado", "data_encontrado", "status", "aprovado"})
+
+    def test_unknown_field_is_rejected(self):
+        for view in ("item_list_create", "item_search", "internal_items_list", "internal_claims_list"):
+            with self.subTest(view=view):
+                response = self.client.get(reverse(view), {"fields": "nome,senha", "q": "mochila"})
+                self.assertEqual(response.status_code, 400)
+
+
+class BulkModerationTests(TestCase):
+    """
+    Ações em lote (internal_items_bulk): resultado por id e uma revisão
+    só para o lote inteiro.
+    """
+
+    def setUp(self):
+        self.items = [
+            Item.objects.create(nome=f"Item {i}", local_encontrado="Bloco A", data_encontrado=date(2025, 3, 1))
+            for i in range(3)
+        ]
+        self.items[2].status = "Devolvido"
+        self.items[2].save()
+
+    def bulk(self, data):
+        return self.client.post(reverse("internal_items_bulk"), json.dumps(data), content_type="application/json")
+
+    def test_results_per_id_and_one_revision(self):
+        first, second, returned = (item.pk for item in self.items)
+        missing = returned + 100
+        versao = VersaoDados.objects.get(nome=Item.CONJUNTO).versao
+
+        response = self.bulk({"ids": [first, missing, returned, second, first], "acao": "devolver"})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), {
+            "acao": "devolver",
+            "alterados": 2,
+            "resultados": [
+                {"id": first, "resultado": "ok", "status": "Devolvido"},
+                {"id": missing, "resultado": "nao_encontrado"},
+                {"id": returned, "resultado": "sem_alteracao", "status": "Devolvido"},
+                {"id": second, "resultado": "ok", "status": "Devolvido"},
+            ],
+        })
+        self.assertEqual(VersaoDados.objects.get(nome=Item.CONJUNTO).versao, versao + 1)
+        revisoes = dict(Item.objects.values_list("pk", "revisao"))
+        self.assertEqual(revisoes[first], versao + 1)
+        self.assertEqual(revisoes[second], versao + 1)
+        self.assertLess(revisoes[returned], versao + 1)
+        self.assertFalse(Item.objects.filter(status="Devolvido", devolvido_em__isnull=True).exists())
+
+    def test_invalid_requests(self):
+        for data in (
+            {"ids": [1], "acao": "apagar"},
+            {"ids": [], "acao": "aprovar"},
+            {"ids": ["1", True], "acao": "aprovar"},
+            {"ids": list(range(views.BULK_MAX_IDS + 1)), "acao": "aprovar"},
+        ):
+            with self.subTest(data=data):
+                self.assertEqual(self.bulk(data).status_code, 400)
+
+
+class ImportTests(TestCase):
+    """
+    Importação em lote (importer.py / internal_items_import): erros por
+    linha, válidas gravadas e versão, busca e índice de duplicados em dia
+    (o bulk_create não passa pelo save nem pelos sinais).
+    """
+
+    FILES = {
+        "itens.csv": (
+            "nome,local_encontrado,data_encontrado,categoria,aprovado\n"
+            "Garrafa azul,RU,2025-03-01,Acessórios,sim\n"
+            ",Bloco A,2025-03-01,,\n"
+            "Caderno,Biblioteca,01/03/2025,,\n"
+            "Chave com chaveiro,Bloco B,2025-03-02,,\n"
+        ),
+        "itens.json": json.dumps([
+            {"nome": "Garrafa azul", "local_encontrado": "RU", "data_encontrado": "2025-03-01", "aprovado": True},
+            "não é um objeto",
+            {"nome": "Caderno", "local_encontrado": "Biblioteca"},
+            {"nome": "Chave com chaveiro", "local_encontrado": "Bloco B", "data_encontrado": "2025-03-02"},
+        ]),
+        "itens.ndjson": (
+            '{"nome": "Garrafa azul", "local_encontrado": "RU", "data_encontrado": "2025-03-01"}\n'
+            "{quebrado\n"
+            "\n"
+            '{"nome": "Caderno", "local_encontrado": "Biblioteca", "data_encontrado": "2025-13-01"}\n'
+            '{"nome": "Chave com chaveiro", "local_encontrado": "Bloco B", "data_encontrado": "2025-03-02"}\n'
+        ),
+    }
+
+    ERRORS = {
+        "itens.csv": [(3, "Campos obrigatórios faltando"), (4, "Formato de data inválido")],
+        "itens.json": [(2, "Linha inválida (esperado um objeto JSON)"), (3, "Campos obrigatórios faltando")],
+        "itens.ndjson": [(2, "Linha inválida (esperado um objeto JSON)"), (4, "Formato de data inválido")],
+    }
+
+    def test_each_format_reports_bad_rows_and_indexes_good_ones(self):
+        for filename, content in self.FILES.items():
+            with self.subTest(arquivo=filename):
+                Item.objects.all().delete()
+                antes = VersaoDados.objects.filter(nome=Item.CONJUNTO).values_list("versao", flat=True).first() or 0
+
+                response = self.client.post(
+                    reverse("internal_items_import"),
+                    {"arquivo": SimpleUploadedFile(filename, content.encode()), "lote": "1"},
+                )
+
+                self.assertEqual(response.status_code, 200)
+                report = response.json()
+                self.assertEqual((report["linhas"], report["importados"]), (4, 2))
+                self.assertEqual([(erro["linha"], erro["erro"]) for erro in report["erros"]], self.ERRORS[filename])
+
+                itens = list(Item.objects.order_by("pk"))
+                self.assertEqual([item.nome for item in itens], ["Garrafa azul", "Chave com chaveiro"])
+                # lote de 1: uma versão por item, e o total em dia
+                versao = VersaoDados.objects.get(nome=Item.CONJUNTO)
+                self.assertEqual((versao.versao, versao.total), (antes + 2, 2))
+                self.assertEqual([item.revisao for item in itens], [antes + 1, antes + 2])
+                self.assertEqual(
+                    set(AssinaturaLSH.objects.values_list("item_id", flat=True)), {item.pk for item in itens}
+                )
+                if search.fts_available():
+                    self.assertEqual(list(search.filter_items(Item.objects.all(), "garrafa")), itens[:1])
+                    self.assertEqual(list(search.filter_items(Item.objects.all(), "chaveiro")), itens[1:])
+
+    def test_bad_upload_is_rejected(self):
+        url = reverse("internal_items_import")
+        for data in (
+            {},
+            {"arquivo": SimpleUploadedFile("itens.txt", b"x")},
+            {"arquivo": SimpleUploadedFile("itens.csv", b"nome,data_encontrado\nA,2025-03-01\n")},
+            {"arquivo": SimpleUploadedFile("itens.csv", "nome\n".encode("latin-1") + b"\xe7\n")},
+            {"arquivo": SimpleUploadedFile("itens.json", b'{"nome": "A"}')},
+            {"arquivo": SimpleUploadedFile("itens.csv", b"nome\n"), "lote": "0"},
+        ):
+            with self.subTest(data=data):
+                self.assertEqual(self.client.post(url, data).status_code, 400)
+        self.assertFalse(Item.objects.exists())
+
+    def test_panel_form_keeps_its_own_messages(self):
+        url = reverse("internal_item_create")
+        for body in ("[1, 2]", '"texto"', "{"):
+            with self.subTest(body=body):
+                response = self.client.post(url, body, content_type="application/json")
+                self.assertEqual((response.status_code, response.content.decode()), (400, "JSON inválido"))
+        self.assertFalse(Item.objects.exists())
+
+
+@mock.patch.object(exporter, "CHUNK_SIZE", 3)
+class ExportTests(TestCase):
+    """
+    Exportação (exporter.py): CSV e colunar, lidos de volta, batem com
+    o banco, com vários grupos (o dicionário do colunar vai acumulando
+    entre eles).
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        for i in range(8):
+            item = Item.objects.create(
+                nome=f"Item {i}", descricao="Linha 1\nlinha 2, com vírgula" if i == 2 else None,
+                categoria=("Eletrônicos", "Documentos", None)[i % 3], local_encontrado="Bloco A",
+                data_encontrado=date(2025, 3, 1 + i), aprovado=i % 2 == 0,
+            )
+            Reivindicacao.objects.create(item=item, nome_requerente=f"P{i}", detalhes="É meu", vinculo="Estudante")
+
+    def expected(self, conjunto, convert):
+        model, columns = exporter.DATASETS[conjunto]
+        return [
+            {column: convert(value) for column, value in zip(columns, row)}
+            for row in model.objects.order_by("id").values_list(*columns)
+        ]
+
+    def download(self, conjunto, formato):
+        response = self.client.get(reverse("internal_export", args=[conjunto]), {"formato": formato})
+        self.assertEqual(response.status_code, 200)
+        return b"".join(response.streaming_content).decode()
+
+    def test_csv_and_columnar_round_trip(self):
+        for conjunto in exporter.DATASETS:
+            with self.subTest(conjunto=conjunto):
+                rows = list(csv.DictReader(io.StringIO(self.download(conjunto, "csv"), newline="")))
+                self.assertEqual(rows, self.expected(conjunto, lambda value: "" if value is None else str(value)))
+
+                lines = self.download(conjunto, "colunar").splitlines()
+                self.assertEqual(len(lines), 1 + 3)  # cabeçalho + 8 linhas em grupos de 3
+                self.assertEqual(
+                    list(exporter.read_columnar(lines)),
+                    self.expected(conjunto, lambda value: value.isoformat() if hasattr(value, "isoformat") else value),
+                )
+
+    def test_command_writes_file(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, "itens.ndjson")
+            call_command("exportar", "itens", "--formato", "colunar", "--saida", path, stderr=io.StringIO())
+            with open(path, encoding="utf-8") as saida:
+                self.assertEqual(len(list(exporter.read_columnar(saida))), 8)
+
+    def test_export_reads_from_replica(self):
+        bancos = []
+
+        def chunks(conjunto):
+            bancos.append(ReplicaRouter().db_for_read(Item))
+            return iter(())
+
+        with mock.patch("itens.replica.replica_configurada", return_value=True), \
+                mock.patch.object(exporter, "_chunks", chunks):
+            self.download("itens", "csv")
+        self.assertEqual(bancos, ["replica"])
+
+
+@skipUnless(connection.vendor == "sqlite", "perfis do SQLite")
+class SqlitePerfilTests(SimpleTestCase):
+    """
+    Perfil "wal" (settings.SQLITE_PERFIS): os PRAGMAs valem em cada
+    conexão nova e todo atomic() começa com BEGIN IMMEDIATE. O banco de
+    testes fica em memória (sem WAL), então abro um arquivo à parte.
+    """
+
+    def test_wal_profile_pragmas_and_immediate_transactions(self):
+        tmpdir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, tmpdir, ignore_errors=True)
+        wrapper = SQLiteDatabaseWrapper({
+            **connection.settings_dict,
+            "NAME": os.path.join(tmpdir, "perfil.sqlite3"),
+            "OPTIONS": dict(settings.SQLITE_PERFIS["wal"]),
+        }, alias="perfil")
+        self.addCleanup(wrapper.close)
+
+        def pragma(name):
+            with wrapper.cursor() as cursor:
+                cursor.execute(f"PRAGMA {name}")
+                return cursor.fetchone()[0]
+
+        self.assertEqual(pragma("journal_mode"), "wal")
+        self.assertEqual(pragma("synchronous"), 1)  # NORMAL
+        self.assertEqual(pragma("busy_timeout"), settings.SQLITE_PERFIS["wal"]["timeout"] * 1000)
+        self.assertEqual(pragma("temp_store"), 2)  # MEMORY
+
+        # um atomic() só de leitura já segura a trava de escrita
+        connections["perfil"] = wrapper
+        self.addCleanup(connections.__delitem__, "perfil")
+        outra = sqlite3.connect(wrapper.settings_dict["NAME"], timeout=0, isolation_level=None)
+        self.addCleanup(outra.close)
+        with transaction.atomic(using="perfil"):
+            with self.assertRaisesRegex(sqlite3.OperationalError, "locked"):
+                outra.execute("BEGIN IMMEDIATE")
+        outra.execute("BEGIN IMMEDIATE")
+        outra.execute("ROLLBACK")
+
+
+@mock.patch("itens.replica.replica_configurada", return_value=True)
+class ReplicaRouterTests(SimpleTestCase):
+    """
+    Só as views marcadas com @usa_replica leem da réplica (e só nos
+    métodos de leitura); escritas sempre vão para o primário.
+    """
+
+    router = ReplicaRouter()
+
+    def db_in_view(self, method, streaming=False):
+        @usa_replica()
+        def view(request):
+            if streaming:
+                return StreamingHttpResponse(
+                    self.router.db_for_read(Item).encode() for _ in range(2)
+                )
+            return HttpResponse(
+                f"{self.router.db_for_read(Item)} {self.router.db_for_write(Item)}"
+            )
+
+        request = getattr(RequestFactory(), method.lower())("/")
+        response = view(request)
+        if streaming:
+            return b"".join(response.streaming_content).decode()
+        return response.content.decode()
+
+    def test_get_reads_from_replica(self, _):
+        self.assertEqual(self.db_in_view("GET"), "replica default")
+
+    def test_post_stays_on_primary(self, _):
+        self.assertEqual(self.db_in_view("POST"), "default default")
+
+    def test_streaming_body_reads_from_replica(self, _):
+        self.assertEqual(self.db_in_view("GET", streaming=True), "replicareplica")
+
+    def test_outside_views_reads_from_primary(self, _):
+        self.assertEqual(self.router.db_for_read(Item), "default")
+
+
+class ContadoresTests(TestCase):
+    """
+    Contadores de reivindicações do item (Item.CONTADORES) mantidos por
+    qualquer caminho que passe pelo save()/delete(), e o
+    recontar_reivindicacoes para o que escapar.
+    """
+
+    def setUp(self):
+        self.item = Item.objects.create(nome="Mochila", local_encontrado="Biblioteca", data_encontrado=date(2025, 3, 1))
+        self.outro = Item.objects.create(nome="Garrafa", local_encontrado="Bloco A", data_encontrado=date(2025, 3, 1))
+
+    def counters(self, item=None):
+        item = Item.objects.get(pk=(item or self.item).pk)
+        return (item.reivindicacoes_pendentes, item.reivindicacoes_aprovadas, item.reivindicacoes_recusadas)
+
+    def claim(self, item=None, **fields):
+        return Reivindicacao.objects.create(item=item or self.item, nome_requerente="Ana", detalhes="É meu", **fields)
+
+    def test_create_save_and_delete(self):
+        claims = [self.claim(), self.claim(), self.claim(status="Recusada")]
+        self.assertEqual(self.counters(), (2, 0, 1))
+
+        claims[0].status = "Aprovada"
+        claims[0].save()
+        claims[0].save()  # sem mudança: não conta de novo
+        self.assertEqual(self.counters(), (1, 1, 1))
+
+        # carregada de novo (from_db) e montada na mão só com a pk
+        rev = Reivindicacao.objects.get(pk=claims[1].pk)
+        rev.status = "Recusada"
+        rev.save(update_fields=["status"])
+        Reivindicacao(pk=claims[2].pk, item=self.item, status="Pendente").save(update_fields=["status"])
+        self.assertEqual(self.counters(), (1, 1, 1))
+
+        claims[0].item = self.outro
+        claims[0].save()
+        self.assertEqual((self.counters(), self.counters(self.outro)), ((1, 0, 1), (0, 1, 0)))
+
+        rev.delete()
+        Reivindicacao.objects.filter(pk=claims[2].pk).delete()
+        self.assertEqual(self.counters(), (0, 0, 0))
+
+    def test_admin_change_and_delete(self):
+        User = get_user_model()
+        self.client.force_login(User.objects.create_superuser("admin", "admin@exemplo.edu.br", "senha"))
+        rev = self.claim()
+        data = {"item": self.item.pk, "nome_requerente": "Ana", "detalhes": "É meu", "status": "Aprovada"}
+
+        response = self.client.post(reverse("admin:itens_reivindicacao_change", args=[rev.pk]), data)
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(self.counters(), (0, 1, 0))
+
+        response = self.client.post(reverse("admin:itens_reivindicacao_delete", args=[rev.pk]), {"post": "yes"})
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(self.counters(), (0, 0, 0))
+
+    def test_item_delete_cascades_without_touching_counters(self):
+        self.claim()
+        self.claim(status="Aprovada")
+        item_id = self.item.pk
+
+        with CaptureQueriesContext(connection) as ctx:
+            self.item.delete()
+
+        self.assertFalse(Reivindicacao.objects.filter(item_id=item_id).exists())
+        self.assertFalse(any(q["sql"].startswith('UPDATE "itens_item"') for q in ctx), [q["sql"] for q in ctx])
+
+    def test_claim_keeps_public_etag(self):
+        Item.objects.filter(pk=self.item.pk).update(aprovado=True)
+        publica, interna = reverse("item_list_create"), reverse("internal_items_list")
+        etags = {url: self.client.get(url)["ETag"] for url in (publica, interna)}
+        revisao = Item.objects.get(pk=self.item.pk).revisao
+
+        response = self.client.post(
+            reverse("item_claim_create", args=[self.item.pk]),
+            json.dumps({"nome": "Ana", "detalhes": "É meu"}),
+            content_type="application/json",
+        )
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(self.counters(), (1, 0, 0))
+        self.assertEqual(Item.objects.get(pk=self.item.pk).revisao, revisao)
+        self.assertEqual(self.client.get(publica, HTTP_IF_NONE_MATCH=etags[publica]).status_code, 304)
+        # o painel mostra os contadores: para ele a lista mudou
+        response = self.client.get(interna, HTTP_IF_NONE_MATCH=etags[interna])
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            next(row for row in response.json() if row["id"] == self.item.pk)["reivindicacoes_pendentes"], 1
+        )
+
+    def test_recontar_reivindicacoes(self):
+        self.claim()
+        self.claim(item=self.outro, status="Recusada")
+        Item.objects.filter(pk=self.item.pk).update(reivindicacoes_pendentes=5, reivindicacoes_aprovadas=1)
+        revisao = Item.objects.get(pk=self.item.pk).revisao
+
+        out = io.StringIO()
+        call_command("recontar_reivindicacoes", "--simular", stdout=out)
+        self.assertIn("1 itens com contadores errados", out.getvalue())
+        self.assertEqual(self.counters(), (5, 1, 0))
+
+        out = io.StringIO()
+        call_command("recontar_reivindicacoes", stdout=out)
+        self.assertIn("1 itens corrigidos", out.getvalue())
+        self.assertEqual((self.counters(), self.counters(self.outro)), ((1, 0, 0), (0, 0, 1)))
+        # o item corrigido ganha revisão nova (o painel recebe no ?since=)
+        self.assertGreater(Item.objects.get(pk=self.item.pk).revisao, revisao)
+
+        out = io.StringIO()
+        call_command("recontar_reivindicacoes", stdout=out)
+        self.assertIn("0 itens corrigidos", out.getvalue())
+
+
+class ClaimTransitionTests(TestCase):
+    """
+    Regras de services.alterar_status_reivindicacao: uma aprovação por
+    item, concorrentes recusadas e contadores do item em dia.
+    """
+
+    def setUp(self):
+        self.item = Item.objects.create(
+            nome="Mochila", local_encontrado="Biblioteca", data_encontrado=date(2025, 3, 1)
+        )
+        self.claims = [
+            Reivindicacao.objects.create(item=self.item, nome_requerente=f"P{i}", detalhes="azul")
+            for i in range(3)
+        ]
+
+    def counters(self):
+        self.item.refresh_from_db()
+        return (
+            self.item.status,
+            self.item.reivindicacoes_pendentes,
+            self.item.reivindicacoes_aprovadas,
+            self.item.reivindicacoes_recusadas,
+        )
+
+    def test_approval_refuses_competing_claims(self):
+        result = alterar_status_reivindicacao(self.claims[0].pk, "Aprovada")
+
+        self.assertEqual(result["recusadas"], 2)
+        self.assertEqual(self.counters(), ("Reivindicado", 0, 1, 2))
+        self.assertEqual(
+            list(Reivindicacao.objects.order_by("pk").values_list("status", flat=True)),
+            ["Aprovada", "Recusada", "Recusada"],
+        )
+
+    def test_second_approval_is_rejected(self):
+        alterar_status_reivindicacao(self.claims[0].pk, "Aprovada")
+        with self.assertRaises(TransicaoInvalida):
+            alterar_status_reivindicacao(self.claims[1].pk, "Aprovada")
+        self.assertEqual(self.counters(), ("Reivindicado", 0, 1, 2))
+
+    def test_back_to_stock_does_not_allow_second_approval(self):
+        alterar_status_reivindicacao(self.claims[0].pk, "Aprovada")
+        self.client.post(reverse("internal_item_back_to_stock", args=[self.item.pk]))
+
+        response = self.client.post(
+            reverse("internal_claim_update_status", args=[self.claims[1].pk]),
+            json.dumps({"status": "Aprovada"}),
+            content_type="application/json",
+        )
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(self.counters(), ("Em estoque", 0, 1, 2))
+
+        # desfeita a aprovação antiga, a nova passa
+        alterar_status_reivindicacao(self.claims[0].pk, "Recusada")
+        alterar_status_reivindicacao(self.claims[1].pk, "Aprovada")
+        self.assertEqual(self.counters(), ("Reivindicado", 0, 1, 2))
+        self.assertEqual(Reivindicacao.objects.filter(status="Aprovada").get().pk, self.claims[1].pk)
+
+    def test_undoing_approval_puts_item_back_in_stock(self):
+        alterar_status_reivindicacao(self.claims[0].pk, "Aprovada")
+        alterar_status_reivindicacao(self.claims[0].pk, "Pendente")
+        self.assertEqual(self.counters(), ("Em estoque", 1, 0, 2))
+
+    def test_approval_query_count(self):
+        with CaptureQueriesContext(connection) as ctx:
+            alterar_status_reivindicacao(self.claims[0].pk, "Aprovada")
+
+        # leitura travada + as duas versões num comando + UPDATE nas
+        # reivindicações e no item
+        sqls = [q["sql"] for q in ctx if "SAVEPOINT" not in q["sql"]]
+        self.assertEqual(len(sqls), 4, sqls)
+        self.assertEqual(sum(sql.startswith("SELECT") for sql in sqls), 1)
+        self.assertEqual(sum("itens_versaodados" in sql for sql in sqls), 1)
+
+    def test_revisions_advance_both_datasets(self):
+        antes = dict(VersaoDados.objects.values_list("nome", "versao"))
+        alterar_status_reivindicacao(self.claims[0].pk, "Aprovada")
+        depois = dict(VersaoDados.objects.values_list("nome", "versao"))
+
+        self.assertEqual(depois, {nome: versao + 1 for nome, versao in antes.items()})
+        self.item.refresh_from_db()
+        self.assertEqual(self.item.revisao, depois[Item.CONJUNTO])
+        self.assertEqual(
+            set(Reivindicacao.objects.values_list("revisao", flat=True)), {depois[Reivindicacao.CONJUNTO]}
+        )
+
+
+class ClaimRaceTests(TransactionTestCase):
+    """
+    Duas aprovações ao mesmo tempo, de reivindicações diferentes do
+    mesmo item, cada uma na sua thread e conexão: uma passa e a outra
+    recebe 409. O banco de teste em memória (cache compartilhado) não
+    espera pela trava ("table is locked"), então copio para um arquivo
+    com o perfil "wal", como em produção.
+    """
+
+    def setUp(self):
+        item = Item.objects.create(nome="Mochila", local_encontrado="Biblioteca", data_encontrado=date(2025, 3, 1))
+        self.claims = [
+            Reivindicacao.objects.create(item=item, nome_requerente=f"P{i}", detalhes="azul") for i in range(2)
+        ]
+        tmpdir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, tmpdir, ignore_errors=True)
+        path = os.path.join(tmpdir, "corrida.sqlite3")
+        destino = sqlite3.connect(path)
+        connection.ensure_connection()
+        connection.connection.backup(destino)
+        destino.close()
+        self.settings_dict = {**connection.settings_dict, "NAME": path, "OPTIONS": dict(settings.SQLITE_PERFIS["wal"])}
+
+    def test_concurrent_approvals(self):
+        barreira = threading.Barrier(len(self.claims))
+        respostas = {}
+
+        def aprovar(claim_id):
+            # connections é por thread: só esta passa a usar o arquivo
+            connections["default"] = SQLiteDatabaseWrapper(dict(self.settings_dict), alias="default")
+            try:
+                barreira.wait()
+                response = self.client_class().post(
+                    reverse("internal_claim_update_status", args=[claim_id]),
+                    json.dumps({"status": "Aprovada"}),
+                    content_type="application/json",
+                )
+                respostas[claim_id] = response.status_code
+            finally:
+                connections["default"].close()
+
+        threads = [threading.Thread(target=aprovar, args=[claim.pk]) for claim in self.claims]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(sorted(respostas.values()), [200, 409])
+        with sqlite3.connect(self.settings_dict["NAME"]) as conn:
+            status = [row[0] for row in conn.execute("SELECT status FROM itens_reivindicacao ORDER BY status")]
+            item_status, aprovadas = conn.execute(
+                "SELECT status, reivindicacoes_aprovadas FROM itens_item"
+            ).fetchone()
+        self.assertEqual(status, ["Aprovada", "Recusada"])
+        self.assertEqual((item_status, aprovadas), ("Reivindicado", 1))
+
+
+class MetricsTests(TestCase):
+    """
+    O MetricsMiddleware registra tempo e consultas pelo nome da rota.
+    """
+
+    def setUp(self):
+        metrics.registry.reset()
+
+    def test_records_queries_per_view(self):
+        self.client.get(reverse("internal_items_list"))
+
+        body = self.client.get(reverse("internal_metrics")).content.decode()
+
+        self.assertRegex(
+            body,
+            r'itens_db_queries_per_request_sum\{view="internal_items_list",method="GET"\} [1-9]',
+        )
+        self.assertIn(
+            'itens_http_responses_total{view="internal_items_list",method="GET",status="200"} 1',
+            body,
+        )
+
+
+class GerarDadosTests(TestCase):
+    """
+    Dados gerados para benchmark seguem as regras do painel.
+    """
+
+    def test_generated_data_is_consistent(self):
+        call_command(
+            "gerar_dados", "300", "--semente", "3", "--lote", "120",
+            "--media-reivindicacoes", "1.5", stdout=io.StringIO(),
+        )
+
+        self.assertEqual(Item.objects.count(), 300)
+        for field, real in Item.contagens_reais().items():
+            self.assertFalse(Item.objects.annotate(real=real).exclude(**{field: F("real")}).exists(), field)
+        # item já entregue/reivindicado tem exatamente uma aprovada
+        self.assertFalse(
+            Item.objects.exclude(status="Em estoque").filter(reivindicacoes_aprovadas__gt=1).exists()
+        )
+        self.assertFalse(Item.objects.filter(status="Em estoque", reivindicacoes_aprovadas__gt=0).exists())
+
+    def test_benchmark_covers_every_route(self):
+        self.assertEqual(benchmark_api._missing_routes(), [])
+
+
+@override_settings(ITENS_MATCH_REBUILD_SECONDS=0)
+class MatchingTests(TestCase):
+    """
+    Sugestões por semelhança (matching.py): ordem, filtros e a
+    reivindicação feita no item errado.
+    """
+
+    def setUp(self):
+        matching.reset()
+        self.fone = Item.objects.create(
+            nome="Fone de ouvido branco", descricao="Fone bluetooth com estojo", categoria="Eletrônicos",
+            local_encontrado="Restaurante Universitário", data_encontrado=date(2025, 3, 1), aprovado=True,
+        )
+        self.garrafa = Item.objects.create(
+            nome="Garrafa térmica", descricao="Garrafa azul", categoria="Acessórios",
+            local_encontrado="Biblioteca", data_encontrado=date(2025, 3, 10), aprovado=True,
+        )
+        self.carregador = Item.objects.create(
+            nome="Carregador branco", descricao="Carregador de celular", categoria="Eletrônicos",
+            local_encontrado="Bloco A", data_encontrado=date(2025, 1, 5), aprovado=False,
+        )
+
+    @skipUnless(matching.available(), "NumPy não instalado")
+    def test_suggestions_rank_without_every_word(self):
+        response = self.client.get(reverse("item_suggestions"), {"q": "perdi meu fone branco no RU"})
+
+        results = response.json()["results"]
+        self.assertEqual([row["id"] for row in results], [self.fone.pk])  # não aprovado fica de fora
+        self.assertGreater(results[0]["score"], 0)
+
+        response = self.client.get(reverse("item_suggestions"), {"q": "fone", "date_from": "2025-03-05"})
+        self.assertEqual(response.json()["results"], [])
+
+    @skipUnless(matching.available(), "NumPy não instalado")
+    def test_claim_on_wrong_item_is_flagged(self):
+        Reivindicacao.objects.create(
+            item=self.garrafa, nome_requerente="Ana", detalhes="Meu fone de ouvido branco bluetooth",
+        )
+
+        response = self.client.get(reverse("internal_claims_matches"), {"k": "2"})
+
+        (row,) = response.json()["results"]
+        self.assertTrue(row["sugerir_outro"])
+        self.assertEqual(row["candidatos"][0]["item_id"], self.fone.pk)
+
+    def test_unavailable_without_numpy(self):
+        with mock.patch.object(matching, "np", None):
+            response = self.client.get(reverse("item_suggestions"), {"q": "fone"})
+        self.assertEqual(response.status_code, 503)
+
+
+class DedupTests(TestCase):
+    """
+    Itens cadastrados em dobro (dedup.py): aviso na criação e a passada
+    em lote do deduplicar_itens.
+    """
+
+    def create(self, **fields):
+        data = {
+            "nome": "Celular Samsung preto",
+            "descricao": "Com capinha azul e tela trincada",
+            "categoria": "Eletrônicos",
+            "local_encontrado": "Biblioteca",
+            "data_encontrado": "2025-03-01",
+            **fields,
+        }
+        response = self.client.post(reverse("internal_item_create"), json.dumps(data), content_type="application/json")
+        self.assertEqual(response.status_code, 201)
+        return response.json()
+
+    def test_create_flags_near_duplicate(self):
+        first = self.create()
+        self.assertEqual(first["possiveis_duplicados"], [])
+
+        second = self.create(descricao="Com capinha azul, tela trincada", data_encontrado="2025-03-03")
+        self.assertEqual([row["id"] for row in second["possiveis_duplicados"]], [first["id"]])
+
+        # outra semana ou outra categoria: não é o mesmo objeto
+        self.assertEqual(self.create(data_encontrado="2025-04-01")["possiveis_duplicados"], [])
+        self.assertEqual(self.create(categoria="Outros")["possiveis_duplicados"], [])
+
+    def test_batch_groups_copies_of_first_item(self):
+        first = self.create()
+        copy = self.create(nome="Celular samsung preto", data_encontrado="2025-03-02")
+        self.create(nome="Garrafa térmica", descricao="Garrafa de inox", categoria="Acessórios")
+
+        out = io.StringIO()
+        call_command("deduplicar_itens", "--json", stdout=out)
+
+        groups = json.loads(out.getvalue())["grupos"]
+        self.assertEqual([[item["id"] for item in group["itens"]] for group in groups], [[first["id"], copy["id"]]])
+
+    @skipUnless(dedup.np is not None, "NumPy não instalado")
+    def test_numpy_and_python_signatures_match(self):
+        hashes = dedup.shingles("Carteira de estudante marrom, Bloco A")
+        with mock.patch.object(dedup, "np", None):
+            expected = dedup.band_keys(hashes)
+        self.assertEqual(dedup.band_keys(hashes), expected)
+
+
+class AsyncViewsTests(TestCase):
+    """
+    Variantes async (/api/async/): mesma resposta das views síncronas,
+    com ETag/304 funcionando.
+    """
+
+    def setUp(self):
+        django_cache.clear()
+        call_command("gerar_dados", "30", "--semente", "7", stdout=io.StringIO())
+
+    def _body(self, response):
+        return benchmark_api._read_body(response) if response.streaming else response.content
+
+    def test_same_response_as_sync_views(self):
+        pairs = [
+            ("item_list_create", "item_list_create_async", {"limit": "5"}),
+            ("internal_claims_list", "internal_claims_list_async", {}),
+            ("internal_claims_list", "internal_claims_list_async", {"formato": "ndjson"}),
+            ("internal_items_list", "internal_items_list_async", {"since": "1"}),
+        ]
+        for sync_name, async_name, params in pairs:
+            with self.subTest(rota=async_name, params=params):
+                expected = self.client.get(reverse(sync_name), params)
+                response = self.client.get(reverse(async_name), params)
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(self._body(response), self._body(expected))
+
+    def test_etag_and_claim(self):
+        url = reverse("item_list_create_async")
+        etag = self.client.get(url)["ETag"]
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+        item = Item.objects.filter(status="Em estoque").first()
+        pendentes = item.reivindicacoes_pendentes
+        response = self.client.post(
+            reverse("item_claim_create_async", args=[item.pk]),
+            json.dumps({"nome": "Ana", "detalhes": "É meu"}),
+            content_type="application/json",
+        )
+        self.assertEqual(response.status_code, 201)
+        item.refresh_from_db()
+        self.assertEqual(item.reivindicacoes_pendentes, pendentes + 1)
+        # só os contadores mudaram, que a listagem pública não mostra
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+
+class FilaTests(TestCase):
+    """
+    Fila de reivindicações (fila.py): 202 com ticket, gravação em lote
+    pelo processar_fila e reprocessamento sem duplicar.
+    """
+
+    def setUp(self):
+        tmpdir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, tmpdir, ignore_errors=True)
+        settings = override_settings(ITENS_FILA_REIVINDICACOES=os.path.join(tmpdir, "fila.sqlite3"))
+        settings.enable()
+        self.addCleanup(settings.disable)
+        self.item = Item.objects.create(nome="Mochila", local_encontrado="Biblioteca", data_encontrado=date(2025, 3, 1))
+
+    def claim(self, item_id):
+        response = self.client.post(
+            reverse("item_claim_create", args=[item_id]),
+            json.dumps({"nome": "Ana", "detalhes": "Tem meu nome na etiqueta"}),
+            content_type="application/json",
+        )
+        self.assertEqual(response.status_code, 202)
+        return response.json()
+
+    def test_claim_is_queued_then_flushed(self):
+        queued = self.claim(self.item.pk)
+        self.assertFalse(Reivindicacao.objects.exists())
+        self.assertEqual(self.client.get(queued["status_url"]).json()["status"], fila.PENDENTE)
+
+        call_command("processar_fila", "--uma-vez", stdout=io.StringIO())
+
+        rev = Reivindicacao.objects.get()
+        self.assertEqual((rev.ticket, rev.item_id, rev.nome_requerente), (queued["ticket"], self.item.pk, "Ana"))
+        self.item.refresh_from_db()
+        self.assertEqual(self.item.reivindicacoes_pendentes, 1)
+        status = self.client.get(queued["status_url"]).json()
+        self.assertEqual((status["status"], status["reivindicacao_id"]), (fila.REGISTRADA, rev.pk))
+
+    def test_reprocessing_does_not_duplicate(self):
+        ticket = self.claim(self.item.pk)["ticket"]
+        fila.processar()
+        # como se o worker caísse depois do commit e antes de marcar o diário
+        fila._conexao().execute("UPDATE fila SET status = ? WHERE ticket = ?", (fila.PENDENTE, ticket))
+
+        self.assertEqual(fila.processar(), {"registradas": 1, "erros": 0})
+        self.assertEqual(Reivindicacao.objects.count(), 1)
+        self.item.refresh_from_db()
+        self.assertEqual(self.item.reivindicacoes_pendentes, 1)
+
+    def test_deleted_item_is_an_error(self):
+        ticket = self.claim(self.item.pk)["ticket"]
+        self.item.delete()
+
+        self.assertEqual(fila.processar(), {"registradas": 0, "erros": 1})
+        self.assertEqual(fila.consultar(ticket)["status"], fila.ERRO)
+
+
+class EstatisticasTests(TestCase):
+    """
+    Estatísticas do painel (estatisticas.py): contagens, mediana do
+    tempo até a devolução e recálculo só quando os dados mudam.
+    """
+
+    def setUp(self):
+        self.items = [
+            Item.objects.create(
+                nome=f"Item {i}", categoria="Eletrônicos" if i < 3 else "", local_encontrado="Biblioteca",
+                data_encontrado=date(2025, 3, 3 + i),  # segunda-feira 03/03 em diante
+            )
+            for i in range(5)
+        ]
+        Reivindicacao.objects.create(item=self.items[0], nome_requerente="Ana", detalhes="É meu")
+
+    def test_rollups_and_median_time_to_return(self):
+        for item, dias in zip(self.items[:3], (2, 4, 10)):
+            self.client.post(reverse("internal_item_mark_returned", args=[item.pk]))
+            item.refresh_from_db()
+            Item.objects.filter(pk=item.pk).update(data_criacao=item.devolvido_em - timedelta(days=dias))
+
+        dados = self.client.get(reverse("internal_statistics")).json()
+
+        self.assertEqual(dados["tempo_ate_devolucao"], {"devolvidos": 3, "mediana_dias": 4.0})
+        self.assertEqual(
+            dados["itens"]["por_status"],
+            [{"valor": "Devolvido", "total": 3}, {"valor": "Em estoque", "total": 2}],
+        )
+        self.assertEqual(
+            dados["itens"]["por_categoria"],
+            [{"valor": "Eletrônicos", "total": 3}, {"valor": estatisticas.SEM_VALOR, "total": 2}],
+        )
+        semanas = {linha["semana"]: linha["encontrados"] for linha in dados["por_semana"]}
+        self.assertEqual(semanas["2025-03-03"], 5)
+        self.assertEqual((dados["reivindicacoes_pendentes"]["total"], dados["reivindicacoes_pendentes"]["itens"]), (1, 1))
+
+    def test_refresh_only_when_data_changed(self):
+        self.assertTrue(estatisticas.atualizar()[1])
+        self.assertFalse(estatisticas.atualizar()[1])
+
+        self.client.post(reverse("internal_item_mark_returned", args=[self.items[4].pk]))
+        self.assertTrue(estatisticas.obter()["desatualizado"])
+
+        self.assertTrue(estatisticas.atualizar()[1])
+        self.assertFalse(estatisticas.obter()["desatualizado"])
+        # o incremental (só semanas recentes) chega no mesmo que o completo
+        anterior = estatisticas.atualizar(forcar=True)[0].dados
+        Reivindicacao.objects.create(item=self.items[1], nome_requerente="Bia", detalhes="É meu")
+        self.assertEqual(estatisticas.calcular(anterior)["por_semana"], estatisticas.calcular()["por_semana"])
+
+        # voltar para o estoque apaga a data da devolução
+        self.client.post(reverse("internal_item_back_to_stock", args=[self.items[4].pk]))
+        self.items[4].refresh_from_db()
+        self.assertIsNone(self.items[4].devolvido_em)
+
+
+class _QueryCounter:
+    def __init__(self):
+        self.sqls = []
+
+    def __call__(self, execute, sql, params, many, context):
+        # savepoints vêm das transações aninhadas do TestCase/atomic
+        if "SAVEPOINT" not in sql:
+            self.sqls.append(sql)
+        return execute(sql, params, many, context)
+
+
+class QueryBudgetTests(TestCase):
+    """
+    Cada rota tem um número fixo de consultas, que não pode crescer com
+    o volume de dados (quem introduzir um N+1 quebra este teste).
+    Medido sem cache, depois de gerar (gerar_dados) 3, mais 30 e mais
+    120 itens.
+    """
+
+    # (rota, método, função(self) -> (url, kwargs do client), consultas)
+    BUDGETS = [
+        ("home", "get", lambda t: (reverse("home"), {}), 0),
+        ("internal_dashboard", "get", lambda t: (reverse("internal_dashboard"), {}), 0),
+        ("item_list_create", "get", lambda t: (reverse("item_list_create"), {}), 2),
+        ("item_list_create busca", "get", lambda t: (reverse("item_list_create"), {"data": {"q": "celular"}}), 2),
+        (
+            "item_list_create POST",
+            "post",
+            lambda t: (reverse("item_list_create"), t._json({"name": "Caneta", "location": "Bloco A", "date": "2025-03-01"})),
+            5,
+        ),
+        ("item_search", "get", lambda t: (reverse("item_search"), {"data": {"q": "celular"}}), 2),
+        ("item_suggestions", "get", lambda t: (reverse("item_suggestions"), {"data": {"q": "celular preto"}}), 4),
+        ("item_mark_returned", "delete", lambda t: (reverse("item_mark_returned", args=[t.item.pk]), {}), 3),
+        (
+            "item_claim_create",
+            "post",
+            lambda t: (reverse("item_claim_create", args=[t.item.pk]), t._json({"nome": "Ana", "detalhes": "É meu"})),
+            4,
+        ),
+        # estado dos dois conjuntos (ETag, uma consulta) + a lista; o
+        # estado vem antes para o 304 não precisar ler lista nenhuma
+        ("internal_claims_list", "get", lambda t: (reverse("internal_claims_list"), {}), 2),
+        (
+            "internal_claims_list 304",
+            "get",
+            lambda t: (
+                reverse("internal_claims_list"),
+                {"HTTP_IF_NONE_MATCH": t.client.get(reverse("internal_claims_list"))["ETag"]},
+            ),
+            1,
+        ),
+        ("internal_claims_list ndjson", "get", lambda t: (reverse("internal_claims_list"), {"data": {"formato": "ndjson"}}), 2),
+        ("internal_claims_list since", "get", lambda t: (reverse("internal_claims_list"), {"data": {"since": "1"}}), 3),
+        (
+            "internal_claim_update_status",
+            "post",
+            lambda t: (reverse("internal_claim_update_status", args=[t.pendente.pk]), t._json({"status": "Aprovada"})),
+            4,
+        ),
+        ("internal_claims_matches", "get", lambda t: (reverse("internal_claims_matches"), {}), 4),
+        ("internal_items_list", "get", lambda t: (reverse("internal_items_list"), {}), 2),
+        ("internal_items_list since", "get", lambda t: (reverse("internal_items_list"), {"data": {"since": "1"}}), 3),
+        (
+            "internal_item_create",
+            "post",
+            lambda t: (
+                reverse("internal_item_create"),
+                t._json({"nome": "Caneta", "local_encontrado": "Bloco A", "data_encontrado": "2025-03-01"}),
+            ),
+            6,  # + procura de duplicados (dedup.py)
+        ),
+        (
+            "internal_items_bulk",
+            "post",
+            lambda t: (
+                reverse("internal_items_bulk"),
+                t._json({"ids": list(Item.objects.values_list("pk", flat=True)[:20]), "acao": "desaprovar"}),
+            ),
+            3,
+        ),
+        (
+            "internal_items_import",
+            "post",
+            lambda t: (
+                reverse("internal_items_import"),
+                {"data": {"arquivo": SimpleUploadedFile(
+                    "itens.csv", b"nome,local_encontrado,data_encontrado\nCaneta,Bloco A,2025-03-01\n"
+                )}},
+            ),
+            5,
+        ),
+        (
+            "internal_item_update",
+            "post",
+            lambda t: (reverse("internal_item_update", args=[t.item.pk]), t._json({"descricao": "Azul"})),
+            7,
+        ),
+        ("internal_item_mark_returned", "post", lambda t: (reverse("internal_item_mark_returned", args=[t.item.pk]), {}), 3),
+        ("internal_item_back_to_stock", "post", lambda t: (reverse("internal_item_back_to_stock", args=[t.item.pk]), {}), 3),
+        ("internal_export itens", "get", lambda t: (reverse("internal_export", args=["itens"]), {}), 1),
+        (
+            "internal_export reivindicacoes",
+            "get",
+            lambda t: (reverse("internal_export", args=["reivindicacoes"]), {"data": {"formato": "colunar"}}),
+            1,
+        ),
+        ("internal_metrics", "get", lambda t: (reverse("internal_metrics"), {}), 0),
+        # o cálculo fica fora da conta: a rota só lê o que já está pronto
+        ("internal_statistics", "get", lambda t: (estatisticas.atualizar(), reverse("internal_statistics"), {})[1:], 2),
+        # variantes async: as mesmas consultas das síncronas
+        ("item_list_create_async", "get", lambda t: (reverse("item_list_create_async"), {}), 2),
+        (
+            "item_list_create_async POST",
+            "post",
+            lambda t: (reverse("item_list_create_async"), t._json({"name": "Caneta", "location": "Bloco A", "date": "2025-03-01"})),
+            5,
+        ),
+        (
+            "item_claim_create_async",
+            "post",
+            lambda t: (reverse("item_claim_create_async", args=[t.item.pk]), t._json({"nome": "Ana", "detalhes": "É meu"})),
+            4,
+        ),
+        ("internal_claims_list_async", "get", lambda t: (reverse("internal_claims_list_async"), {}), 2),
+        (
+            "internal_claims_list_async ndjson",
+            "get",
+            lambda t: (reverse("internal_claims_list_async"), {"data": {"formato": "ndjson"}}),
+            2,
+        ),
+        ("internal_items_list_async", "get", lambda t: (reverse("internal_items_list_async"), {}), 2),
+        (
+            "internal_items_list_async since",
+            "get",
+            lambda t: (reverse("internal_items_list_async"), {"data": {"since": "1"}}),
+            3,
+        ),
+        ("admin itens", "get", lambda t: (reverse("admin:itens_item_changelist"), {}), 6),
+        ("admin reivindicacoes", "get", lambda t: (reverse("admin:itens_reivindicacao_changelist"), {}), 5),
+        (
+            "admin reivindicacao",
+            "get",
+            lambda t: (reverse("admin:itens_reivindicacao_change", args=[t.pendente.pk]), {}),
+            5,
+        ),
+    ]
+    SIZES = (3, 30, 120)
+    # rotas do matching.py, que só existem com o NumPy instalado
+    NEEDS_NUMPY = {"item_suggestions", "internal_claims_matches"}
+
+    @classmethod
+    def setUpTestData(cls):
+        User = get_user_model()
+        cls.admin = User.objects.create_superuser("admin", "admin@exemplo.edu.br", "senha")
+
+    def _json(self, data):
+        return {"data": json.dumps(data), "content_type": "application/json"}
+
+    def _count(self, method, url, kwargs):
+        django_cache.clear()
+        ContentType.objects.clear_cache()
+        counter = _QueryCounter()
+        with connection.execute_wrapper(counter):
+            response = getattr(self.client, method)(url, **kwargs)
+            if response.streaming:
+                benchmark_api._read_body(response)
+        self.assertLess(response.status_code, 400, (url, response.status_code))
+        return counter.sqls
+
+    @override_settings(ITENS_MATCH_REBUILD_SECONDS=0)
+    def test_query_budget_does_not_grow_with_data(self):
+        matching.reset()
+        self.client.force_login(self.admin)
+        for size in self.SIZES:
+            call_command("gerar_dados", str(size), "--semente", str(size), stdout=io.StringIO())
+            self.item = Item.objects.create(nome="Garrafa", local_encontrado="Bloco A", data_encontrado=date(2025, 3, 1))
+            self.pendente = Reivindicacao.objects.create(
+                item=Item.objects.create(nome="Chave", local_encontrado="Bloco B", data_encontrado=date(2025, 3, 1)),
+                nome_requerente="Ana",
+                detalhes="É minha",
+            )
+            for name, method, build, budget in self.BUDGETS:
+                if name in self.NEEDS_NUMPY and not matching.available():
+                    continue
+                url, kwargs = build(self)
+                sqls = self._count(method, url, kwargs)
+                with self.subTest(rota=name, itens=Item.objects.count()):
+                    self.assertEqual(len(sqls), budget, "\n".join(sqls))
+
+    def test_every_route_has_a_budget(self):
+        names = {pattern.name for pattern in urls.urlpatterns}
+        covered = {name.split()[0] for name, *_ in self.BUDGETS} | set(benchmark_api.SKIPPED)
+        self.assertEqual(sorted(names - covered), [])
+
+
+class StaticAssetsTests(SimpleTestCase):
+    """
+    Estáticos de produção: validade de um ano nos arquivos com hash e
+    <picture> com WebP só quando as variantes existem no manifesto.
+    """
+
+    def test_hashed_files_are_immutable_for_one_year(self):
+        headers = {"Cache-Control": "max-age=315360000, public, immutable"}
+        assets.add_headers(headers, "/x/style.3bd3b899d273.css", "/static/itens/style.3bd3b899d273.css")
+        self.assertEqual(headers["Cache-Control"], "max-age=31536000, public, immutable")
+
+        headers = {"Cache-Control": "max-age=60, public"}
+        assets.add_headers(headers, "/x/style.css", "/static/itens/style.css")
+        self.assertEqual(headers["Cache-Control"], "max-age=60, public")
+
+    def test_responsive_image_uses_manifest_variants(self):
+        template = Template("{% load estaticos %}{% imagem_responsiva 'itens/logo.pequena.png' alt='Logo' %}")
+
+        with mock.patch.object(staticfiles_storage, "hashed_files", {}):
+            html = template.render(Context())
+        self.assertNotIn("<picture>", html)
+        self.assertIn('alt="Logo"', html)
+
+        manifest = {
+            "itens/logo.pequena.png": "itens/logo.pequena.aaa.png",
+            "itens/logo.pequena.240w.webp": "itens/logo.pequena.240w.bbb.webp",
+        }
+        with mock.patch.object(staticfiles_storage, "hashed_files", manifest):
+            html = template.render(Context())
+        self.assertIn('srcset="/static/itens/logo.pequena.240w.bbb.webp 240w"', html)
+        self.assertIn('src="/static/itens/logo.pequena.aaa.png"', html)
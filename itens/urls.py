@@ -10,17 +10,41 @@ urlpatterns = [
 
     # APIs públicas de itens / blind claim
     path('api/itens/', views.item_list_create, name='item_list_create'),
+    path('api/itens/busca/', views.item_search, name='item_search'),
+    path('api/itens/sugestoes/', views.item_suggestions, name='item_suggestions'),
     path('api/itens/<int:item_id>/', views.item_mark_returned, name='item_mark_returned'),
     path('api/itens/<int:item_id>/claim/', views.item_claim_create, name='item_claim_create'),
+    path('api/reivindicacoes/fila/<str:ticket>/', views.claim_ticket_status, name='claim_ticket_status'),
 
     # APIs internas (reivindicações)
     path('api/interno/reivindicacoes/', views.internal_claims_list, name='internal_claims_list'),
+    path('api/interno/reivindicacoes/correspondencias/', views.internal_claims_matches, name='internal_claims_matches'),
     path('api/interno/reivindicacoes/<int:claim_id>/status/', views.internal_claim_update_status, name='internal_claim_update_status'),
 
+    # Eventos em tempo real do painel interno (SSE, precisa de ASGI)
+    path('api/interno/eventos/', views.internal_events, name='internal_events'),
+
     # APIs internas (itens)
     path('api/interno/itens/', views.internal_items_list, name='internal_items_list'),
     path('api/interno/itens/novo/', views.internal_item_create, name='internal_item_create'),
+    path('api/interno/itens/lote/', views.internal_items_bulk, name='internal_items_bulk'),
+    path('api/interno/itens/importar/', views.internal_items_import, name='internal_items_import'),
     path('api/interno/itens/<int:item_id>/editar/', views.internal_item_update, name='internal_item_update'),
     path('api/interno/itens/<int:item_id>/devolver/', views.internal_item_mark_returned, name='internal_item_mark_returned'),
     path('api/interno/itens/<int:item_id>/back_to_stock/', views.internal_item_back_to_stock, name='internal_item_back_to_stock'),
+
+    # Exportação completa para auditoria (CSV / colunar)
+    path('api/interno/exportar/<str:conjunto>/', views.internal_export, name='internal_export'),
+
+    # Métricas por view (formato Prometheus)
+    path('api/interno/metricas/', views.internal_metrics, name='internal_metrics'),
+
+    # Estatísticas do painel (calculadas pelo atualizar_estatisticas)
+    path('api/interno/estatisticas/', views.internal_statistics, name='internal_statistics'),
+
+    # Variantes async das APIs mais usadas (ORM async, para o ASGI)
+    path('api/async/itens/', views.item_list_create_async, name='item_list_create_async'),
+    path('api/async/itens/<int:item_id>/claim/', views.item_claim_create_async, name='item_claim_create_async'),
+    path('api/async/interno/reivindicacoes/', views.internal_claims_list_async, name='internal_claims_list_async'),
+    path('api/async/interno/itens/', views.internal_items_list_async, name='internal_items_list_async'),
 ]
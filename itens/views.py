@@ -7,35 +7,259 @@
 # com comentários explicando as decisões.
 # ============================================================
 
-from datetime import datetime
+from datetime import date, datetime
+import asyncio
+import base64
 import json
 
-from django.http import JsonResponse, HttpResponseBadRequest
-from django.shortcuts import render, get_object_or_404
+from asgiref.sync import sync_to_async
+from django.db import transaction
+from django.db.models import Q
+from django.db.models.functions import Now
+from django.core.handlers.asgi import ASGIRequest
+from django.http import Http404, HttpResponse, JsonResponse, HttpResponseBadRequest, StreamingHttpResponse
+from django.shortcuts import aget_object_or_404, render, get_object_or_404
+from django.urls import reverse
 from django.views.decorators.http import require_http_methods
 from django.views.decorators.csrf import ensure_csrf_cookie, csrf_exempt
 
-from .models import Item, Reivindicacao
+from . import cache, dedup, estatisticas, events, exporter, fila, importer, matching, metrics, search, services, streaming
+from .models import Item, Remocao, Reivindicacao
+from .replica import usa_replica
+from .serializers import (
+    CLAIM,
+    INTERNAL_ITEM,
+    PUBLIC_ITEM,
+    serialize_item,
+)
 
 
-# Helper para manter o formato de item consistente nas APIs internas
-def serialize_item(item: Item) -> dict:
+# ----------------- Sincronização por revisão (painel interno) -----------------
+
+
+def parse_since(params):
+    """
+    Lê o parâmetro "since" (última revisão que o painel já tem).
+    Retorna None se ele não veio.
+    """
+    value = params.get("since")
+    if value in (None, ""):
+        return None
+    try:
+        since = int(value)
+    except ValueError:
+        raise ValueError("Parâmetro since inválido")
+    if since < 0:
+        raise ValueError("Parâmetro since inválido")
+    return since
+
+
+def parse_format(params) -> str:
+    """
+    Lê o parâmetro "formato" das listas internas (ver streaming.py):
+    "json" (padrão), "json-stream" ou "ndjson".
+    """
+    formato = params.get("formato") or "json"
+    if formato not in streaming.FORMATS:
+        raise ValueError("Parâmetro formato inválido")
+    return formato
+
+
+def sync_response(queryset, fieldset, names, conjunto: str, since: int, revisao: int) -> JsonResponse:
+    """
+    Resposta do modo ?since=: só as linhas gravadas depois de `since`
+    e os ids apagados depois dela (lápides em Remocao).
+
+    `revisao` tem que ser lida ANTES das linhas: se algo for gravado no
+    meio do caminho, a linha vem agora e de novo na próxima sincronização
+    (o painel só substitui), mas nunca fica de fora.
+    """
+    alterados = list(fieldset.rows(
+        queryset.filter(revisao__gt=since).order_by("revisao"), names
+    ))
+    removidos = list(_removidos(conjunto, since))
+    return _delta_response(alterados, removidos, revisao)
+
+
+async def sync_response_async(queryset, fieldset, names, conjunto: str, since: int, revisao: int) -> JsonResponse:
+    """
+    sync_response com o ORM async (listas internas async).
+    """
+    alterados = [
+        row async for row in fieldset.arows(
+            queryset.filter(revisao__gt=since).order_by("revisao"), names
+        )
+    ]
+    removidos = [row async for row in _removidos(conjunto, since)]
+    return _delta_response(alterados, removidos, revisao)
+
+
+def _removidos(conjunto: str, since: int):
+    return (
+        Remocao.objects
+        .filter(conjunto=conjunto, revisao__gt=since)
+        .values_list("objeto_id", "revisao")
+    )
+
+
+def _delta_response(alterados: list, removidos: list, revisao: int) -> JsonResponse:
+    # alguma gravação pode ter entrado depois da leitura da revisão
+    revisao = max(
+        [revisao]
+        + [obj["revisao"] for obj in alterados]
+        + [rev for _, rev in removidos]
+    )
+
+    response = JsonResponse({
+        "revisao": revisao,
+        "alterados": alterados,
+        "removidos": [objeto_id for objeto_id, _ in removidos],
+    })
+    response["X-Revisao"] = revisao
+    return response
+
+
+# Listagem pública: tamanho padrão e máximo de página (parâmetro "limit")
+PUBLIC_PAGE_SIZE = 20
+PUBLIC_MAX_PAGE_SIZE = 100
+
+
+def encode_cursor(data_encontrado, data_criacao, item_id) -> str:
+    """
+    Gera o cursor (keyset) a partir do último item de uma página.
+
+    O cursor é só a chave de ordenação (data_encontrado, data_criacao, id)
+    em base64, assim a próxima página continua exatamente dali sem OFFSET.
+    """
+    raw = json.dumps([
+        data_encontrado.isoformat(),
+        data_criacao.isoformat(),
+        item_id,
+    ])
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii")
+
+
+def decode_cursor(cursor: str):
     """
-    Converte um objeto Item em dicionário pronto para JSON.
+    Faz o caminho inverso de encode_cursor.
 
-    Uso em:
-    - lista interna de itens;
-    - criação/edição interna de itens.
+    Retorna (data_encontrado, data_criacao, id) ou levanta ValueError
+    se o cursor vier corrompido.
     """
+    try:
+        raw = base64.urlsafe_b64decode(cursor.encode("ascii"))
+        data_str, criacao_str, item_id = json.loads(raw.decode("utf-8"))
+        return (
+            date.fromisoformat(data_str),
+            datetime.fromisoformat(criacao_str),
+            int(item_id),
+        )
+    except (TypeError, ValueError, UnicodeError):
+        raise ValueError("Cursor inválido")
+
+
+def parse_limit(value, default: int, maximum: int) -> int:
+    """
+    Lê o parâmetro "limit" da query string, sempre dentro de [1, maximum].
+    """
+    if not value:
+        return default
+    try:
+        limit = int(value)
+    except ValueError:
+        raise ValueError("Parâmetro limit inválido")
+    return max(1, min(limit, maximum))
+
+
+def parse_date_param(params, name):
+    """
+    Data opcional 'YYYY-MM-DD' da query string (None se ausente).
+    """
+    value = (params.get(name) or "").strip()
+    if not value:
+        return None
+    try:
+        return datetime.strptime(value, "%Y-%m-%d").date()
+    except ValueError:
+        raise ValueError(f"Formato de data inválido em {name}")
+
+
+# Colunas da chave do cursor (keyset), lidas junto com a página.
+CURSOR_FIELDS = ("data_encontrado", "data_criacao", "id")
+
+
+def build_public_page(params) -> dict:
+    """
+    Monta uma página da listagem pública a partir dos parâmetros da URL
+    (ver item_list_create). Levanta ValueError se algum for inválido.
+    """
+    itens, names, limit = public_page_query(params)
+    return public_page(list(PUBLIC_ITEM.rows(itens, names, extra=CURSOR_FIELDS)), limit)
+
+
+async def build_public_page_async(params) -> dict:
+    """
+    build_public_page com o ORM async (item_list_create_async).
+    """
+    await search.afts_available(Item.objects.db)  # public_page_query consulta se ainda não sabe
+    itens, names, limit = public_page_query(params)
+    rows = [row async for row in PUBLIC_ITEM.arows(itens, names, extra=CURSOR_FIELDS)]
+    return public_page(rows, limit)
+
+
+def public_page_query(params):
+    """
+    Queryset (ainda não executado) de uma página da listagem pública:
+    devolve (queryset, campos, limit).
+    """
+    limit = parse_limit(params.get("limit"), PUBLIC_PAGE_SIZE, PUBLIC_MAX_PAGE_SIZE)
+    names = PUBLIC_ITEM.parse(params.get("fields"))
+    cursor = params.get("cursor")
+    after = decode_cursor(cursor) if cursor else None
+
+    itens = Item.objects.filter(status="Em estoque", aprovado=True)
+
+    # Filtros que antes eram feitos no navegador (getFilteredItems).
+    # O texto livre passa pela busca (FTS5 no SQLite), ver search.py.
+    term = (params.get("q") or "").strip()
+    if term:
+        itens = search.filter_items(itens, term)
+
+    category = (params.get("category") or "").strip()
+    if category:
+        itens = itens.filter(categoria__iexact=category)
+
+    location = (params.get("location") or "").strip()
+    if location:
+        itens = itens.filter(local_encontrado__icontains=location)
+
+    # Keyset: pego só o que vem "depois" do último item da página anterior
+    # na ordem (-data_encontrado, -data_criacao, -id). O data_encontrado__lte
+    # é redundante, mas deixa o banco buscar direto no item_publico_idx.
+    if after:
+        data_encontrado, data_criacao, item_id = after
+        itens = itens.filter(data_encontrado__lte=data_encontrado).filter(
+            Q(data_encontrado__lt=data_encontrado)
+            | Q(data_encontrado=data_encontrado, data_criacao__lt=data_criacao)
+            | Q(data_encontrado=data_encontrado, data_criacao=data_criacao, id__lt=item_id)
+        )
+
+    # Busco um a mais só para saber se existe próxima página. Só as
+    # colunas pedidas + a chave do cursor (sem montar objetos Item).
+    itens = itens.order_by("-data_encontrado", "-data_criacao", "-id")[:limit + 1]
+    return itens, names, limit
+
+
+def public_page(page: list, limit: int) -> dict:
+    """
+    JSON da página a partir das linhas (dados, chave do cursor).
+    """
+    has_next = len(page) > limit
+    page = page[:limit]
+
     return {
-        "id": item.id,
-        "nome": item.nome,
-        "status": item.status,
-        "aprovado": item.aprovado,
-        "local_encontrado": item.local_encontrado or "",
-        "data_encontrado": item.data_encontrado.isoformat(),
-        "categoria": item.categoria or "",
-        "descricao": item.descricao or "",
+        "results": [data for data, _ in page],
+        "next_cursor": encode_cursor(*page[-1][1]) if has_next else None,
     }
 
 
@@ -72,72 +296,156 @@ def internal_dashboard(request):
 
 @csrf_exempt  # por enquanto deixo sem CSRF para simplificar o desenvolvimento
 @require_http_methods(["GET", "POST"])
+@usa_replica()
+@cache.list_condition(cache.ITENS)
 def item_list_create(request):
     """
     API simples para lista/criação de itens (lado público).
 
-    GET  -> retorna itens em estoque E aprovados, em JSON.
+    GET  -> retorna itens em estoque E aprovados, em JSON, paginados por
+            cursor (keyset). Parâmetros opcionais:
+            - q: texto livre (nome, descrição, categoria ou local);
+            - category: categoria exata;
+            - location: parte do local;
+            - limit: itens por página (padrão 20, máximo 100);
+            - cursor: valor de "next_cursor" da página anterior;
+            - fields: campos desejados, ex.: "id,name,date" (deixar
+              "description" de fora economiza banco e rede).
     POST -> cria um novo item vindo de uma futura interface interna
             (hoje não usamos pelo site público).
 
     Fluxo atual:
     - Itens são cadastrados por servidores internos (via admin ou painel);
     - Apenas itens com aprovado=True aparecem na listagem pública.
+
+    O GET passa pelo cache versionado (cache.py): enquanto nenhum item
+    for gravado, a mesma página sai pronta da memória. Com ETag igual ao
+    do navegador, a resposta é um 304 sem corpo.
     """
     if request.method == "GET":
-        itens = (
-            Item.objects
-            .filter(status="Em estoque", aprovado=True)
-            .order_by("-data_encontrado", "-data_criacao")
-        )
+        key = cache.make_key("publico", cache.request_state(request, cache.ITENS)[:2], request.GET)
+        try:
+            return cache.cached_json_response(key, lambda: build_public_page(request.GET))
+        except ValueError as exc:
+            return HttpResponseBadRequest(str(exc))
+
+    # Se chegou aqui, é POST (por causa do decorator).
+    try:
+        fields = public_item_fields(request.body)
+    except ValueError as exc:
+        return HttpResponseBadRequest(str(exc))
 
-        data = []
-        for item in itens:
-            data.append({
-                "id": item.id,
-                "name": item.nome,
-                "location": item.local_encontrado or "",
-                "date": item.data_encontrado.isoformat(),  # 'YYYY-MM-DD'
-                "category": item.categoria or "",
-                "description": item.descricao or "",
-                "status": item.status,
-            })
+    item = Item.objects.create(**fields)
+    return JsonResponse(public_item_created(item), status=201)
 
-        return JsonResponse(data, safe=False)
 
-    # Se chegou aqui, é POST (por causa do decorator).
+def public_item_fields(raw: bytes) -> dict:
+    """
+    Campos do Item a partir do JSON do POST público ({name, location,
+    date}). Levanta ValueError com a mensagem para o 400.
+    """
     try:
-        body = json.loads(request.body.decode("utf-8"))
+        body = json.loads(raw.decode("utf-8"))
     except json.JSONDecodeError:
-        return HttpResponseBadRequest("JSON inválido")
+        raise ValueError("JSON inválido")
 
     name = body.get("name")
     location = body.get("location")
     date_str = body.get("date")  # esperado 'YYYY-MM-DD'
 
     if not (name and location and date_str):
-        return HttpResponseBadRequest("Campos obrigatórios faltando")
+        raise ValueError("Campos obrigatórios faltando")
 
     try:
         data_encontrado = datetime.strptime(date_str, "%Y-%m-%d").date()
     except ValueError:
-        return HttpResponseBadRequest("Formato de data inválido")
+        raise ValueError("Formato de data inválido")
 
-    item = Item.objects.create(
-        nome=name,
-        local_encontrado=location,
-        data_encontrado=data_encontrado,
+    return {
+        "nome": name,
+        "local_encontrado": location,
+        "data_encontrado": data_encontrado,
         # status padrão já é "Em estoque"
         # aprovado=False (revisão interna antes de publicar)
-        aprovado=False,
-    )
+        "aprovado": False,
+    }
 
-    data = {
+
+def public_item_created(item) -> dict:
+    return {
         "id": item.id,
         "nome": item.nome,
         "mensagem": "Item criado e aguardando aprovação interna.",
     }
-    return JsonResponse(data, status=201)
+
+
+@csrf_exempt
+@require_http_methods(["GET"])
+def item_search(request):
+    """
+    Busca textual na listagem pública, ordenada por relevância.
+
+    Parâmetros:
+    - q: texto livre (ex.: "carteira preta bloco"), sem diferenciar
+      acentos nem maiúsculas;
+    - limit: máximo de resultados (padrão 20, máximo 100);
+    - fields: campos desejados (como em item_list_create).
+    """
+    def build():
+        limit = parse_limit(request.GET.get("limit"), PUBLIC_PAGE_SIZE, PUBLIC_MAX_PAGE_SIZE)
+        names = PUBLIC_ITEM.parse(request.GET.get("fields"))
+        itens = search.search_public_items(request.GET.get("q") or "", limit)
+        return {"results": [PUBLIC_ITEM.serialize(item, names) for item in itens]}
+
+    key = cache.make_key("busca", cache.get_version(cache.ITENS), request.GET)
+    try:
+        return cache.cached_json_response(key, build)
+    except ValueError as exc:
+        return HttpResponseBadRequest(str(exc))
+
+
+MATCHING_UNAVAILABLE = "Sugestões indisponíveis (NumPy não instalado no servidor)."
+
+
+@require_http_methods(["GET"])
+def item_suggestions(request):
+    """
+    Itens parecidos com uma descrição livre, do mais para o menos
+    parecido (ver matching.py). Diferente da busca, não precisa ter
+    todas as palavras: serve para "perdi um fone branco no RU".
+
+    Parâmetros:
+    - q: descrição do objeto perdido;
+    - category / location: somam pontos quando batem com o item;
+    - date_from / date_to: janela em que o item pode ter sido achado;
+    - limit: máximo de resultados (padrão 20, máximo 100).
+
+    Cada resultado traz os campos da listagem pública + "score".
+    """
+    if not matching.available():
+        return HttpResponse(MATCHING_UNAVAILABLE, status=503)
+
+    def build():
+        limit = parse_limit(request.GET.get("limit"), PUBLIC_PAGE_SIZE, PUBLIC_MAX_PAGE_SIZE)
+        ranked = matching.suggest_items(
+            request.GET.get("q") or "",
+            categoria=request.GET.get("category") or "",
+            local=request.GET.get("location") or "",
+            date_from=parse_date_param(request.GET, "date_from"),
+            date_to=parse_date_param(request.GET, "date_to"),
+            k=limit,
+        )
+        return {
+            "results": [
+                {**PUBLIC_ITEM.serialize(item), "score": round(score, 4)} for item, score in ranked
+            ],
+        }
+
+    key = cache.make_key("sugestoes", cache.get_version(cache.ITENS), request.GET)
+    try:
+        return cache.cached_json_response(key, build)
+    except ValueError as exc:
+        return HttpResponseBadRequest(str(exc))
 
 
 @csrf_exempt
@@ -173,34 +481,70 @@ def item_claim_create(request, item_id):
     item = get_object_or_404(Item, id=item_id)
 
     try:
-        body = json.loads(request.body.decode("utf-8"))
+        fields = claim_fields(request.body)
+    except ValueError as exc:
+        return HttpResponseBadRequest(str(exc))
+
+    if fila.ativa():
+        # pico de envios: só anoto no diário, o processar_fila grava
+        return JsonResponse(claim_queued(fila.enfileirar(item.pk, fields)), status=202)
+
+    # reivindicação + contador do item numa transação (save + signals.py)
+    reivindicacao = services.registrar_reivindicacao(item.pk, **fields)
+    return JsonResponse(claim_created(reivindicacao), status=201)
+
+
+def claim_fields(raw: bytes) -> dict:
+    """
+    Campos da Reivindicacao a partir do JSON do formulário público.
+    Levanta ValueError com a mensagem para o 400.
+    """
+    try:
+        body = json.loads(raw.decode("utf-8"))
     except json.JSONDecodeError:
-        return HttpResponseBadRequest("JSON inválido")
+        raise ValueError("JSON inválido")
 
     nome = body.get("nome")
-    contato = body.get("contato")
     detalhes = body.get("detalhes")
-    vinculo = body.get("vinculo")
-    identificacao = body.get("identificacao")
 
     # nome e detalhes continuam obrigatórios
     if not (nome and detalhes):
-        return HttpResponseBadRequest("Campos obrigatórios faltando")
-
-    reivindicacao = Reivindicacao.objects.create(
-        item=item,
-        nome_requerente=nome,
-        contato=contato or "",
-        detalhes=detalhes,
-        vinculo=vinculo or "",
-        identificacao=identificacao or "",
-    )
+        raise ValueError("Campos obrigatórios faltando")
 
-    data = {
+    return {
+        "nome_requerente": nome,
+        "contato": body.get("contato") or "",
+        "detalhes": detalhes,
+        "vinculo": body.get("vinculo") or "",
+        "identificacao": body.get("identificacao") or "",
+    }
+
+
+def claim_created(reivindicacao) -> dict:
+    return {
         "id": reivindicacao.id,
         "mensagem": "Reivindicação registrada e enviada para análise da equipe interna.",
     }
-    return JsonResponse(data, status=201)
+
+
+def claim_queued(ticket: str) -> dict:
+    return {
+        "ticket": ticket,
+        "mensagem": "Reivindicação recebida; em instantes ela chega para análise da equipe interna.",
+        "status_url": reverse("claim_ticket_status", args=[ticket]),
+    }
+
+
+@require_http_methods(["GET"])
+def claim_ticket_status(request, ticket):
+    """
+    Situação de uma reivindicação enviada pela fila (fila.py):
+    "pendente" (ainda no diário), "registrada" (com o id) ou "erro".
+    """
+    situacao = fila.consultar(ticket) if fila.ativa() else None
+    if situacao is None:
+        raise Http404("Ticket não encontrado")
+    return JsonResponse(situacao)
 
 
 # ----------------- API interna (painel de reivindicações) -----------------
@@ -208,41 +552,118 @@ def item_claim_create(request, item_id):
 
 @csrf_exempt
 @require_http_methods(["GET"])
+@usa_replica()
+@cache.list_condition(cache.REIVINDICACOES, cache.ITENS)
 def internal_claims_list(request):
     """
     Retorna todas as reivindicações, com alguns dados do item associado.
 
     Essa API é usada pelo painel interno para o colaborador
     visualizar as solicitações feitas pelo site público.
+
+    Também depende da versão de "itens", porque cada reivindicação leva
+    junto o status atual do item (as duas versões saem numa consulta só,
+    ver cache.request_states).
+
+    Com ?since=<revisao> devolve só o que mudou (ver sync_response).
+    Mudanças nos itens chegam pela sincronização de itens; o painel
+    atualiza o item embutido nas reivindicações a partir dela.
+
+    Com ?formato=json-stream ou ?formato=ndjson a lista completa sai em
+    streaming (ver streaming.py), para exportações grandes.
+
+    ?fields= escolhe os campos (ver serializers.py); ex.: sem
+    "descricao"/"detalhes" a lista fica bem mais leve.
     """
-    reivindicacoes = (
-        Reivindicacao.objects
-        .select_related("item")
-        .order_by("-data_envio")
-    )
+    try:
+        since = parse_since(request.GET)
+        formato = parse_format(request.GET)
+        names = CLAIM.parse(request.GET.get("fields"))
+    except ValueError as exc:
+        return HttpResponseBadRequest(str(exc))
+
+    revisao = cache.request_state(request, cache.REIVINDICACOES)[0]
+
+    if since is not None:
+        return sync_response(
+            Reivindicacao.objects.all(), CLAIM, names + ("revisao",),
+            cache.REIVINDICACOES, since, revisao,
+        )
 
-    data = []
-    for rev in reivindicacoes:
-        data.append({
-            "id": rev.id,
-            "status": rev.status,
-            "data_envio": rev.data_envio.isoformat(),
-            "nome_requerente": rev.nome_requerente,
-            "contato": rev.contato or "",
-            "detalhes": rev.detalhes,
-            "vinculo": rev.vinculo or "",
-            "identificacao": rev.identificacao or "",
-            "item": {
-                "id": rev.item.id,
-                "nome": rev.item.nome,
-                "local_encontrado": rev.item.local_encontrado or "",
-                "data_encontrado": rev.item.data_encontrado.isoformat(),
-                "status": rev.item.status,
-                "aprovado": rev.item.aprovado,
-            },
-        })
+    # values_list já faz o JOIN com o item, sem montar objetos
+    reivindicacoes = Reivindicacao.objects.order_by("-data_envio")
+
+    if formato == "json":
+        response = JsonResponse(list(CLAIM.rows(reivindicacoes, names)), safe=False)
+    else:
+        rows = CLAIM.rows(reivindicacoes, names, chunk_size=streaming.CHUNK_SIZE)
+        response = streaming.streaming_json_response(rows, formato)
+
+    response["X-Revisao"] = revisao
+    return response
+
+
+@require_http_methods(["GET"])
+def internal_claims_matches(request):
+    """
+    Uso interno: compara os detalhes de cada reivindicação pendente com
+    todos os itens em estoque (ver matching.match_pending_claims), para
+    achar quem reivindicou o item errado.
+
+    Parâmetro: k = candidatos por reivindicação (padrão 3, máximo 20).
+    Resultado: {"results": [{id, item_id, score_atual, candidatos,
+    sugerir_outro}], "itens_indexados": n}.
+    """
+    if not matching.available():
+        return HttpResponse(MATCHING_UNAVAILABLE, status=503)
+    try:
+        k = parse_limit(request.GET.get("k"), 3, 20)
+    except ValueError as exc:
+        return HttpResponseBadRequest(str(exc))
+
+    results = matching.match_pending_claims(k)
+    return JsonResponse({"results": results, "itens_indexados": len(matching.get_index())})
 
-    return JsonResponse(data, safe=False)
+
+# Intervalo entre os "pings" do SSE, para proxies não derrubarem a
+# conexão parada e para notar abas fechadas.
+SSE_HEARTBEAT_SECONDS = 20
+
+
+@require_http_methods(["GET"])
+async def internal_events(request):
+    """
+    Eventos do painel interno em tempo real (Server-Sent Events).
+
+    View assíncrona: cada aba aberta é só uma corrotina esperando numa
+    fila (events.py), sem ocupar um worker/thread. Por isso só funciona
+    servida pelo core/asgi.py (ex.: gunicorn com worker do uvicorn);
+    rodando em WSGI respondo 501 e o painel volta a atualizar sozinho
+    de tempos em tempos.
+    """
+    if not isinstance(request, ASGIRequest):
+        return HttpResponse("Eventos em tempo real exigem o servidor ASGI.", status=501)
+
+    async def stream():
+        subscription = events.broker.subscribe()
+        try:
+            # se a conexão cair, o navegador tenta de novo em 5 s
+            yield "retry: 5000\n\n"
+            while True:
+                try:
+                    message = await asyncio.wait_for(
+                        subscription.queue.get(), SSE_HEARTBEAT_SECONDS
+                    )
+                except asyncio.TimeoutError:
+                    message = ": ping\n\n"
+                yield message
+        finally:
+            events.broker.unsubscribe(subscription)
+
+    response = StreamingHttpResponse(stream(), content_type="text/event-stream")
+    response["Cache-Control"] = "no-cache"
+    response["X-Accel-Buffering"] = "no"  # nginx: não segurar os eventos
+    return response
 
 
 @csrf_exempt
@@ -251,8 +672,11 @@ def internal_claim_update_status(request, claim_id):
     """
     Atualiza o status de uma reivindicação via painel interno.
 
-    Se a reivindicação for marcada como 'Aprovada', atualizo também
-    o status do item para 'Reivindicado'.
+    Se a reivindicação for marcada como 'Aprovada', o item vira
+    'Reivindicado' e as outras reivindicações pendentes dele são
+    recusadas. As regras e a transação ficam em
+    services.alterar_status_reivindicacao; aqui só trato o HTTP
+    (409 quando a mudança não vale para o estado atual do item).
     """
     try:
         body = json.loads(request.body.decode("utf-8"))
@@ -265,21 +689,14 @@ def internal_claim_update_status(request, claim_id):
     if new_status not in valid_status:
         return HttpResponseBadRequest("Status inválido")
 
-    rev = get_object_or_404(Reivindicacao, id=claim_id)
-    rev.status = new_status
-    rev.save(update_fields=["status"])
+    try:
+        result = services.alterar_status_reivindicacao(claim_id, new_status)
+    except Reivindicacao.DoesNotExist:
+        raise Http404("Reivindicação não encontrada")
+    except services.TransicaoInvalida as exc:
+        return HttpResponse(str(exc), status=409)
 
-    # se aprovado, atualizo item
-    item = rev.item
-    if new_status == "Aprovada":
-        item.status = "Reivindicado"
-        item.save(update_fields=["status"])
-
-    return JsonResponse({
-        "id": rev.id,
-        "status": rev.status,
-        "item_status": item.status,
-    })
+    return JsonResponse(result)
 
 
 # ----------------- API interna (itens) -----------------
@@ -287,16 +704,51 @@ def internal_claim_update_status(request, claim_id):
 
 @csrf_exempt
 @require_http_methods(["GET"])
+@usa_replica()
+@cache.list_condition(cache.ITENS, cache.REIVINDICACOES)
 def internal_items_list(request):
     """
     Retorna todos os itens cadastrados para uso interno no painel.
 
     Aqui não filtro por status ou aprovação, deixo a filtragem
     para o JavaScript no painel interno.
+
+    Também depende da versão de "reivindicacoes": os contadores de
+    reivindicações mudam sem dar revisão nova ao item. Pelo ?since= eles
+    não chegam; o painel recalcula a partir das reivindicações.
+
+    Com ?since=<revisao> devolve só o que mudou (ver sync_response).
+    Com ?formato=json-stream ou ?formato=ndjson a lista completa sai em
+    streaming (ver streaming.py), para exportações grandes.
+
+    ?fields= escolhe os campos (ver serializers.py); ex.: sem
+    "descricao"/"detalhes" a lista fica bem mais leve.
     """
+    try:
+        since = parse_since(request.GET)
+        formato = parse_format(request.GET)
+        names = INTERNAL_ITEM.parse(request.GET.get("fields"))
+    except ValueError as exc:
+        return HttpResponseBadRequest(str(exc))
+
+    revisao = cache.request_state(request, cache.ITENS)[0]
+
+    if since is not None:
+        return sync_response(
+            Item.objects.all(), INTERNAL_ITEM, names + ("revisao",),
+            cache.ITENS, since, revisao,
+        )
+
     itens = Item.objects.order_by("-data_encontrado", "-data_criacao")
-    data = [serialize_item(item) for item in itens]
-    return JsonResponse(data, safe=False)
+
+    if formato == "json":
+        response = JsonResponse(list(INTERNAL_ITEM.rows(itens, names)), safe=False)
+    else:
+        rows = INTERNAL_ITEM.rows(itens, names, chunk_size=streaming.CHUNK_SIZE)
+        response = streaming.streaming_json_response(rows, formato)
+
+    response["X-Revisao"] = revisao
+    return response
 
 
 @csrf_exempt
@@ -312,44 +764,38 @@ def internal_item_create(request):
     - categoria (opcional)
     - descricao (opcional)
     - aprovado (opcional, bool)
+
+    A resposta traz também "possiveis_duplicados": itens em estoque,
+    achados na mesma semana, com texto muito parecido (ver dedup.py),
+    para o balcão conferir se o objeto já tinha sido cadastrado.
     """
     try:
         body = json.loads(request.body.decode("utf-8"))
     except json.JSONDecodeError:
         return HttpResponseBadRequest("JSON inválido")
+    if not isinstance(body, dict):
+        return HttpResponseBadRequest("JSON inválido")
 
-    nome = (body.get("nome") or "").strip()
-    local_encontrado = (body.get("local_encontrado") or "").strip()
-    data_str = (body.get("data_encontrado") or "").strip()
-
-    if not (nome and local_encontrado and data_str):
-        return HttpResponseBadRequest("Campos obrigatórios faltando")
-
+    # mesmas regras da importação em lote (ver importer.py)
     try:
-        data_encontrado = datetime.strptime(data_str, "%Y-%m-%d").date()
-    except ValueError:
-        return HttpResponseBadRequest("Formato de data inválido")
-
-    categoria = (body.get("categoria") or "").strip()
-    descricao = (body.get("descricao") or "").strip()
-    aprovado_raw = body.get("aprovado")
-
-    if isinstance(aprovado_raw, bool):
-        aprovado = aprovado_raw
-    else:
-        aprovado = False
-
-    item = Item.objects.create(
-        nome=nome,
-        local_encontrado=local_encontrado,
-        data_encontrado=data_encontrado,
-        categoria=categoria or None,
-        descricao=descricao or None,
-        aprovado=aprovado,
-        # status padrão é "Em estoque"
-    )
-
-    return JsonResponse(serialize_item(item), status=201)
+        fields = importer.clean_item_data(body)
+    except ValueError as exc:
+        return HttpResponseBadRequest(str(exc))
+
+    item = Item.objects.create(**fields)
+
+    data = serialize_item(item)
+    data["possiveis_duplicados"] = [
+        {
+            "id": other.id,
+            "nome": other.nome,
+            "local_encontrado": other.local_encontrado,
+            "data_encontrado": other.data_encontrado.isoformat(),
+            "similaridade": round(similarity, 3),
+        }
+        for other, similarity in dedup.find_duplicates(item)
+    ]
+    return JsonResponse(data, status=201)
 
 
 @csrf_exempt
@@ -444,3 +890,277 @@ def internal_item_back_to_stock(request, item_id):
         "id": item.id,
         "status": item.status,
     })
+
+
+# Ações do lote: o que cada uma grava no item. O primeiro campo é o
+# que decide se o item muda (os outros acompanham, como no Item.save).
+BULK_ACTIONS = {
+    "aprovar": {"aprovado": True},
+    "desaprovar": {"aprovado": False},
+    "devolver": {"status": "Devolvido", "devolvido_em": Now()},
+    "estoque": {"status": "Em estoque", "devolvido_em": None},
+}
+
+# Máximo de ids por requisição de lote.
+BULK_MAX_IDS = 1000
+
+
+@csrf_exempt
+@require_http_methods(["POST"])
+def internal_items_bulk(request):
+    """
+    Uso interno: aplica a mesma ação em vários itens de uma vez
+    (ex.: limpeza de fim de semestre).
+
+    JSON esperado:
+    - ids: lista de ids de itens;
+    - acao: "aprovar", "desaprovar", "devolver" ou "estoque".
+
+    Tudo numa transação: uma leitura dos itens e um único UPDATE só nos
+    que realmente mudam (em vez de um get + save por item). A resposta
+    traz o resultado de cada id: "ok", "sem_alteracao" ou
+    "nao_encontrado".
+    """
+    try:
+        body = json.loads(request.body.decode("utf-8"))
+    except json.JSONDecodeError:
+        return HttpResponseBadRequest("JSON inválido")
+
+    acao = body.get("acao")
+    if acao not in BULK_ACTIONS:
+        return HttpResponseBadRequest("Ação inválida")
+
+    ids = body.get("ids")
+    if not isinstance(ids, list) or not ids:
+        return HttpResponseBadRequest("Lista de ids faltando")
+    if len(ids) > BULK_MAX_IDS:
+        return HttpResponseBadRequest(f"No máximo {BULK_MAX_IDS} itens por vez")
+    if not all(isinstance(item_id, int) and not isinstance(item_id, bool) for item_id in ids):
+        return HttpResponseBadRequest("Ids inválidos")
+
+    changes = BULK_ACTIONS[acao]
+    field, value = next(iter(changes.items()))
+
+    with transaction.atomic():
+        current = dict(
+            Item.objects
+            .select_for_update()
+            .filter(id__in=ids)
+            .values_list("id", field)
+        )
+        to_update = [item_id for item_id, old in current.items() if old != value]
+        if to_update:
+            Item.objects.filter(id__in=to_update).update_revisado(**changes)
+
+    updated = set(to_update)
+    results = []
+    for item_id in dict.fromkeys(ids):  # sem repetir, na ordem pedida
+        if item_id not in current:
+            results.append({"id": item_id, "resultado": "nao_encontrado"})
+            continue
+        results.append({
+            "id": item_id,
+            "resultado": "ok" if item_id in updated else "sem_alteracao",
+            field: value,
+        })
+
+    return JsonResponse({
+        "acao": acao,
+        "alterados": len(updated),
+        "resultados": results,
+    })
+
+
+@csrf_exempt
+@require_http_methods(["POST"])
+def internal_items_import(request):
+    """
+    Uso interno: importa um arquivo de itens (upload multipart).
+
+    Campos do formulário:
+    - arquivo: CSV (com cabeçalho), NDJSON ou array JSON, em UTF-8,
+      com as mesmas colunas do cadastro pelo painel;
+    - formato (opcional): "csv", "json" ou "ndjson" (senão pela extensão);
+    - lote (opcional): itens gravados por transação.
+
+    Devolve o relatório de importer.import_items: linhas lidas,
+    importadas e o erro de cada linha recusada.
+    """
+    arquivo = request.FILES.get("arquivo")
+    if arquivo is None:
+        return HttpResponseBadRequest("Arquivo faltando")
+
+    try:
+        lote = int(request.POST.get("lote") or importer.DEFAULT_BATCH_SIZE)
+    except ValueError:
+        lote = 0
+    if lote < 1:
+        return HttpResponseBadRequest("Tamanho de lote inválido")
+
+    try:
+        formato = request.POST.get("formato") or importer.detect_format(arquivo.name)
+        report = importer.import_items(importer.read_rows(arquivo, formato), lote)
+    except UnicodeDecodeError:
+        return HttpResponseBadRequest("O arquivo precisa estar em UTF-8")
+    except ValueError as exc:
+        return HttpResponseBadRequest(str(exc))
+
+    return JsonResponse(report)
+
+
+@require_http_methods(["GET"])
+@usa_replica()
+def internal_export(request, conjunto):
+    """
+    Uso interno: arquivo completo de "itens" ou "reivindicacoes" para a
+    auditoria, em streaming (ver exporter.py).
+
+    Parâmetro: formato = "csv" (padrão) ou "colunar".
+
+    Só leitura, e a mais longa do painel: sai da réplica, se houver.
+    """
+    formato = request.GET.get("formato") or "csv"
+    try:
+        chunks = exporter.export_chunks(conjunto, formato)
+    except ValueError as exc:
+        return HttpResponseBadRequest(str(exc))
+
+    response = StreamingHttpResponse(chunks, content_type=exporter.CONTENT_TYPES[formato])
+    filename = f"{conjunto}-{date.today().isoformat()}.{exporter.EXTENSIONS[formato]}"
+    response["Content-Disposition"] = f'attachment; filename="{filename}"'
+    return response
+
+
+@require_http_methods(["GET"])
+def internal_metrics(request):
+    """
+    Uso interno: histogramas de tempo e de consultas por view, no
+    formato texto do Prometheus (ver metrics.py). Números deste
+    processo desde que ele subiu.
+    """
+    return HttpResponse(
+        metrics.registry.render(),
+        content_type="text/plain; version=0.0.4; charset=utf-8",
+    )
+
+
+@require_http_methods(["GET"])
+def internal_statistics(request):
+    """
+    Uso interno: estatísticas do painel (contagens por status,
+    categoria, local e semana, pendências e tempo até a devolução).
+    Lê o que o atualizar_estatisticas já calculou (ver estatisticas.py).
+    """
+    return JsonResponse(estatisticas.obter())
+
+
+# ----------------- Variantes async (ASGI) -----------------
+#
+# As mesmas APIs, com o ORM async (afirst, acreate, async for...), em
+# /api/async/. Servidas pelo core/asgi.py, a requisição não fica presa
+# a uma thread do início ao fim: cada consulta passa por uma thread só
+# enquanto roda, e entre uma e outra (ou esperando o cliente ler um
+# streaming) o event loop atende outras requisições. No WSGI (gunicorn
+# síncrono) funcionam, mas cada uma ganha um event loop próprio; lá as
+# versões normais são melhores. Comparação: manage.py benchmark_asgi.
+#
+# O Django não abre transação em código async; o que precisa de uma
+# (criar reivindicação + contador) roda inteiro no services.py, numa
+# thread (sync_to_async).
+
+
+@csrf_exempt
+@require_http_methods(["GET", "POST"])
+@usa_replica()
+@cache.list_condition(cache.ITENS)
+async def item_list_create_async(request):
+    """
+    item_list_create com o ORM async: mesmos parâmetros, cache e ETag.
+    """
+    if request.method == "GET":
+        state = await cache.arequest_state(request, cache.ITENS)
+        key = cache.make_key("publico", state[:2], request.GET)
+        try:
+            return await cache.acached_json_response(key, lambda: build_public_page_async(request.GET))
+        except ValueError as exc:
+            return HttpResponseBadRequest(str(exc))
+
+    try:
+        fields = public_item_fields(request.body)
+    except ValueError as exc:
+        return HttpResponseBadRequest(str(exc))
+
+    item = await Item.objects.acreate(**fields)
+    return JsonResponse(public_item_created(item), status=201)
+
+
+@csrf_exempt
+@require_http_methods(["POST"])
+async def item_claim_create_async(request, item_id):
+    """
+    item_claim_create com o ORM async.
+    """
+    item = await aget_object_or_404(Item, id=item_id)
+
+    try:
+        fields = claim_fields(request.body)
+    except ValueError as exc:
+        return HttpResponseBadRequest(str(exc))
+
+    if fila.ativa():
+        ticket = await sync_to_async(fila.enfileirar, thread_sensitive=False)(item.pk, fields)
+        return JsonResponse(claim_queued(ticket), status=202)
+
+    reivindicacao = await sync_to_async(services.registrar_reivindicacao)(item.pk, **fields)
+    return JsonResponse(claim_created(reivindicacao), status=201)
+
+
+async def _internal_list_async(request, queryset, fieldset, conjunto: str):
+    try:
+        since = parse_since(request.GET)
+        formato = parse_format(request.GET)
+        names = fieldset.parse(request.GET.get("fields"))
+    except ValueError as exc:
+        return HttpResponseBadRequest(str(exc))
+
+    revisao = (await cache.arequest_state(request, conjunto))[0]
+
+    if since is not None:
+        return await sync_response_async(
+            queryset.model.objects.all(), fieldset, names + ("revisao",), conjunto, since, revisao,
+        )
+
+    if formato == "json":
+        response = JsonResponse([row async for row in fieldset.arows(queryset, names)], safe=False)
+    else:
+        rows = fieldset.arows(queryset, names, chunk_size=streaming.CHUNK_SIZE)
+        response = streaming.streaming_json_response(rows, formato)
+
+    response["X-Revisao"] = revisao
+    return response
+
+
+@csrf_exempt
+@require_http_methods(["GET"])
+@usa_replica()
+@cache.list_condition(cache.REIVINDICACOES, cache.ITENS)
+async def internal_claims_list_async(request):
+    """
+    internal_claims_list com o ORM async (inclusive ?since= e streaming).
+    """
+    return await _internal_list_async(
+        request, Reivindicacao.objects.order_by("-data_envio"), CLAIM, cache.REIVINDICACOES
+    )
+
+
+@csrf_exempt
+@require_http_methods(["GET"])
+@usa_replica()
+@cache.list_condition(cache.ITENS, cache.REIVINDICACOES)
+async def internal_items_list_async(request):
+    """
+    internal_items_list com o ORM async (inclusive ?since= e streaming).
+    """
+    return await _internal_list_async(
+        request, Item.objects.order_by("-data_encontrado", "-data_criacao"), INTERNAL_ITEM, cache.ITENS
+    )